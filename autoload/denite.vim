@@ -126,6 +126,11 @@ function! denite#increment_parent_cursor(inc) abort
   let row = max([min([cursor[0] + a:inc,
         \ nvim_buf_line_count(g:denite#_filter_parent)]), 1])
   call nvim_win_set_cursor(ids[0], [row, cursor[1]])
+  if exists('*win_execute')
+    " Note: The buffer cannot be changed in <expr> mappings.
+    call timer_start(0, {-> win_execute(ids[0],
+          \ 'call denite#helper#_check_viewport()')})
+  endif
   redraw!
   return ''
 endfunction
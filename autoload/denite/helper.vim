@@ -4,6 +4,10 @@
 " License: MIT license
 "=============================================================================
 
+if !exists('s:line_changes')
+  let s:line_changes = {}
+endif
+
 function! denite#helper#complete(arglead, cmdline, cursorpos) abort
   let _ = []
 
@@ -244,6 +248,114 @@ function! denite#helper#_get_oldfiles() abort
         \ filereadable(fnamemodify(val, ":p")) || buflisted(val) })
 endfunction
 
+function! denite#helper#_get_buffer_attributes() abort
+  " Note: It gets all attributes by one call for source/buffer.
+  return map(getbufinfo(), { _, val -> {
+        \ 'number': val.bufnr,
+        \ 'name': val.name,
+        \ 'fn': fnamemodify(val.name, ':~:.'),
+        \ 'path': fnamemodify(val.name, ':p'),
+        \ 'listed': val.listed,
+        \ 'loaded': val.loaded,
+        \ 'shown': !empty(val.windows),
+        \ 'readonly': getbufvar(val.bufnr, '&readonly'),
+        \ 'modified': val.changed,
+        \ 'modifiable': getbufvar(val.bufnr, '&modifiable'),
+        \ 'filetype': getbufvar(val.bufnr, '&filetype'),
+        \ }})
+endfunction
+function! denite#helper#_get_context(user_context) abort
+  " Note: It gets the base context by one call for context.py.
+  let custom = denite#custom#_get()
+  let buffer_name = get(a:user_context, 'buffer_name', 'default')
+  let options = denite#init#_user_options()
+  call extend(options, get(custom.option, '_', {}))
+  call extend(options, get(custom.option, buffer_name, {}))
+  call extend(options, a:user_context)
+
+  let command = get(options, 'command', '')
+  if command ==# 'DeniteCursorWord'
+    let options.input = denite#util#escape_match(expand('<cword>'))
+  elseif command ==# 'DeniteBufferDir'
+    let options.path = expand('%:p:h')
+  elseif command ==# 'DeniteProjectDir'
+    let options.path = denite#project#path2project_directory(
+          \ options.path, options.root_markers)
+  endif
+
+  return {
+        \ 'options': options,
+        \ 'custom': custom,
+        \ 'ambiwidth': &ambiwidth,
+        \ 'bufname': bufname('%') ==# '' ? '' : fnamemodify(bufname('%'), ':p'),
+        \ 'bufnr': bufnr('%'),
+        \ 'deprecated_options': denite#init#_deprecated_options(),
+        \ 'encoding': &encoding,
+        \ 'filetype': &filetype,
+        \ 'has_floating': exists('*nvim_open_win'),
+        \ 'has_preview_window': !empty(filter(range(1, winnr('$')),
+        \   { _, val -> getwinvar(val, '&previewwindow') })),
+        \ 'is_windows': has('win32') || has('win64'),
+        \ 'prev_winid': win_getid(),
+        \ 'runtimepath': &runtimepath,
+        \ }
+endfunction
+function! denite#helper#_get_changedticks(bufnrs) abort
+  " Note: It returns [changedtick, line count] of the buffers for
+  " source/line.  The line count is -1 if it is unknown.
+  return map(copy(a:bufnrs), { _, val -> [
+        \ getbufvar(val, 'changedtick', -1),
+        \ get(get(getbufinfo(val), 0, {}), 'linecount', -1),
+        \ ]})
+endfunction
+function! denite#helper#_attach_line_changes(bufnr) abort
+  if !exists('*listener_add') || !bufloaded(a:bufnr)
+    return v:false
+  endif
+  if !has_key(s:line_changes, a:bufnr)
+    call listener_add(function('s:on_line_changes'), a:bufnr)
+  endif
+  let s:line_changes[a:bufnr] = {}
+  return v:true
+endfunction
+function! denite#helper#_get_line_changes(bufnr) abort
+  " Note: The range is 0-based and end-exclusive like nvim_buf_attach().
+  if !has_key(s:line_changes, a:bufnr)
+    return v:null
+  endif
+  if !bufloaded(a:bufnr)
+    call remove(s:line_changes, a:bufnr)
+    return v:null
+  endif
+  call listener_flush(a:bufnr)
+  let changes = s:line_changes[a:bufnr]
+  let s:line_changes[a:bufnr] = {}
+  if empty(changes)
+    return []
+  endif
+  return [changes.start, changes.old_end, changes.new_end,
+        \ changes.new_end > changes.start ?
+        \ getbufline(a:bufnr, changes.start + 1, changes.new_end) : []]
+endfunction
+function! s:on_line_changes(bufnr, start, end, added, changes) abort
+  if !has_key(s:line_changes, a:bufnr)
+    return
+  endif
+  let [first, last] = [a:start - 1, a:end - 1]
+  let new_last = last + a:added
+  let changes = s:line_changes[a:bufnr]
+  if empty(changes)
+    call extend(changes, {
+          \ 'start': first, 'old_end': last, 'new_end': new_last })
+  else
+    " Merge the range with the previous changes
+    let delta = changes.new_end - changes.old_end
+    let changes.old_end = max([changes.old_end, last - delta])
+    let changes.new_end = max([changes.new_end, last]) + new_last - last
+    let changes.start = min([changes.start, first])
+  endif
+endfunction
+
 
 function! denite#helper#_get_available_sources() abort
   if exists('s:source_names')
@@ -309,3 +421,69 @@ function! denite#helper#_get_temp_file(bufnr) abort
   call writefile(getbufline(a:bufnr, 1, '$'), temp)
   return temp
 endfunction
+
+function! denite#helper#_set_candidates(bufnr, words) abort
+  let g:denite#_candidates = a:words
+  let g:denite#_candidates_bufnr = a:bufnr
+endfunction
+function! denite#helper#_update_candidates(
+      \ bufnr, prev_len, start, end, words) abort
+  " Note: g:denite#_candidates may be changed by the other denite buffer.
+  if get(g:, 'denite#_candidates_bufnr', -1) != a:bufnr
+        \ || len(g:denite#_candidates) != a:prev_len
+    return v:false
+  endif
+
+  if a:end > a:start
+    call remove(g:denite#_candidates, a:start, a:end - 1)
+  endif
+  call extend(g:denite#_candidates, a:words, a:start)
+  return v:true
+endfunction
+function! denite#helper#_check_viewport() abort
+  " Page in the rows if the cursor is near the edge of the rendered rows
+  let offset = denite#get_status('line_offset')
+  let total = denite#get_status('line_total')
+  let margin = winheight(0)
+  if (line('.') <= margin && offset > 0)
+        \ || (line('.') > line('$') - margin && offset + line('$') < total)
+    call denite#call_map('update_viewport')
+  endif
+endfunction
+function! denite#helper#_highlight_matches(bufnr, winid, positions, range) abort
+  " {positions} are [lnum, col, length] and {range} is the highlighted
+  " lines.
+  if has('nvim')
+    let ns = nvim_create_namespace('denite-match')
+    call nvim_buf_clear_namespace(a:bufnr, ns, 0, -1)
+    for [lnum, col, length] in a:positions
+      call nvim_buf_add_highlight(a:bufnr, ns, 'deniteMatchedRange',
+            \ lnum - 1, col - 1, col - 1 + length)
+    endfor
+  else
+    for id in getbufvar(a:bufnr, 'denite_match_ids', [])
+      silent! call matchdelete(id, a:winid)
+    endfor
+    let ids = []
+    " Note: Old Vim accepts only 8 positions at once.
+    for i in range(0, len(a:positions) - 1, 8)
+      call add(ids, matchaddpos('deniteMatchedRange',
+            \ a:positions[i : i + 7], 10, -1, {'window': a:winid}))
+    endfor
+    call setbufvar(a:bufnr, 'denite_match_ids', ids)
+  endif
+  call setbufvar(a:bufnr, 'denite_match_range', a:range)
+endfunction
+function! denite#helper#_check_match_highlight() abort
+  " Highlight the rows if the window shows the other rows
+  let range = get(b:, 'denite_match_range', [])
+  if !empty(range) && (line('w0') < range[0] || line('w$') > range[1])
+    call denite#call_map('update_match_highlight')
+  endif
+endfunction
+function! denite#helper#_check_scrolled_to_end() abort
+  " Resume the paused sources if the window shows the last row
+  if get(b:, 'denite_paused', v:false) && line('w$') >= line('$')
+    call denite#call_async_map('update_candidates')
+  endif
+endfunction
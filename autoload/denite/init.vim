@@ -100,6 +100,8 @@ function! denite#init#_user_options() abort
         \ 'auto_action': '',
         \ 'auto_resize': v:false,
         \ 'buffer_name': 'default',
+        \ 'cache_directory': s:get_cache_directory(),
+        \ 'child_process': v:false,
         \ 'cursor_pos': '',
         \ 'cursorline': v:true,
         \ 'default_action': 'default',
@@ -124,6 +126,7 @@ function! denite#init#_user_options() abort
         \ 'immediately_1': v:false,
         \ 'input': '',
         \ 'match_highlight': v:false,
+        \ 'match_jobs': 0,
         \ 'matchers': '',
         \ 'max_candidate_width': 200,
         \ 'max_dynamic_update_candidates': 20000,
@@ -145,8 +148,10 @@ function! denite#init#_user_options() abort
         \ 'split': 'horizontal',
         \ 'start_filter': v:false,
         \ 'statusline': v:true,
+        \ 'trace': '',
         \ 'unique': v:false,
         \ 'vertical_preview': v:false,
+        \ 'viewport': v:false,
         \ 'wincol': &columns / 4,
         \ 'winheight': 20,
         \ 'winminheight': -1,
@@ -154,6 +159,13 @@ function! denite#init#_user_options() abort
         \ 'winwidth': &columns / 2,
         \}
 endfunction
+function! s:get_cache_directory() abort
+  if exists('*stdpath')
+    return stdpath('cache') . '/denite'
+  endif
+  return ($XDG_CACHE_HOME !=# '' ? $XDG_CACHE_HOME : expand('~/.cache'))
+        \ . '/denite'
+endfunction
 function! denite#init#_deprecated_options() abort
   return {}
 endfunction
@@ -0,0 +1,103 @@
+# ============================================================================
+# FILE: benchmark.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+"""The startup benchmark of denite in the embedded Neovim
+
+It starts the sources by Rplugin.start() with the "trace" option and
+prints the median wall times of the phases in milliseconds.
+
+Usage:
+    python benchmark/benchmark.py [--runs N] [--output result.json] file/rec
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+import json
+import sys
+import typing
+
+import pynvim
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR.joinpath('rplugin', 'python3')))
+
+from denite.rplugin import Rplugin  # noqa: E402
+
+
+def attach(nvim: str) -> typing.Any:
+    vim = pynvim.attach('child', argv=[
+        nvim, '--embed', '--headless', '-u', 'NONE', '-i', 'NONE', '-n',
+        '--cmd', 'set runtimepath^=' + str(BASE_DIR)])
+    # The remote plugin is not registered in the embedded Neovim
+    vim.command('execute "function! _denite_init() abort\\n'
+                'let g:denite#_channel_id = %d\\nendfunction"'
+                % vim.channel_id)
+    vim.call('denite#init#_initialize')
+    return vim
+
+
+def run(vim: typing.Any, sources: typing.List[str], trace: str,
+        cache_directory: str, index: int) -> typing.List[typing.Any]:
+    buffer_name = f'benchmark{index}'
+    rplugin = Rplugin(vim)
+    rplugin.start([[{'name': x, 'args': []} for x in sources], {
+        'buffer_name': buffer_name,
+        'cache_directory': cache_directory,
+        'trace': trace,
+    }])
+    rplugin.get_ui(buffer_name).quit()
+    with open(trace) as f:
+        events: typing.List[typing.Any] = json.load(f)['traceEvents']
+    return events
+
+
+def main() -> None:
+    parser = ArgumentParser(description='denite startup benchmark')
+    parser.add_argument('sources', nargs='*', default=['file'])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--nvim', default='nvim')
+    parser.add_argument('--cache-directory', default='',
+                        help='the cache directory (default: temporary)')
+    parser.add_argument('--output', help='save the result as JSON')
+    args = parser.parse_args()
+
+    vim = attach(args.nvim)
+    times: typing.Dict[str, typing.List[float]] = {}
+    with TemporaryDirectory() as tmpdir:
+        cache_directory = args.cache_directory or str(
+            Path(tmpdir).joinpath('cache'))
+        for i in range(args.runs):
+            trace = str(Path(tmpdir).joinpath(f'trace{i}.json'))
+            phases: typing.Dict[str, float] = {}
+            for event in run(vim, args.sources, trace, cache_directory, i):
+                phases[event['name']] = (phases.get(event['name'], 0.0) +
+                                         event['dur'] / 1000)
+            for [name, time] in phases.items():
+                times.setdefault(name, []).append(time)
+    vim.close()
+
+    # The first run is cold and the others are warm
+    result = {
+        name: {
+            'cold': values[0],
+            'median': median(values[1:] if len(values) > 1 else values),
+        } for [name, values] in times.items()
+    }
+    print(f'{"phase":20} {"cold(ms)":>10} {"median(ms)":>10}')
+    for [name, value] in sorted(result.items(),
+                                key=lambda x: -x[1]['cold']):
+        print(f'{name:20} {value["cold"]:10.2f} {value["median"]:10.2f}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'sources': args.sources, 'runs': args.runs,
+                       'phases': result}, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,25 +4,94 @@
 # License: MIT license
 # ============================================================================
 
-import asyncio
+from queue import Queue, Empty
+from threading import Thread
+import msgpack
+import os
+import subprocess
 import typing
 
 
-class Process(asyncio.SubprocessProtocol):
+class Process(object):
+    """The child process which communicates by msgpack over stdio
 
-    def __init__(self, plugin: typing.Any) -> None:
-        self._plugin = plugin
-        self._vim = plugin._vim
+    The messages from the child are unpacked by the reader thread, so the
+    parent can receive them without blocking.
+    """
 
-    def connection_made(self, transport: typing.Any) -> None:
-        self._unpacker = self._plugin._connect_stdin(
-            transport.get_pipe_transport(0))
+    def __init__(self, commands: typing.List[str]) -> None:
+        info = None
+        if os.name == 'nt':
+            info = subprocess.STARTUPINFO()  # type: ignore
+            info.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # type: ignore
+        self._proc: typing.Optional[typing.Any] = subprocess.Popen(
+            commands,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            startupinfo=info)
+        self._packer = msgpack.Packer(
+            unicode_errors='surrogateescape', default=str)
+        self._unpacker = msgpack.Unpacker(
+            unicode_errors='surrogateescape')
+        self._queue_out: Queue[typing.Any] = Queue()
+        self._thread: typing.Optional[Thread] = Thread(
+            target=self.enqueue_output, daemon=True)
+        self._thread.start()
 
-    def pipe_data_received(self, fd: int, data: typing.Any) -> None:
-        unpacker = self._unpacker
-        unpacker.feed(data)
-        for child_out in unpacker:
-            self._plugin._queue_out.put(child_out)
+    def is_alive(self) -> bool:
+        return bool(self._proc and self._proc.poll() is None)
 
-    def process_exited(self) -> None:
-        pass
+    def kill(self) -> None:
+        if not self._proc:
+            return
+
+        if self._proc.poll() is None:
+            # _proc is running
+            self._proc.kill()
+            self._proc.wait()
+
+        self._proc = None
+        self._queue_out = Queue()
+        if self._thread:
+            self._thread.join(1.0)
+        self._thread = None
+
+    def write(self, message: typing.Any) -> None:
+        """Send {message} to the child.  It raises OSError if the child is
+        dead."""
+        if not self._proc:
+            raise BrokenPipeError('The child process is killed')
+        self._proc.stdin.write(self._packer.pack(message))
+        self._proc.stdin.flush()
+
+    def read(self, timeout: float) -> typing.Any:
+        """Get the message from the child.  It returns None if there is no
+        message in {timeout} seconds."""
+        try:
+            return self._queue_out.get(timeout=timeout) if timeout > 0 else (
+                self._queue_out.get_nowait())
+        except Empty:
+            return None
+
+    def read_error(self) -> str:
+        if not self._proc or self._proc.poll() is None:
+            return ''
+        return str(self._proc.stderr.read().decode(errors='replace'))
+
+    def enqueue_output(self) -> None:
+        if not self._proc:
+            return
+
+        stdout = self._proc.stdout
+        while True:
+            try:
+                feed = stdout.read1(102400)
+            except (OSError, ValueError):
+                return
+            if not feed:
+                # EOF
+                return
+            self._unpacker.feed(feed)
+            for child_out in self._unpacker:
+                self._queue_out.put(child_out)
@@ -4,6 +4,7 @@
 # License: MIT license
 # ============================================================================
 
+import heapq
 import typing
 from abc import ABC, abstractmethod
 from pynvim import Nvim
@@ -11,6 +12,9 @@ from pynvim import Nvim
 import denite.util
 from denite.util import UserContext, Candidates
 
+# The matched ranges [(start, end)] in the text
+MatchPositions = typing.List[typing.Tuple[int, int]]
+
 
 class Base(ABC):
 
@@ -18,6 +22,8 @@ class Base(ABC):
         self.vim = vim
         self.name = 'base'
         self.description = ''
+        self.is_narrowing = False
+        self.is_parallel = False
         self.vars: typing.Dict[str, typing.Any] = {}
 
     @abstractmethod
@@ -27,6 +33,47 @@ class Base(ABC):
     def convert_pattern(self, input_str: str) -> str:
         return ''
 
+    def get_match_positions(self, context: UserContext, text: str
+                            ) -> typing.Optional[MatchPositions]:
+        """Get the matched ranges(start, end) of context['input'] in
+        {text}.  The matcher can override it to highlight the matched
+        positions instead of convert_pattern().  None means it is not
+        supported."""
+        return None
+
+    def score_batch(self, words: typing.List[str],
+                    pattern: str) -> typing.List[typing.Any]:
+        """Get the scores of {words} for {pattern} at once.  The sorter
+        can override it to score the words in batch."""
+        return [0] * len(words)
+
+    def sort_candidates(self, context: UserContext,
+                        ranks: typing.Sequence[typing.Any],
+                        key: typing.Callable[[typing.Any], typing.Any]
+                        ) -> Candidates:
+        """Sort context['candidates'] by {key} of {ranks} and set
+        "filter__rank" attribute.
+
+        If context['max_candidates'] is set, only the top candidates are
+        selected by partial sort.  It is stable like sorted()."""
+        candidates = context['candidates']
+        limit = context.get('max_candidates', 0)
+        indexes: typing.Iterable[int] = range(len(candidates))
+
+        def get_key(index: int) -> typing.Any:
+            return key(ranks[index])
+
+        if 0 < limit < len(candidates):
+            indexes = heapq.nsmallest(limit, indexes, key=get_key)
+        else:
+            indexes = sorted(indexes, key=get_key)
+
+        result = []
+        for index in indexes:
+            candidates[index]['filter__rank'] = ranks[index]
+            result.append(candidates[index])
+        return result
+
     def debug(self, expr: str) -> None:
         denite.util.debug(self.vim, expr)
 
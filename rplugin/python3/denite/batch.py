@@ -0,0 +1,87 @@
+# ============================================================================
+# FILE: batch.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+import typing
+
+try:
+    import numpy as _numpy
+    numpy: typing.Any = _numpy
+except ImportError:
+    numpy = None
+
+# The number of the words processed at once
+BATCH_SIZE = 4096
+
+BatchScorer = typing.Callable[[typing.Any, typing.Any], typing.Any]
+Scorer = typing.Callable[[str], typing.Any]
+
+
+def is_available() -> bool:
+    return numpy is not None
+
+
+def score_words(words: typing.List[str], pattern: str,
+                scorer: BatchScorer, scalar_scorer: Scorer
+                ) -> typing.List[typing.Any]:
+    """Score {words} by {scorer} with the code point arrays
+
+    {scorer} takes the padded code point array of the words(sorted by the
+    length in descending order) and the lengths.  It returns the scores.
+    Only ASCII words are scored by {scorer}; the others are scored by
+    {scalar_scorer}(word) because the case conversion may change the
+    length.
+    """
+    if not is_available() or not is_ascii(pattern):
+        return [scalar_scorer(x) for x in words]
+
+    scores: typing.List[typing.Any] = [None] * len(words)
+    encoded: typing.Dict[int, bytes] = {}
+    for [i, word] in enumerate(words):
+        try:
+            encoded[i] = word.encode('ascii')
+        except UnicodeEncodeError:
+            scores[i] = scalar_scorer(word)
+    indexes = sorted(encoded.keys(), key=lambda x: -len(encoded[x]))
+
+    for start in range(0, len(indexes), BATCH_SIZE):
+        batch = indexes[start:start+BATCH_SIZE]
+        [codes, lengths] = get_code_points([encoded[x] for x in batch])
+        for [i, score] in zip(batch, scorer(codes, lengths).tolist()):
+            scores[i] = score
+    return scores
+
+
+def get_code_points(words: typing.List[bytes]) -> typing.Tuple[
+        typing.Any, typing.Any]:
+    """Get the padded code point array and the lengths of ASCII {words}.
+    Note: The array has a padding column to look ahead the last code."""
+    lengths = numpy.array([len(x) for x in words], dtype=numpy.int64)
+    width = int(lengths.max()) + 1 if words else 1
+    buffer = b''.join([x.ljust(width, b'\0') for x in words])
+    codes = numpy.frombuffer(buffer, dtype=numpy.uint8).reshape(
+        len(words), width)
+    return (codes, lengths)
+
+
+def is_ascii(text: str) -> bool:
+    try:
+        text.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def to_lower(codes: typing.Any) -> typing.Any:
+    """Convert ASCII codes to lower case"""
+    return numpy.where((codes >= 65) & (codes <= 90), codes + 32, codes)
+
+
+def is_upper(codes: typing.Any) -> typing.Any:
+    return (codes >= 65) & (codes <= 90)
+
+
+def is_lower(codes: typing.Any) -> typing.Any:
+    return (codes >= 97) & (codes <= 122)
@@ -0,0 +1,49 @@
+# ============================================================================
+# FILE: cache.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+from hashlib import sha1
+from os import replace
+from pathlib import Path
+import msgpack
+import typing
+
+from denite.util import expand
+
+# Increase it when the cache format is changed
+CACHE_VERSION = 1
+
+
+def get_cache_path(cache_directory: str, name: str,
+                   key: typing.Any) -> Path:
+    """Get the cache file path of {key} in {cache_directory}/{name}"""
+    digest = sha1(repr(key).encode('utf-8', 'surrogatepass')).hexdigest()
+    return Path(expand(cache_directory)).joinpath(name, digest + '.msgpack')
+
+
+def load_cache(path: Path) -> typing.Any:
+    """Load the cache file.  It returns None if it is invalid."""
+    try:
+        with path.open('rb') as f:
+            data = msgpack.unpack(f, raw=False, strict_map_key=False,
+                                  unicode_errors='surrogateescape')
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+        return None
+    return data.get('data', None)
+
+
+def save_cache(path: Path, data: typing.Any) -> None:
+    """Save the cache file atomically"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with tmp.open('wb') as f:
+            msgpack.pack({'version': CACHE_VERSION, 'data': data}, f,
+                         unicode_errors='surrogateescape')
+        replace(str(tmp), str(path))
+    except OSError:
+        pass
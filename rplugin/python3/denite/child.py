@@ -9,56 +9,124 @@ from pathlib import Path
 from pynvim import Nvim
 import copy
 import msgpack
+import os
 import re
+import select
 import sys
+import time
+import traceback
 import typing
 
 from denite.util import (
     get_custom, debug, regex_convert_str_vim,
-    import_rplugins, expand, split_input, abspath)
-from denite.util import UserContext, Candidates, Candidate
+    expand, abspath, is_narrowed_input,
+    match_candidates)
+from denite.util import UserContext, Candidates, Candidate, split_input
+from denite.base.filter import MatchPositions
 from denite.base.source import Base as Source
 from denite.base.kind import Base as Kind
+from denite.cache import get_cache_path, load_cache, save_cache
+from denite.parallel import Matcher as ParallelMatcher, PARALLEL_THRESHOLD
+from denite.registry import Registry
+from denite.trace import phase
 
 Action = typing.Dict[str, typing.Any]
 
+# The interval to check the newer input while filtering
+CANCEL_CHECK_INTERVAL = 0.02
+# The context keys which change the match results except the input
+MATCH_CONTEXT_KEYS = [
+    'bufname', 'bufnr', 'ignorecase', 'max_candidate_width', 'path',
+    'root_markers',
+]
+# The source context keys which are sent to the filter process
+SOURCE_CONTEXT_KEYS = ['is_async', 'path']
+
+
+class FilterCanceled(Exception):
+    """The filtering is canceled by the newer input"""
+
+
+class FilterSource(Source):
+    """The source in the filter process
+
+    The candidates are gathered by the source in the parent and they are
+    set by Child.set_candidates().
+    """
+
+    def __init__(self, vim: Nvim, attrs: typing.Dict[str, typing.Any],
+                 context: UserContext) -> None:
+        super().__init__(vim)
+        for [name, value] in attrs.items():
+            setattr(self, name, value)
+        self.status = self.name
+        self.context = copy.copy(context)
+        self.context['is_async'] = False
+        self.context['is_paused'] = False
+        self.context['is_interactive'] = False
+        self.context['all_candidates'] = []
+        self.context['candidates'] = []
+        self.context['prev_input'] = context['input']
+
+    def gather_candidates(self, context: UserContext) -> Candidates:
+        return []
+
+    def get_status(self, context: UserContext) -> str:
+        return self.status
+
 
 class Child(object):
 
     def __init__(self, vim: Nvim) -> None:
         self._vim = vim
-        self._sources: typing.Dict[str, typing.Any] = {}
-        self._filters: typing.Dict[str, typing.Any] = {}
-        self._kinds: typing.Dict[str, typing.Any] = {}
+        self._sources = Registry('source', 'Source', self._load_source)
+        self._filters = Registry('filter', 'Filter', self._load_filter)
+        self._kinds = Registry('kind', 'Kind', self._load_kind)
         self._runtimepath = ''
         self._current_sources: typing.List[typing.Any] = []
+        self._match_caches: typing.Dict[int, typing.Dict[str, typing.Any]] = {}
+        # The candidates which are sent to the filter process
+        self._sent_candidates: typing.Dict[
+            int, typing.Tuple[Candidates, int]] = {}
+        self._parallel_matcher: typing.Optional[ParallelMatcher] = None
+        self._is_process = False
+        self._pending: typing.List[typing.Any] = []
+        self._cancel_input: typing.Optional[str] = None
+        self._cancel_check_time = 0.0
         self._unpacker = msgpack.Unpacker(
             unicode_errors='surrogateescape')
         self._packer = msgpack.Packer(
-            unicode_errors='surrogateescape')
+            unicode_errors='surrogateescape', default=str)
 
     def main_loop(self, stdout: typing.Any) -> None:
+        self._is_process = True
         while True:
-            feed = sys.stdin.buffer.raw.read(102400)  # type: ignore
-            if feed is None:
+            if not self._pending:
+                if not self._read_input(True):
+                    # EOF
+                    return
                 continue
-            if feed == b'':
-                # EOF
-                return
 
-            self._unpacker.feed(feed)
-
-            for child_in in self._unpacker:
-                name = child_in['name']
-                args = child_in['args']
-                queue_id = child_in['queue_id']
-
-                ret = self.main(name, args, queue_id)
-                if ret:
-                    # _ret = self._vim.vars['denite#_ret']
-                    # _ret[queue_id] = ret
-                    print(ret)
-                    self._vim.vars['denite#_ret'] = ret
+            child_in = self._pending.pop(0)
+            name = child_in['name']
+            args = child_in['args']
+            queue_id = child_in['queue_id']
+
+            ret: typing.Any = None
+            err = ''
+            if name == 'filter_candidates' and self._has_filter_request():
+                # Skip the request superseded by the newer input
+                if len(args) > 1:
+                    self.set_candidates(args[1])
+            else:
+                try:
+                    ret = self.main(name, args, queue_id)
+                except Exception:
+                    err = traceback.format_exc()
+            stdout.buffer.write(self._packer.pack({
+                'queue_id': queue_id, 'ret': ret, 'error': err,
+            }))
+            stdout.buffer.flush()
 
     def main(self, name: str, args: typing.List[typing.Any],
              queue_id: int) -> typing.Any:
@@ -73,7 +141,11 @@ class Child(object):
             self.on_close(args[0])
         elif name == 'init_syntax':
             self.init_syntax(args[0], args[1])
+        elif name == 'init_filters':
+            self.init_filters(args[0], args[1])
         elif name == 'filter_candidates':
+            if len(args) > 1:
+                self.set_candidates(args[1])
             ret = self.filter_candidates(args[0])
         elif name == 'do_action':
             ret = self.do_action(args[0], args[1], args[2])
@@ -81,6 +153,10 @@ class Child(object):
             ret = self.get_action(args[0], args[1], args[2])
         elif name == 'get_action_names':
             ret = self.get_action_names(args[0], args[1])
+        elif name == 'get_match_positions':
+            ret = self.get_match_positions(args[0], args[1])
+        elif name == 'is_paused':
+            ret = self.is_paused()
         return ret
 
     def start(self, context: UserContext) -> None:
@@ -90,9 +166,8 @@ class Child(object):
             return
 
         # Recache
-        self._load_sources(context)
-        self._load_filters(context)
-        self._load_kinds(context)
+        with phase('registry'):
+            self._update_registries(context)
         self._runtimepath = self._vim.options['runtimepath']
 
         # Check invalid alias
@@ -121,6 +196,7 @@ class Child(object):
             candidates = self._gather_source_candidates(
                 source.context, source)
 
+            self._match_caches.pop(source.index, None)
             ctx['all_candidates'] = candidates
             ctx['candidates'] = candidates
 
@@ -128,6 +204,10 @@ class Child(object):
 
     def on_init(self, context: UserContext) -> None:
         self._current_sources = []
+        self._match_caches = {}
+        self._sent_candidates = {}
+        if self._parallel_matcher:
+            self._parallel_matcher.clear()
         index = 0
         for [name, args] in [[x['name'], x['args']]
                              for x in context['sources']]:
@@ -138,6 +218,7 @@ class Child(object):
             source.context = copy.copy(context)
             source.context['args'] = args
             source.context['is_async'] = False
+            source.context['is_paused'] = False
             source.context['is_interactive'] = False
             source.context['all_candidates'] = []
             source.context['candidates'] = []
@@ -157,10 +238,80 @@ class Child(object):
                     self._custom, 'source', source.name, 'args', [])
 
             if hasattr(source, 'on_init'):
-                source.on_init(source.context)
+                with phase('on_init', source=source.name):
+                    source.on_init(source.context)
             self._current_sources.append(source)
             index += 1
 
+        self._init_filters(context)
+
+    def init_filters(self, context: UserContext,
+                     sources: typing.List[typing.Dict[str, typing.Any]]
+                     ) -> None:
+        """Initialize the filters of {sources} in the filter process.  The
+        sources are got by get_filter_sources() in the parent."""
+        self._current_sources = [
+            FilterSource(self._vim, x, context) for x in sources]
+        self._match_caches = {}
+        if self._parallel_matcher:
+            self._parallel_matcher.clear()
+        self._init_filters(context)
+
+    def get_filter_sources(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Get the attributes of the sources for init_filters()"""
+        return [{
+            'name': x.name,
+            'index': x.index,
+            'matchers': x.matchers,
+            'sorters': x.sorters,
+            'converters': x.converters,
+            'max_candidates': x.max_candidates,
+        } for x in self._current_sources]
+
+    def update_candidates(self, context: UserContext
+                          ) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Gather the candidates of the interactive and the async sources
+        for the filter process.  It returns the candidates which are not
+        sent yet for set_candidates()."""
+        updates = []
+        for source in self._current_sources:
+            ctx = source.context
+            self._set_source_input(ctx, context)
+            self._gather_async_candidates(ctx, source)
+
+            entire = ctx['all_candidates']
+            [sent, end] = self._sent_candidates.get(source.index, ([], 0))
+            is_reset = sent is not entire
+            updates.append({
+                'index': source.index,
+                'context': {x: ctx[x] for x in SOURCE_CONTEXT_KEYS},
+                'status': source.get_status(ctx),
+                'is_reset': is_reset,
+                'candidates': entire if is_reset else entire[end:],
+            })
+            self._sent_candidates[source.index] = (entire, len(entire))
+        return updates
+
+    def set_candidates(self,
+                       updates: typing.List[typing.Dict[str, typing.Any]]
+                       ) -> None:
+        """Set the candidates of update_candidates() in the filter
+        process"""
+        for update in updates:
+            source = self._current_sources[update['index']]
+            source.context.update(update['context'])
+            source.status = update['status']
+            if update['is_reset']:
+                source.context['all_candidates'] = list(update['candidates'])
+                self._match_caches.pop(source.index, None)
+            else:
+                source.context['all_candidates'] += update['candidates']
+
+    def _init_filters(self, context: UserContext) -> None:
+        # Import the filters of the sources before on_init()
+        for name in self._get_filter_names(context):
+            self._filters.load(name)
+
         for filter in self._filters.values():
             if hasattr(filter, 'on_init'):
                 filter.on_init(context)
@@ -199,15 +350,30 @@ class Child(object):
                 'contains=deniteMatchedRange contained')
             source.define_syntax()
 
-    def filter_candidates(self,
-                          context: UserContext) -> typing.List[typing.Any]:
+    def filter_candidates(self, context: UserContext
+                          ) -> typing.Optional[typing.List[typing.Any]]:
+        """Filter the candidates.  It returns None if the filtering is
+        canceled by the newer input."""
+        self._cancel_input = (context['input']
+                              if context.get('is_cancelable', False)
+                              else None)
+        self._cancel_check_time = time.time()
+        try:
+            return self._filter_all_candidates(context)
+        except FilterCanceled:
+            return None
+
+    def _filter_all_candidates(self, context: UserContext
+                               ) -> typing.List[typing.Any]:
         pattern = ''
         statuses = []
         candidates: Candidates = []
         total_entire_len = 0
-        for status, partial, patterns, entire_len in self._filter_candidates(
-                context):
+        total_matched_len = 0
+        for [status, partial, patterns, entire_len,
+             matched_len] in self._filter_candidates(context):
             total_entire_len += entire_len
+            total_matched_len += matched_len
             candidates += partial
             statuses.append(status)
 
@@ -216,6 +382,7 @@ class Child(object):
 
         if context['sorters']:
             for sorter in context['sorters'].split(','):
+                self._check_canceled()
                 ctx = copy.copy(context)
                 ctx['candidates'] = candidates
                 candidates = self._filters[sorter].filter(ctx)
@@ -240,7 +407,7 @@ class Child(object):
         if self.is_async():
             statuses.append('[async]')
         return [self.is_async(), pattern, statuses, total_entire_len,
-                candidates]
+                total_matched_len, candidates]
 
     def do_action(self, context: UserContext,
                   action_name: str, targets: Candidates) -> bool:
@@ -306,10 +473,39 @@ class Child(object):
                 'source/' + sources.pop().name).keys()
         return list(actions)
 
+    def get_match_positions(self, context: UserContext,
+                            candidates: Candidates) -> typing.List[
+                                typing.Optional[MatchPositions]]:
+        """Get the matched ranges in the abbr of {candidates} by the
+        first highlighting matcher of the sources.  None means the matcher
+        does not support the positions."""
+        matchers: typing.Dict[int, typing.Any] = {}
+        results: typing.List[typing.Optional[MatchPositions]] = []
+        for candidate in candidates:
+            index = int(candidate.get('source_index', -1))
+            if index not in matchers:
+                matchers[index] = self._get_highlight_matcher(
+                    context, index)
+            [ctx, matcher, terms] = matchers[index]
+            if not matcher:
+                results.append([])
+                continue
+
+            results.append(self._get_match_positions(
+                ctx, matcher, terms,
+                str(candidate.get('abbr', candidate['word']))))
+        return results
+
     def is_async(self) -> bool:
         return len([x for x in self._current_sources
                     if x.context['is_async']]) > 0
 
+    def is_paused(self) -> bool:
+        """Whether the sources wait the scroll to gather more
+        candidates"""
+        return len([x for x in self._current_sources
+                    if x.context['is_paused']]) > 0
+
     def debug(self, expr: typing.Any) -> None:
         debug(self._vim, expr)
 
@@ -317,37 +513,102 @@ class Child(object):
         self._vim.call('denite#util#print_error', msg)
         self._vim.call('denite#util#getchar')
 
+    def _check_canceled(self) -> None:
+        """Abort the stale filtering if the newer input is requested"""
+        now = time.time()
+        if now < self._cancel_check_time + CANCEL_CHECK_INTERVAL:
+            return
+        self._cancel_check_time = now
+
+        if self._is_process:
+            self._read_input(False)
+            is_canceled = self._has_filter_request()
+        elif self._cancel_input is not None:
+            # Note: denite-filter updates the variable before the request.
+            is_canceled = self._vim.vars.get(
+                'denite#_filter_prev_input',
+                self._cancel_input) != self._cancel_input
+        else:
+            is_canceled = False
+        if is_canceled:
+            raise FilterCanceled()
+
+    def _has_filter_request(self) -> bool:
+        return any([x['name'] == 'filter_candidates'
+                    for x in self._pending])
+
+    def _read_input(self, is_blocking: bool) -> bool:
+        """Read the requests from stdin.  It returns False if EOF."""
+        stdin = sys.stdin.buffer.raw  # type: ignore
+        if not is_blocking and (
+                # Note: select() does not support pipes in Windows.
+                os.name == 'nt' or not select.select([stdin], [], [], 0)[0]):
+            return True
+
+        feed = stdin.read(102400)
+        if feed is None:
+            return True
+        if feed == b'':
+            return False
+        self._unpacker.feed(feed)
+        self._pending += list(self._unpacker)
+        return True
+
+    def _get_highlight_matcher(self, context: UserContext,
+                               index: int) -> typing.Tuple[
+                                   UserContext, typing.Any, typing.List[str]]:
+        """Get the matcher which highlights the input and the input
+        terms"""
+        if not (0 <= index < len(self._current_sources)):
+            return ({}, None, [])
+        source = self._current_sources[index]
+        ctx = copy.copy(source.context)
+        self._set_input(ctx, context)
+        terms = [x for x in split_input(ctx['input']) if x and x[0] != '!']
+        for matcher in [self._filters[x] for x in
+                        (context['matchers'].split(',')
+                         if context['matchers'] else source.matchers)
+                        if x in self._filters]:
+            if matcher.convert_pattern(ctx['input']):
+                return (ctx, matcher, terms)
+        return (ctx, None, terms)
+
+    def _get_match_positions(self, ctx: UserContext, matcher: typing.Any,
+                             terms: typing.List[str],
+                             text: str) -> typing.Optional[MatchPositions]:
+        positions: MatchPositions = []
+        for term in terms:
+            ctx['input'] = term
+            term_positions = matcher.get_match_positions(ctx, text)
+            if term_positions is None:
+                return None
+            positions += term_positions
+        return positions
+
+    def _set_input(self, ctx: UserContext, context: UserContext) -> None:
+        ctx['input'] = context['input']
+        if context['expand']:
+            ctx['input'] = expand(ctx['input'])
+        if context['smartcase']:
+            ctx['ignorecase'] = re.search(r'[A-Z]', ctx['input']) is None
+
     def _filter_candidates(self, context: UserContext) -> typing.Generator[
-            typing.Tuple[str, Candidates, typing.Any, int], None, None]:
+            typing.Tuple[str, Candidates, typing.Any, int, int], None, None]:
         for source in self._current_sources:
+            self._check_canceled()
             ctx = source.context
-            ctx['matchers'] = context['matchers']
-            ctx['input'] = context['input']
-            if context['expand']:
-                ctx['input'] = expand(ctx['input'])
-            if context['smartcase']:
-                ctx['ignorecase'] = re.search(r'[A-Z]', ctx['input']) is None
-            ctx['async_timeout'] = 1.0 if context['is_windows'] else 0.03
-            prev_input = ctx['prev_input']
-            if prev_input != ctx['input'] and ctx['is_interactive']:
-                ctx['event'] = 'interactive'
-                ctx['all_candidates'] = self._gather_source_candidates(
-                    ctx, source)
-            ctx['prev_input'] = ctx['input']
-            if ctx['is_async']:
-                ctx['event'] = 'async'
-                ctx['all_candidates'] += self._gather_source_candidates(
-                    ctx, source)
+            self._set_source_input(ctx, context)
+            if not self._is_process:
+                # Note: The candidates of the filter process are gathered
+                # by the parent.
+                self._gather_async_candidates(ctx, source)
             if not ctx['all_candidates']:
                 yield self._get_source_status(
-                    ctx, source, ctx['all_candidates'], []), [], [], 0
+                    ctx, source, ctx['all_candidates'], []), [], [], 0, 0
                 continue
 
-            candidates = self._filter_source_candidates(ctx, source)
-
-            for c in candidates:
-                c['source_name'] = source.name
-                c['source_index'] = source.index
+            [candidates, matched_len] = self._filter_source_candidates(
+                ctx, source)
 
             patterns = filterfalse(lambda x: x == '', (
                 self._filters[x].convert_pattern(ctx['input'])
@@ -358,48 +619,202 @@ class Child(object):
             # Free memory
             ctx['candidates'] = []
 
-            yield status, candidates, patterns, len(ctx['all_candidates'])
-
-    def _filter_source_candidates(self, ctx: UserContext,
-                                  source: Source) -> Candidates:
-        partial: Candidates = []
-        entire = ctx['all_candidates']
-        ctx['candidates'] = entire
-
+            yield (status, candidates, patterns,
+                   len(ctx['all_candidates']), matched_len)
+
+    def _set_source_input(self, ctx: UserContext,
+                          context: UserContext) -> None:
+        ctx['matchers'] = context['matchers']
+        self._set_input(ctx, context)
+        ctx['async_timeout'] = 1.0 if context['is_windows'] else 0.03
+        ctx['is_scrolled_to_end'] = context.get(
+            'is_scrolled_to_end', False)
+
+    def _gather_async_candidates(self, ctx: UserContext,
+                                 source: Source) -> None:
+        """Gather the candidates of the interactive source if the input is
+        changed and the async source"""
+        prev_input = ctx['prev_input']
+        if prev_input != ctx['input'] and ctx['is_interactive']:
+            ctx['event'] = 'interactive'
+            ctx['all_candidates'] = self._gather_source_candidates(
+                ctx, source)
+            self._match_caches.pop(source.index, None)  # type: ignore
+        ctx['prev_input'] = ctx['input']
+        if ctx['is_async'] or ctx['is_paused']:
+            # Note: The paused source is resumed by the input or the
+            # scroll.
+            ctx['event'] = 'async'
+            ctx['all_candidates'] += self._gather_source_candidates(
+                ctx, source)
+
+    def _filter_source_candidates(
+            self, ctx: UserContext,
+            source: Source) -> typing.Tuple[Candidates, int]:
+        """Filter the candidates of {source}.  It returns the filtered
+        candidates and the number of the matched candidates before they
+        are truncated by max_candidates."""
         # Matchers
         matchers = [
             self._filters[x] for x in
             (ctx['matchers'].split(',') if ctx['matchers']
              else source.matchers) if x in self._filters]
-        for i in range(0, len(entire), 1000):
-            ctx['candidates'] = entire[i:i+1000]
-            self._match_candidates(ctx, matchers)
-            partial += ctx['candidates']
-            if len(partial) >= source.max_candidates:
-                break
-
-        ctx['candidates'] = partial
+        ctx['candidates'] = self._match_source_candidates(
+            ctx, source, matchers)
+        matched_len = len(ctx['candidates'])
 
         # Sorters
-        for f in [self._filters[x] for x in source.sorters
-                  if x in self._filters]:
+        # Note: The last sorter selects only the top candidates.
+        sorters = [self._filters[x] for x in source.sorters
+                   if x in self._filters]
+        for [i, f] in enumerate(sorters):
+            self._check_canceled()
+            if i == len(sorters) - 1:
+                ctx['max_candidates'] = source.max_candidates
             ctx['candidates'] = f.filter(ctx)
+        ctx.pop('max_candidates', None)
 
         ctx['candidates'] = ctx['candidates'][: source.max_candidates]
 
         # Converters
         for f in [self._filters[x] for x in source.converters
                   if x in self._filters]:
+            self._check_canceled()
             ctx['candidates'] = f.filter(ctx)
 
-        return list(ctx['candidates'])
+        return (list(ctx['candidates']), matched_len)
+
+    def _match_source_candidates(self, ctx: UserContext, source: Source,
+                                 matchers: typing.List[typing.Any]
+                                 ) -> Candidates:
+        """Match the source candidates and cache the results by input
+
+        Each cache entry is (matched, end): "matched" are all candidates
+        in all_candidates[:end] which match the input.  If the input
+        extends the cached input and the matchers narrow the results, the
+        cached candidates are filtered instead of all_candidates.
+        Note: all_candidates[end:] is appended by async gather, so it is
+        matched later.
+        Note: The matching is canceled between the slices.
+        """
+        entire = ctx['all_candidates']
+        parallel_matcher = self._get_parallel_matcher(ctx, matchers, entire)
+        if parallel_matcher:
+            self._check_canceled()
+            try:
+                parallel_matcher.update(source.index, entire)  # type: ignore
+                return parallel_matcher.match(
+                    source.index, ctx, matchers,  # type: ignore
+                    source.max_candidates)
+            except (OSError, EOFError):
+                # The workers are dead.  Fallback to the serial matching.
+                parallel_matcher.close()
+                self._parallel_matcher = None
+            except RuntimeError:
+                # The matchers are failed in the workers.  Fallback to the
+                # serial matching.
+                pass
+
+        cache = self._get_match_cache(
+            ctx, source.index, matchers, entire)  # type: ignore
+        entries = cache['entries']
+        key = ctx['input']
+
+        partial: Candidates = []
+        end = 0
+        if key in entries:
+            [matched, end] = entries.pop(key)
+            partial = list(matched)
+        else:
+            base = self._get_narrowing_entry(entries, matchers, key)
+            if base:
+                [matched, end] = base
+                for i in range(0, len(matched), 1000):
+                    self._check_canceled()
+                    ctx['candidates'] = matched[i:i+1000]
+                    match_candidates(ctx, matchers)
+                    partial += ctx['candidates']
+                    if len(partial) >= source.max_candidates:
+                        # The result is incomplete
+                        return partial
+
+        while end < len(entire) and len(partial) < source.max_candidates:
+            self._check_canceled()
+            ctx['candidates'] = entire[end:end+1000]
+            match_candidates(ctx, matchers)
+            partial += ctx['candidates']
+            end = min(end + 1000, len(entire))
+
+        entries[key] = [partial, end]
+        if len(entries) > 50:
+            # Remove the oldest entry
+            entries.pop(next(iter(entries)))
+        return list(partial)
+
+    def _get_parallel_matcher(self, ctx: UserContext,
+                              matchers: typing.List[typing.Any],
+                              entire: Candidates
+                              ) -> typing.Optional[ParallelMatcher]:
+        jobs = ctx.get('match_jobs', 0)
+        if (jobs <= 1 or len(entire) < PARALLEL_THRESHOLD or not matchers
+                or not all([x.is_parallel for x in matchers])):
+            return None
+        if self._parallel_matcher and self._parallel_matcher.jobs != jobs:
+            self._parallel_matcher.close()
+            self._parallel_matcher = None
+        if not self._parallel_matcher:
+            self._parallel_matcher = ParallelMatcher(jobs)
+        return self._parallel_matcher
+
+    def _get_match_cache(self, ctx: UserContext, index: int,
+                         matchers: typing.List[typing.Any],
+                         entire: Candidates) -> typing.Dict[str, typing.Any]:
+        """Get the match cache of the source {index}.  It is cleared if the
+        matchers, the candidates or the context of MATCH_CONTEXT_KEYS are
+        changed."""
+        names = [x.name for x in matchers]
+        values = [ctx.get(x, None) for x in MATCH_CONTEXT_KEYS]
+        cache = self._match_caches.get(index, {})
+        if (not cache or cache['matchers'] != names or
+                cache['context'] != values or
+                cache['candidates'] is not entire):
+            cache = {
+                'matchers': names,
+                'context': values,
+                'candidates': entire,
+                'entries': {},
+            }
+            self._match_caches[index] = cache
+        return cache
+
+    def _get_narrowing_entry(self, entries: typing.Dict[str, typing.Any],
+                             matchers: typing.List[typing.Any],
+                             text: str) -> typing.Any:
+        if not all([x.is_narrowing for x in matchers]):
+            return None
+        bases = [x for x in entries.keys() if is_narrowed_input(x, text)]
+        if not bases:
+            return None
+        return entries[max(bases, key=len)]
 
     def _gather_source_candidates(self, context: UserContext,
                                   source: Source) -> Candidates:
         max_len = int(context['max_candidate_width'] * 1.2)
-        candidates = source.gather_candidates(context)
-        for candidate in [x for x in candidates if len(x['word']) > max_len]:
-            candidate['word'] = candidate['word'][: max_len]
+        name = source.name
+        index = source.index  # type: ignore
+        candidates = []
+        # Note: The candidates may be cached by the source and shared by the
+        # sessions.  The source is set to them once, and they are copied
+        # only for the other source or the long words.
+        for x in source.gather_candidates(context):
+            if 'source_index' not in x:
+                x['source_name'] = name
+                x['source_index'] = index
+            elif x['source_index'] != index or x['source_name'] != name:
+                x = dict(x, source_name=name, source_index=index)
+            if len(x['word']) > max_len:
+                x = dict(x, word=x['word'][: max_len])
+            candidates.append(x)
         return candidates
 
     def _get_action_targets(self, context: UserContext, action_name: str,
@@ -421,125 +836,122 @@ class Child(object):
                 f'{source.get_status(context)}'
                 f'({len(partial)}/{len(entire)})')
 
-    def _match_candidates(self, context: UserContext,
-                          matchers: typing.List[typing.Any]) -> None:
-        for pattern in split_input(context['input']):
-            ctx = copy.copy(context)
-            if pattern and pattern[0] == '!':
-                if pattern == '!':
-                    continue
-                ctx['input'] = pattern[1:]
-                ignore = self._call_matchers(ctx, matchers)
-                context['candidates'] = [x for x in context['candidates']
-                                         if x not in ignore]
-            else:
-                ctx['input'] = pattern
-                context['candidates'] = self._call_matchers(ctx, matchers)
-
-    def _call_matchers(self, ctx: UserContext,
-                       matchers: typing.List[typing.Any]) -> Candidates:
-        for matcher in matchers:
-            ctx['candidates'] = matcher.filter(ctx)
-        return list(ctx['candidates'])
-
     def _set_custom_attribute(self, kind: str,
                               obj: typing.Any, attr: str) -> None:
         setattr(obj, attr, get_custom(
             self._custom, kind, obj.name, attr, getattr(obj, attr)))
 
-    def _load_sources(self, context: UserContext) -> None:
-        # Load sources from runtimepath
+    def _update_registries(self, context: UserContext) -> None:
+        # Load sources, filters and kinds from runtimepath
         # Note: load "denite.source" for old sources compatibility
         import denite.source # noqa
-        rplugins = import_rplugins('Source', context, 'source', [
-            str(Path(x.path).resolve())
-            for x in self._sources.values()
-        ])
-        for SourceClass, path, _ in rplugins:
-            source = SourceClass(self._vim)
-            self._sources[source.name] = source
-            source.path = path
-            syntax_name = 'deniteSource_' + re.sub(
-                '[^a-zA-Z0-9_]', '_', source.name)
-            if not source.syntax_name:
-                source.syntax_name = syntax_name
-
-            # Set the source kind attributes.
-            if isinstance(source.kind, Kind):
-                self._set_custom_attribute(
-                    'kind', source.kind, 'default_action')
-
-            if source.name in self._custom['alias_source']:
-                # Load alias
-                for alias in self._custom['alias_source'][source.name]:
-                    self._sources[alias] = SourceClass(self._vim)
-                    self._sources[alias].name = alias
-                    self._sources[alias].path = path
-                    self._sources[alias].syntax_name = syntax_name
+        path = (get_cache_path(context['cache_directory'], 'registry', 'index')
+                if context['cache_directory'] else None)
+        index = (load_cache(path) if path else None) or {}
+        is_changed = False
+        for registry in [self._sources, self._filters, self._kinds]:
+            if registry.update(context, index):
+                is_changed = True
+        if path and is_changed:
+            save_cache(path, index)
+
+        # Register the aliases of the plugins which are not imported
+        for [name, aliases] in self._custom['alias_source'].items():
+            for alias in aliases:
+                self._sources.set_alias(alias, name)
+        for name in self._filters.keys():
+            for alias in self._get_filter_aliases(name):
+                self._filters.set_alias(alias, name)
+
         # Update source_names for completion
         self._vim.call(
             'denite#helper#_set_available_sources',
             list(self._sources.keys()),
         )
 
-    def _load_filters(self, context: UserContext) -> None:
-        # Load filters from runtimepath
-        rplugins = import_rplugins('Filter', context, 'filter', [
-            str(Path(x.path).resolve())
-            for x in self._filters.values()
-        ])
-        for Filter, path, module_path in rplugins:
-            f = Filter(self._vim)
-            # NOTE:
-            # Previously, kind and filter but source uses
-            # module_path as name so modules which does not
-            # have proper 'name' may worked.
-            # So add 'name' attribute to the class if that
-            # attribute does not exist for the backward
-            # compatibility
-            if not hasattr(f, 'name') or not f.name:
-                # Prefer foo/bar instead of foo.bar in name
-                setattr(f, 'name', module_path.replace('.', '/'))
-            f.path = path
-            self._filters[f.name] = f
-
-            if f.name not in self._custom['alias_filter']:
-                self._custom['alias_filter'][f.name] = []
-            alias_filter = self._custom['alias_filter'][f.name]
-
-            if '/' in f.name:
-                alias_filter.append(f.name.replace('/', '_'))
-
+    def _load_source(self, SourceClass: typing.Any,
+                     path: str, module_path: str) -> typing.Any:
+        source = SourceClass(self._vim)
+        self._sources[source.name] = source
+        source.path = path
+        syntax_name = 'deniteSource_' + re.sub(
+            '[^a-zA-Z0-9_]', '_', source.name)
+        if not source.syntax_name:
+            source.syntax_name = syntax_name
+
+        # Set the source kind attributes.
+        if isinstance(source.kind, Kind):
+            self._set_custom_attribute(
+                'kind', source.kind, 'default_action')
+
+        if source.name in self._custom['alias_source']:
             # Load alias
-            for alias in alias_filter:
-                self._filters[alias] = Filter(self._vim)
-                self._filters[alias].name = alias
-                self._filters[alias].path = path
-
-    def _load_kinds(self, context: UserContext) -> None:
-        # Load kinds from runtimepath
-        rplugins = import_rplugins('Kind', context, 'kind', [
-            str(Path(x.path).resolve())
-            for x in self._kinds.values()
-        ])
-        for KindClass, path, module_path in rplugins:
-            kind = KindClass(self._vim)
-            # NOTE:
-            # Previously, kind and filter but source uses
-            # module_path as name so modules which does not
-            # have proper 'name' may worked.
-            # So add 'name' attribute to the class if that
-            # attribute does not exist for the backward
-            # compatibility
-            if not hasattr(kind, 'name') or not kind.name:
-                # Prefer foo/bar instead of foo.bar in name
-                setattr(kind, 'name', module_path.replace('.', '/'))
-
-            # Set the kind attributes.
-            kind.path = path
-            self._set_custom_attribute('kind', kind, 'default_action')
-
-            self._kinds[kind.name] = kind
+            for alias in self._custom['alias_source'][source.name]:
+                self._sources[alias] = SourceClass(self._vim)
+                self._sources[alias].name = alias
+                self._sources[alias].path = path
+                self._sources[alias].syntax_name = syntax_name
+        return source
+
+    def _load_filter(self, Filter: typing.Any,
+                     path: str, module_path: str) -> typing.Any:
+        f = Filter(self._vim)
+        # NOTE:
+        # Previously, kind and filter but source uses
+        # module_path as name so modules which does not
+        # have proper 'name' may worked.
+        # So add 'name' attribute to the class if that
+        # attribute does not exist for the backward
+        # compatibility
+        if not hasattr(f, 'name') or not f.name:
+            # Prefer foo/bar instead of foo.bar in name
+            setattr(f, 'name', module_path.replace('.', '/'))
+        f.path = path
+        self._filters[f.name] = f
+
+        # Load alias
+        for alias in self._get_filter_aliases(f.name):
+            self._filters[alias] = Filter(self._vim)
+            self._filters[alias].name = alias
+            self._filters[alias].path = path
+        return f
+
+    def _get_filter_aliases(self, name: str) -> typing.List[str]:
+        if name not in self._custom['alias_filter']:
+            self._custom['alias_filter'][name] = []
+        alias_filter = self._custom['alias_filter'][name]
+
+        if '/' in name and name.replace('/', '_') not in alias_filter:
+            alias_filter.append(name.replace('/', '_'))
+        return list(alias_filter)
+
+    def _get_filter_names(self, context: UserContext) -> typing.List[str]:
+        names = [x for x in (context['matchers'].split(',') +
+                             context['sorters'].split(',')) if x]
+        for source in self._current_sources:
+            names += source.matchers + source.sorters + source.converters
+        return names
+
+    def _load_kind(self, KindClass: typing.Any,
+                   path: str, module_path: str) -> typing.Any:
+        kind = KindClass(self._vim)
+        # NOTE:
+        # Previously, kind and filter but source uses
+        # module_path as name so modules which does not
+        # have proper 'name' may worked.
+        # So add 'name' attribute to the class if that
+        # attribute does not exist for the backward
+        # compatibility
+        if not hasattr(kind, 'name') or not kind.name:
+            # Prefer foo/bar instead of foo.bar in name
+            setattr(kind, 'name', module_path.replace('.', '/'))
+
+        # Set the kind attributes.
+        kind.path = path
+        self._set_custom_attribute('kind', kind, 'default_action')
+
+        self._kinds[kind.name] = kind
+        return kind
 
     def _get_kind(self, context: UserContext, target: Candidate) -> typing.Any:
         k = target['kind'] if 'kind' in target else (
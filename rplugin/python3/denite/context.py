@@ -18,28 +18,12 @@ class Context(object):
         self._context: UserContext = {}
 
     def get(self, user_context: UserContext) -> UserContext:
-        buffer_name = user_context.get('buffer_name', 'default')
-        context = self._internal_options()
-        context.update(self._vim.call('denite#init#_user_options'))
-        context['custom'] = self._vim.call('denite#custom#_get')
-        option = context['custom']['option']
-        if '_' in option:
-            context.update(option['_'])
-        if buffer_name in option:
-            context.update(option[buffer_name])
-        context.update(user_context)
-
-        if context['command'] == 'DeniteCursorWord':
-            context['input'] = self._vim.call(
-                'denite#util#escape_match',
-                self._vim.call('expand', '<cword>'))
-        elif context['command'] == 'DeniteBufferDir':
-            context['path'] = self._vim.call('expand', '%:p:h')
-        elif context['command'] == 'DeniteProjectDir':
-            context['path'] = self._vim.call(
-                'denite#project#path2project_directory',
-                context['path'], context['root_markers']
-            )
+        # Note: The options are merged and the editor states are gotten by
+        # one call
+        base = self._vim.call('denite#helper#_get_context', user_context)
+        context = self._internal_options(base)
+        context.update(base['options'])
+        context['custom'] = base['custom']
 
         if context['relpath']:
             context['path'] = str(PurePath(context['path']).joinpath(
@@ -59,15 +43,14 @@ class Context(object):
 
         if (context['split'] in [
                 'floating', 'floating_relative_cursor',
-                'floating_absolute_window'] and not self._vim.call(
-                    'exists', '*nvim_open_win')):
+                'floating_absolute_window'] and not base['has_floating']):
             context['split'] = 'no'
         if (context['filter_split_direction'] == 'floating' and
-                not self._vim.call('exists', '*nvim_open_win')):
+                not base['has_floating']):
             context['filter_split_direction'] = 'botright'
 
         # Add buffer name to context
-        bufname = PurePath(self._vim.current.buffer.name)
+        bufname = PurePath(base['bufname'])
         try:
             context['bufname'] = str(bufname.relative_to(context['path']))
         except ValueError:
@@ -75,29 +58,26 @@ class Context(object):
 
         # For compatibility
         for [old_option, new_option] in [
-                x for x in self._vim.call(
-                    'denite#init#_deprecated_options').items()
+                x for x in base['deprecated_options'].items()
                 if x[0] in context and x[1]]:
             context[new_option] = context[old_option]
 
         return context
 
-    def _internal_options(self) -> UserContext:
+    def _internal_options(self, base: UserContext) -> UserContext:
         return {
-            'bufnr': self._vim.current.buffer.number,
+            'ambiwidth': base['ambiwidth'],
+            'bufnr': base['bufnr'],
             'command': '',
-            'encoding': self._vim.options['encoding'],
+            'encoding': base['encoding'],
             'error_messages': [],
             'firstline': 0,
-            'filetype': self._vim.current.buffer.options['filetype'],
+            'filetype': base['filetype'],
             'lastline': 0,
-            'is_windows': (self._vim.call('has', 'win32') or
-                           self._vim.call('has', 'win64')),
+            'is_windows': base['is_windows'],
             'messages': [],
-            'prev_winid': self._vim.call('win_getid'),
-            'has_preview_window': len(
-                [x for x in range(1, self._vim.call('winnr', '$'))
-                 if self._vim.call('getwinvar', x, '&previewwindow')]) > 0,
+            'prev_winid': base['prev_winid'],
+            'has_preview_window': base['has_preview_window'],
             'quick_move_table': {
                 'a': 0, 's': 1, 'd': 2, 'f': 3, 'g': 4,
                 'h': 5, 'j': 6, 'k': 7, 'l': 8, ';': 9,
@@ -106,6 +86,6 @@ class Context(object):
                 '1': 20, '2': 21, '3': 22, '4': 23, '5': 24,
                 '6': 25, '7': 26, '8': 27, '9': 28, '0': 29,
             },
-            'runtimepath': self._vim.options['runtimepath'],
+            'runtimepath': base['runtimepath'],
             'selected_icon': '*',
         }
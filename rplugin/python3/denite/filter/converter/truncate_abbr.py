@@ -7,7 +7,7 @@
 from pynvim import Nvim
 
 from denite.base.filter import Base
-from denite.util import UserContext, Candidates, truncate
+from denite.util import UserContext, Candidates, truncate_display
 
 
 class Filter(Base):
@@ -22,6 +22,6 @@ class Filter(Base):
         for candidate in context['candidates']:
             if 'abbr' not in candidate:
                 candidate['abbr'] = candidate['word']
-            candidate['abbr'] = truncate(
-                self.vim, candidate['abbr'], context['winwidth'])
+            candidate['abbr'] = truncate_display(
+                candidate['abbr'], context['winwidth'], context['ambiwidth'])
         return list(context['candidates'])
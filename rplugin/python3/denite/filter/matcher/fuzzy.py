@@ -6,8 +6,10 @@
 
 from pynvim import Nvim
 import re
+import typing
 
-from denite.base.filter import Base
+from denite.base.filter import Base, MatchPositions
+from denite.index import get_fuzzy_grams
 from denite.util import escape_fuzzy, convert2fuzzy_pattern
 from denite.util import UserContext, Candidates
 
@@ -19,6 +21,8 @@ class Filter(Base):
 
         self.name = 'matcher/fuzzy'
         self.description = 'fuzzy matcher'
+        self.is_narrowing = True
+        self.is_parallel = True
 
     def filter(self, context: UserContext) -> Candidates:
         if context['input'] == '':
@@ -27,6 +31,13 @@ class Filter(Base):
         if context['ignorecase']:
             pattern = pattern.lower()
         p = re.compile(escape_fuzzy(re.escape(pattern)))
+        index = context.get('candidates_index', None)
+        if index:
+            ignorecase = context['ignorecase']
+            return list(index.filter(
+                context['candidates'], get_fuzzy_grams(pattern.lower()),
+                lambda x: bool(p.search(x.lower() if ignorecase else x)),
+                (self.name, pattern, ignorecase)))
         if context['ignorecase']:
             context['candidates'] = [x for x in context['candidates']
                                      if p.search(x['word'].lower())]
@@ -37,3 +48,28 @@ class Filter(Base):
 
     def convert_pattern(self, input_str: str) -> str:
         return convert2fuzzy_pattern(input_str)
+
+    def get_match_positions(self, context: UserContext,
+                            text: str) -> typing.Optional[MatchPositions]:
+        pattern = context['input']
+        if context['ignorecase']:
+            pattern = pattern.lower()
+            if len(text.lower()) == len(text):
+                text = text.lower()
+        m = re.search(escape_fuzzy(re.escape(pattern)), text)
+        if not m:
+            return []
+
+        # Select the leftmost characters in the matched range
+        positions: MatchPositions = []
+        pos = m.start()
+        for char in pattern:
+            pos = text.find(char, pos, m.end())
+            if pos < 0:
+                break
+            if positions and positions[-1][1] == pos:
+                positions[-1] = (positions[-1][0], pos + 1)
+            else:
+                positions.append((pos, pos + 1))
+            pos += 1
+        return positions
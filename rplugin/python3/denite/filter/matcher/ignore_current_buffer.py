@@ -17,6 +17,7 @@ class Filter(Base):
 
         self.name = 'matcher/ignore_current_buffer'
         self.description = 'ignore the current buffer path'
+        self.is_narrowing = True
 
     def filter(self, context: UserContext) -> Candidates:
         current_buffer = self.vim.call(
@@ -4,13 +4,12 @@
 # License: MIT license
 # ============================================================================
 
-from fnmatch import translate
 from os import sep
-from pathlib import Path
 from pynvim import Nvim
-from re import search
+import typing
 
 from denite.base.filter import Base
+from denite.globset import GlobSet
 from denite.util import UserContext, Candidates
 
 
@@ -21,6 +20,7 @@ class Filter(Base):
 
         self.name = 'matcher/ignore_globs'
         self.description = 'ignore the globs matched files'
+        self.is_narrowing = True
         self.vars = {
             'ignore_globs': [
                '*~', '*.o', '*.exe', '*.bak',
@@ -29,20 +29,24 @@ class Filter(Base):
                'tags', 'tags-*'
             ]
         }
+        self._globset = GlobSet([])
+        self._globset_key: typing.Any = None
 
     def filter(self, context: UserContext) -> Candidates:
-        # Convert globs
-        patterns = []
-        for glob in self.vars['ignore_globs']:
-            if not Path(glob).is_absolute() and ':' not in glob:
-                glob = '*' + sep + glob
-            if glob[:2] == '.' + sep:
-                glob = context['path'] + glob[1:]
-            if glob[-1] == sep:
-                glob += '*'
-            patterns.append(translate(glob))
-        pattern = '|'.join(patterns)
+        globset = self._get_globset(context)
+        if not globset:
+            return list(context['candidates'])
         max_width = context['max_candidate_width']
         return [x for x in context['candidates']
                 if 'action__path' not in x or
-                not search(pattern, x['action__path'][:max_width])]
+                not globset.match(x['action__path'][:max_width])]
+
+    def _get_globset(self, context: UserContext) -> GlobSet:
+        # The compiled globs are cached until the globs are changed
+        key = (tuple(self.vars['ignore_globs']), context['path'])
+        if key != self._globset_key:
+            self._globset_key = key
+            self._globset = GlobSet([
+                context['path'] + x[1:] if x[:2] == '.' + sep else x
+                for x in self.vars['ignore_globs']], is_path=True)
+        return self._globset
@@ -17,6 +17,7 @@ class Filter(Base):
 
         self.name = 'matcher/project_files'
         self.description = 'project files matcher'
+        self.is_narrowing = True
 
     def filter(self, context: UserContext) -> Candidates:
         project = path2project(self.vim,
@@ -6,8 +6,9 @@
 
 from pynvim import Nvim
 import re
+import typing
 
-from denite.base.filter import Base
+from denite.base.filter import Base, MatchPositions
 from denite.util import convert2regex_pattern, UserContext, Candidates
 
 
@@ -18,6 +19,7 @@ class Filter(Base):
 
         self.name = 'matcher/regexp'
         self.description = 'regexp matcher'
+        self.is_parallel = True
 
     def filter(self, context: UserContext) -> Candidates:
         if context['input'] == '':
@@ -32,3 +34,12 @@ class Filter(Base):
 
     def convert_pattern(self, input_str: str) -> str:
         return convert2regex_pattern(input_str)
+
+    def get_match_positions(self, context: UserContext,
+                            text: str) -> typing.Optional[MatchPositions]:
+        try:
+            p = re.compile(context['input'], flags=re.IGNORECASE
+                           if context['ignorecase'] else 0)
+        except Exception:
+            return []
+        return [x.span() for x in p.finditer(text) if x.end() > x.start()]
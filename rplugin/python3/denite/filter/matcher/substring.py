@@ -6,8 +6,10 @@
 
 from pynvim import Nvim
 import re
+import typing
 
-from denite.base.filter import Base
+from denite.base.filter import Base, MatchPositions
+from denite.index import get_substring_grams
 from denite.util import split_input, UserContext, Candidates
 
 
@@ -17,6 +19,8 @@ class Filter(Base):
 
         self.name = 'matcher/substring'
         self.description = 'simple substring matcher'
+        self.is_narrowing = True
+        self.is_parallel = True
 
     def filter(self, context: UserContext) -> Candidates:
         candidates: Candidates = context['candidates']
@@ -27,6 +31,14 @@ class Filter(Base):
         pattern = context['input']
         if ignorecase:
             pattern = pattern.lower()
+        index = context.get('candidates_index', None)
+        if index:
+            return list(index.filter(
+                candidates, get_substring_grams(pattern.lower()),
+                (lambda x: pattern in x.lower()) if ignorecase
+                else (lambda x: pattern in x),
+                (self.name, pattern, ignorecase)))
+        if ignorecase:
             candidates = [x for x in candidates
                           if pattern in x['word'].lower()]
         else:
@@ -35,3 +47,11 @@ class Filter(Base):
 
     def convert_pattern(self, input_str: str) -> str:
         return '|'.join([re.escape(x) for x in split_input(input_str)])
+
+    def get_match_positions(self, context: UserContext,
+                            text: str) -> typing.Optional[MatchPositions]:
+        if context['input'] == '':
+            return []
+        return [x.span() for x in re.finditer(
+            re.escape(context['input']), text,
+            flags=re.IGNORECASE if context['ignorecase'] else 0)]
@@ -9,11 +9,13 @@
 # License: MIT license
 # ============================================================================
 
+from functools import partial
 from pynvim import Nvim
 import string
 import typing
 
 from denite.base.filter import Base
+from denite.batch import numpy, score_words, to_lower, is_lower
 from denite.util import split_input, UserContext, Candidates
 
 
@@ -28,14 +30,19 @@ class Filter(Base):
     def filter(self, context: UserContext) -> Candidates:
         if len(context['input']) < 1:
             return list(context['candidates'])
-        for c in context['candidates']:
-            c['filter__rank'] = 0
+        words = [x['word'] for x in context['candidates']]
+        ranks = [0.0] * len(words)
 
         for pattern in split_input(context['input']):
-            for c in context['candidates']:
-                c['filter__rank'] += get_score(c['word'], pattern)
-        return sorted(context['candidates'],
-                      key=lambda x: int(x['filter__rank']))
+            for [i, score] in enumerate(self.score_batch(words, pattern)):
+                ranks[i] += score
+        return self.sort_candidates(context, ranks, int)
+
+    def score_batch(self, words: typing.List[str],
+                    pattern: str) -> typing.List[typing.Any]:
+        return score_words(words, pattern,
+                           partial(get_batch_scores, pattern),
+                           partial(get_score, query_chars=pattern))
 
 
 BOUNDARY_CHARS = string.punctuation + string.whitespace
@@ -61,14 +68,67 @@ def get_score(string: str, query_chars: str) -> float:
     return best_score
 
 
+def get_batch_scores(query_chars: str, codes: typing.Any,
+                     lengths: typing.Any) -> typing.Any:
+    """The vectorized get_score() for the ASCII words"""
+    [size, width] = codes.shape
+    lower_codes = to_lower(codes)
+    columns = numpy.arange(width)
+    valid = columns[None, :] < lengths[:, None]
+    head, tail = query_chars[0].lower(), query_chars[1:]
+
+    # The next index of the character in each word.  "width" is not found.
+    next_indexes = {}
+    for char in set(tail.lower()):
+        indexes = numpy.where((lower_codes == ord(char)) & valid,
+                              columns, width).astype(numpy.int32)
+        next_indexes[char] = numpy.minimum.accumulate(
+            indexes[:, ::-1], axis=1)[:, ::-1]
+
+    # For each occurence of the first character of the query in the string
+    [rows, last_index] = numpy.nonzero((lower_codes == ord(head)) & valid)
+    score = numpy.ones(len(rows))
+    last_type = numpy.zeros(len(rows), dtype=numpy.int8)
+    found = numpy.ones(len(rows), dtype=bool)
+    boundary_codes = numpy.array([ord(x) for x in BOUNDARY_CHARS])
+    for char in tail:
+        index = next_indexes[char.lower()][rows, last_index + 1]
+        found &= index != width
+        index = numpy.where(found, index, last_index)
+
+        prev_codes = codes[rows, index - 1]
+        sequential = index == last_index + 1
+        boundary = ~sequential & numpy.isin(prev_codes, boundary_codes)
+        camelcase = (~sequential & ~boundary & is_lower(prev_codes) &
+                     (char in string.ascii_uppercase))
+        normal = ~(sequential | boundary | camelcase)
+        new_type = (1 * sequential + 2 * boundary +
+                    3 * camelcase + 4 * normal).astype(numpy.int8)
+
+        # Do not count the same type characters more than once
+        score += numpy.where(normal, index - last_index,
+                             last_type != new_type)
+        last_type = new_type
+        last_index = index
+
+    best_score = lengths.astype(numpy.float64)
+    numpy.minimum.at(best_score, rows,
+                     numpy.where(found & (last_index != 0), score,
+                                 numpy.inf))
+
+    # Solve equal scores by sorting on the string length
+    return best_score * numpy.power(lengths.astype(numpy.float64), 0.5)
+
+
 def find_end_of_match(to_match: str, chars: str,
                       first_index: int) -> typing.Tuple[
                           typing.Optional[float], typing.Optional[int]]:
     score, last_index, last_type = 1.0, first_index, None
+    lower_match = to_match.lower()
 
     for char in chars:
         try:
-            index = to_match.lower().index(char.lower(), last_index + 1)
+            index = lower_match.index(char.lower(), last_index + 1)
         except ValueError:
             return None, None
         if not index:
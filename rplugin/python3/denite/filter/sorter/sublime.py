@@ -8,10 +8,13 @@
 # License: MIT license
 # ============================================================================
 
+from functools import partial
 from pynvim import Nvim
 from unicodedata import category
+import typing
 
 from denite.base.filter import Base
+from denite.batch import numpy, score_words, to_lower, is_upper, is_lower
 from denite.util import UserContext, Candidates
 
 
@@ -41,14 +44,15 @@ class Filter(Base):
         if len(context['input']) == 0:
             return list(context['candidates'])
 
-        for candidate in context['candidates']:
-            candidate['filter__rank'] = get_score(
-                context['input'], candidate['word'])
+        ranks = self.score_batch([x['word'] for x in context['candidates']],
+                                 context['input'])
+        return self.sort_candidates(context, ranks, lambda x: -int(x))
 
-        return sorted(
-            context['candidates'],
-            key=lambda candidate: -int(candidate['filter__rank'])
-        )
+    def score_batch(self, words: typing.List[str],
+                    pattern: str) -> typing.List[typing.Any]:
+        return score_words(words, pattern,
+                           partial(get_batch_scores, pattern),
+                           partial(get_score, pattern))
 
 
 def get_score(pattern: str, candidate: Candidates) -> int:
@@ -164,3 +168,69 @@ def get_score(pattern: str, candidate: Candidates) -> int:
         matched_indices.append(best_letter_index)
 
     return score
+
+
+def get_batch_scores(pattern: str, codes: typing.Any,
+                     lengths: typing.Any) -> typing.Any:
+    """The vectorized get_score() for the ASCII words.  The words must be
+    sorted by the length in descending order."""
+    size = len(lengths)
+    lower_codes = to_lower(codes).astype(numpy.int64)
+    upper_masks = is_upper(codes)
+    lower_masks = is_lower(codes)
+    pattern_length = len(pattern)
+    # The sentinel never matches
+    pattern_lowers = numpy.array(
+        [ord(x.lower()) for x in pattern] + [256], dtype=numpy.int64)
+
+    score = numpy.zeros(size, dtype=numpy.int64)
+    pattern_index = numpy.zeros(size, dtype=numpy.int64)
+    prev_matched = numpy.zeros(size, dtype=bool)
+    prev_lower = numpy.zeros(size, dtype=bool)
+    prev_separator = numpy.ones(size, dtype=bool)
+    has_best = numpy.zeros(size, dtype=bool)
+    best_lower = numpy.zeros(size, dtype=numpy.int64)
+    best_score = numpy.zeros(size, dtype=numpy.int64)
+
+    for candidate_index in range(int(lengths[0]) if size else 0):
+        # The words which are longer than candidate_index
+        k = int(numpy.count_nonzero(lengths > candidate_index))
+        candidate_lower = lower_codes[:k, candidate_index]
+        candidate_upper = upper_masks[:k, candidate_index]
+        pattern_lower = pattern_lowers[pattern_index[:k]]
+        has_pattern = pattern_index[:k] != pattern_length
+
+        next_match = has_pattern & (pattern_lower == candidate_lower)
+        rematch = has_best[:k] & (best_lower[:k] == candidate_lower)
+        advanced = next_match & has_best[:k]
+        pattern_repeat = (has_best[:k] & has_pattern &
+                          (best_lower[:k] == pattern_lower))
+        reset = advanced | pattern_repeat
+        score[:k] += numpy.where(reset, best_score[:k], 0)
+        has_best[:k] &= ~reset
+        best_score[:k][reset] = 0
+
+        matched = next_match | rematch
+        score[:k] += numpy.where(
+            matched & (pattern_index[:k] == 0),
+            max(candidate_index * LEADING_LETTER_PENALTY,
+                MAX_LEADING_LETTER_PENALTY), 0)
+        new_score = (ADJACENCY_BONUS * prev_matched[:k] +
+                     SEPARATOR_BONUS * prev_separator[:k] +
+                     CAMEL_BONUS * (prev_lower[:k] & candidate_upper))
+        pattern_index[:k] += next_match
+
+        update = matched & (new_score >= best_score[:k])
+        score[:k] += UNMATCHED_LETTER_PENALTY * (update & has_best[:k])
+        has_best[:k] |= update
+        best_lower[:k][update] = candidate_lower[update]
+        best_score[:k][update] = new_score[update]
+
+        score[:k] += UNMATCHED_LETTER_PENALTY * ~matched
+        prev_matched[:k] = matched
+        prev_lower[:k] = lower_masks[:k, candidate_index]
+        prev_separator[:k] = ~(candidate_upper |
+                               lower_masks[:k, candidate_index])
+
+    # Apply score for last match
+    return score + numpy.where(has_best, best_score, 0)
@@ -0,0 +1,89 @@
+# ============================================================================
+# FILE: globset.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+# Note: This module must not import denite modules, because it is used by
+# scantree.py script.
+
+from fnmatch import translate
+from os import sep
+from os.path import isabs
+import re
+import typing
+
+MAGIC_CHARS = re.compile(r'[*?[]')
+
+
+class GlobSet(object):
+    """The compiled set of the glob patterns
+
+    The literal basenames, the literal extensions("*.ext") and the literal
+    directory names("dir/") are looked up by the hash tables.  The other
+    globs are matched by one compiled regexp.
+
+    If {is_path} is False, the globs are matched with the basename of the
+    path.  Otherwise, the remaining globs are searched in the whole path and
+    the relative globs are prefixed by "*/"."""
+
+    def __init__(self, globs: typing.Iterable[str],
+                 is_path: bool = False, ignore_case: bool = False) -> None:
+        self._ignore_case = ignore_case
+        self._is_path = is_path
+        self._names: typing.Set[str] = set()
+        self._extensions: typing.Set[str] = set()
+        self._directories: typing.Set[str] = set()
+        patterns = []
+        for glob in globs:
+            if not glob:
+                continue
+            if ignore_case:
+                glob = glob.lower()
+            name = glob[:-1] if is_path and glob[-1] == sep else glob
+            if sep in name or (is_path and (isabs(glob) or ':' in glob)):
+                patterns.append(self._translate(glob))
+            elif name != glob:
+                if MAGIC_CHARS.search(name):
+                    patterns.append(self._translate(glob))
+                else:
+                    self._directories.add(name)
+            elif not MAGIC_CHARS.search(name):
+                self._names.add(name)
+            elif (name[:2] == '*.' and '.' not in name[2:] and
+                  not MAGIC_CHARS.search(name[2:])):
+                self._extensions.add(name[2:])
+            else:
+                patterns.append(self._translate(glob))
+        self._regex = re.compile('|'.join(patterns)) if patterns else None
+
+    def __bool__(self) -> bool:
+        return bool(self._names or self._extensions or
+                    self._directories or self._regex)
+
+    def match(self, path: str) -> bool:
+        if self._ignore_case:
+            path = path.lower()
+        [head, _, name] = path.rpartition(sep)
+        if name in self._names:
+            return True
+        if self._extensions:
+            [_, dot, ext] = name.rpartition('.')
+            if dot and ext in self._extensions:
+                return True
+        if self._directories and self._is_path and not (
+                self._directories.isdisjoint(head.split(sep)[1:])):
+            return True
+        if not self._regex:
+            return False
+        if self._is_path:
+            return bool(self._regex.search(path))
+        return bool(self._regex.match(name))
+
+    def _translate(self, glob: str) -> str:
+        if self._is_path:
+            if not isabs(glob) and ':' not in glob:
+                glob = '*' + sep + glob
+            if glob[-1] == sep:
+                glob += '*'
+        return translate(glob)
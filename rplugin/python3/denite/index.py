@@ -0,0 +1,292 @@
+# ============================================================================
+# FILE: index.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+from array import array
+from bisect import bisect_left
+import re
+import typing
+
+from denite.batch import is_available, numpy, get_code_points
+from denite.util import Candidates
+
+# (the trigrams which are contained in the word,
+#  the text whose characters are in the word in the order)
+Grams = typing.Tuple[typing.List[bytes], bytes]
+Predicate = typing.Callable[[str], bool]
+
+# The number of the character classes of the position index
+CLASSES = 48
+# The positions are saturated by it
+MAX_POSITION = 255
+# The posting lists are merged if the number of the chunks is more than it
+MAX_CHUNKS = 8
+# The max number of the cached bitmasks
+MAX_MASKS = 256
+# The characters which are followed by the wildcard in the fuzzy pattern
+FUZZY_WILDCARD_CHARS = re.compile(r'[a-zA-Z0-9_\-/]')
+
+
+class Index(object):
+    """Gram index of the candidates words
+
+    The index is built incrementally by extend() as the candidates arrive.
+    The words are case folded and encoded by UTF-8.
+
+    1.  The posting list of the trigram has the candidates which contain
+        it.  The directory part of the path(the text until the last "/")
+        is indexed once for the same directories.
+    2.  The position index has the first and the last positions of the
+        characters in the words.  The words which contain the characters
+        of the pattern in the order are searched by it.
+
+    The search results are the bitmasks of the candidates(bit per
+    candidate), so they are intersected by "&" and only the remaining
+    words are verified.
+    Note: NumPy is required to build the index.  If it is not installed,
+    all words are verified.
+    """
+
+    def __init__(self, candidates: Candidates = []) -> None:
+        self._candidates: Candidates = []
+        self._positions: typing.Dict[int, int] = {}
+        # The posting lists: the sorted (trigram << 32 | row) arrays
+        self._tails: typing.List[typing.Any] = []
+        self._heads: typing.List[typing.Any] = []
+        self._head_ids: typing.Dict[bytes, int] = {}
+        self._word_heads = array('I')
+        # The position index: [first, last] arrays of (words, CLASSES)
+        self._first_last: typing.List[typing.List[typing.Any]] = []
+        self._masks: typing.Dict[bytes, typing.Any] = {}
+        self._results: typing.Dict[typing.Any, typing.List[int]] = {}
+        self.extend(candidates)
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def extend(self, candidates: Candidates) -> None:
+        """Add {candidates} to the index"""
+        if not candidates:
+            return
+        start = len(self._candidates)
+        for [i, candidate] in enumerate(candidates, start):
+            self._positions[id(candidate)] = i
+        self._candidates += candidates
+        self._masks = {}
+        self._results = {}
+        if not is_available():
+            return
+
+        words = [x['word'].casefold().encode('utf-8', 'surrogatepass')
+                 for x in candidates]
+        self._add_trigrams(words, start)
+        self._first_last.append(_get_first_last(words))
+
+    def filter(self, candidates: Candidates, grams: Grams,
+               predicate: Predicate, key: typing.Any) -> Candidates:
+        """Filter {candidates} which match {predicate}
+
+        The matched candidates must contain {grams} in the case folded
+        word.  {predicate} is called only for the words which contain
+        {grams}.  The results are cached by {key}.
+        Note: The candidates which are not indexed are checked by
+        {predicate} directly.
+        """
+        if not candidates:
+            return []
+        if key not in self._results:
+            if len(self._results) > 20:
+                self._results.clear()
+            words = [x['word'] for x in self._candidates]
+            self._results[key] = [x for x in self._search(grams)
+                                  if predicate(words[x])]
+        matched = self._results[key]
+
+        positions = self._positions
+        first = positions.get(id(candidates[0]), -1)
+        if first >= 0 and positions.get(
+                id(candidates[-1]), -1) == first + len(candidates) - 1:
+            # The slice of the indexed candidates
+            return [self._candidates[x] for x in matched[
+                bisect_left(matched, first):
+                bisect_left(matched, first + len(candidates))]]
+        ids = {id(self._candidates[x]) for x in matched}
+        return [x for x in candidates
+                if id(x) in ids or (id(x) not in positions and
+                                    predicate(x['word']))]
+
+    def _search(self, grams: Grams) -> typing.List[int]:
+        """Get the sorted positions of the candidates which contain
+        {grams}"""
+        size = len(self._candidates)
+        if not is_available():
+            return list(range(size))
+
+        [trigrams, text] = grams
+        mask = self._get_order_mask(text)
+        for trigram in set(trigrams):
+            mask &= self._get_trigram_mask(trigram)
+        positions: typing.List[int] = numpy.flatnonzero(numpy.unpackbits(
+            mask, count=size, bitorder='little')).tolist()
+        return positions
+
+    def _add_trigrams(self, words: typing.List[bytes], start: int) -> None:
+        tails: typing.List[bytes] = []
+        new_heads: typing.List[bytes] = []
+        for word in words:
+            pos = max(word.rfind(b'/'), word.rfind(b'\\'))
+            head = word[: pos + 1]
+            if head not in self._head_ids:
+                self._head_ids[head] = len(self._head_ids)
+                new_heads.append(head)
+            self._word_heads.append(self._head_ids[head])
+            # The trigrams across the directory are in the tail
+            tails.append(head[-2:] + word[pos + 1:])
+
+        self._tails.append(_get_postings(tails, start))
+        if new_heads:
+            self._heads.append(_get_postings(
+                new_heads, self._head_ids[new_heads[0]]))
+
+    def _get_order_mask(self, text: bytes) -> typing.Any:
+        """Get the bitmask of the words which may contain the characters of
+        {text} in the order"""
+        if len(self._first_last) > 1:
+            self._first_last = [[
+                numpy.concatenate([x[0] for x in self._first_last]),
+                numpy.concatenate([x[1] for x in self._first_last]),
+            ]]
+        [first, last] = self._first_last[0]
+
+        matched = numpy.ones(len(first), dtype=bool)
+        # The lower bound of the position of the character
+        bound = numpy.zeros(len(first), dtype=numpy.int16)
+        for char in text:
+            bound += 1
+            index = _CLASS_TABLE[char]
+            if index < 0:
+                continue
+            numpy.maximum(bound, first[:, index], out=bound)
+            char_last = last[:, index]
+            matched &= (char_last > 0) & (
+                (bound <= char_last) | (char_last == MAX_POSITION))
+        return numpy.packbits(matched, bitorder='little')
+
+    def _get_trigram_mask(self, trigram: bytes) -> typing.Any:
+        if trigram in self._masks:
+            mask = self._masks.pop(trigram)
+        else:
+            code = int.from_bytes(trigram, 'big')
+            self._tails = _merge_postings(self._tails)
+            self._heads = _merge_postings(self._heads)
+            matched = numpy.zeros(len(self._candidates), dtype=bool)
+            for postings in self._tails:
+                matched[_search_postings(postings, code)] = True
+            heads = numpy.zeros(len(self._head_ids), dtype=bool)
+            for postings in self._heads:
+                heads[_search_postings(postings, code)] = True
+            matched |= heads[numpy.frombuffer(
+                self._word_heads, dtype=numpy.uint32)]
+            mask = numpy.packbits(matched, bitorder='little')
+        self._masks[trigram] = mask
+        if len(self._masks) > MAX_MASKS:
+            # Remove the least recently used mask
+            self._masks.pop(next(iter(self._masks)))
+        return mask
+
+
+def get_substring_grams(text: str) -> Grams:
+    """Get the grams of the words which contain {text}"""
+    encoded = text.casefold().encode('utf-8', 'surrogatepass')
+    return (_get_trigrams(encoded), encoded)
+
+
+def get_fuzzy_grams(text: str) -> Grams:
+    """Get the grams of the words which match {text} by the fuzzy pattern
+    of escape_fuzzy().  The parts of {text} without the wildcard are
+    contained in the words."""
+    trigrams: typing.List[bytes] = []
+    part = ''
+    for char in text:
+        part += char
+        if FUZZY_WILDCARD_CHARS.match(char):
+            trigrams += get_substring_grams(part)[0]
+            part = ''
+    trigrams += get_substring_grams(part)[0]
+    return (trigrams, text.casefold().encode('utf-8', 'surrogatepass'))
+
+
+def _get_class_table() -> typing.List[int]:
+    """Get the character classes of the bytes.  The classes of the
+    characters which are rare in the paths are shared."""
+    chars = b'abcdefghijklmnopqrstuvwxyz0123456789_-./\\ '
+    table = [len(chars) + x % (CLASSES - len(chars)) for x in range(256)]
+    for [i, char] in enumerate(chars):
+        table[char] = i
+    # NUL is the padding
+    table[0] = -1
+    return table
+
+
+_CLASS_TABLE = _get_class_table()
+
+
+def _get_trigrams(text: bytes) -> typing.List[bytes]:
+    return [text[i:i+3] for i in range(len(text) - 2)]
+
+
+def _get_first_last(words: typing.List[bytes]) -> typing.List[typing.Any]:
+    """Get the first and the last positions(1 origin) of the character
+    classes in {words}.  0 is not found."""
+    first = numpy.zeros((len(words), CLASSES), dtype=numpy.uint8)
+    last = numpy.zeros((len(words), CLASSES), dtype=numpy.uint8)
+    # Sort the words by the length, so the words which have the column are
+    # the prefix of the rows
+    rows = sorted(range(len(words)), key=lambda x: -len(words[x]))
+    [codes, lengths] = get_code_points(
+        [words[x][:MAX_POSITION] for x in rows])
+    classes = numpy.array(_CLASS_TABLE, dtype=numpy.int16)[codes]
+    counts = numpy.searchsorted(-lengths, -numpy.arange(
+        classes.shape[1]), side='left')
+    rows = numpy.array(rows, dtype=numpy.int64)
+    for column in list(range(classes.shape[1]))[::-1]:
+        count = counts[column]
+        first[rows[:count], classes[:count, column]] = min(
+            column + 1, MAX_POSITION)
+    for column in range(classes.shape[1]):
+        count = counts[column]
+        last[rows[:count], classes[:count, column]] = min(
+            column + 1, MAX_POSITION)
+
+    # The long words always match
+    long_words = numpy.array([len(x) >= MAX_POSITION for x in words])
+    first[long_words] = 1
+    last[long_words] = MAX_POSITION
+    return [first, last]
+
+
+def _get_postings(texts: typing.List[bytes], start: int) -> typing.Any:
+    """Get the sorted (trigram << 32 | row) array of {texts}.  The row
+    starts from {start}."""
+    [codes, lengths] = get_code_points(texts)
+    codes = codes.astype(numpy.uint64)
+    trigrams = (codes[:, :-2] << 16) | (codes[:, 1:-1] << 8) | codes[:, 2:]
+    valid = (numpy.arange(trigrams.shape[1]) + 3) <= lengths[:, None]
+    rows = numpy.arange(start, start + len(texts), dtype=numpy.uint64)
+    return numpy.sort(((trigrams << 32) | rows[:, None])[valid])
+
+
+def _merge_postings(chunks: typing.List[typing.Any]) -> typing.List[
+        typing.Any]:
+    if len(chunks) <= MAX_CHUNKS:
+        return chunks
+    return [numpy.sort(numpy.concatenate(chunks))]
+
+
+def _search_postings(postings: typing.Any, code: int) -> typing.Any:
+    """Get the rows of the trigram {code}"""
+    [start, end] = numpy.searchsorted(postings, numpy.array(
+        [code << 32, (code + 1) << 32], dtype=numpy.uint64))
+    return (postings[start:end] & 0xffffffff).astype(numpy.int64)
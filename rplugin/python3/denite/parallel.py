@@ -0,0 +1,238 @@
+# ============================================================================
+# FILE: parallel.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+from heapq import merge
+from itertools import takewhile
+from multiprocessing import get_all_start_methods, get_context
+import importlib.util
+import traceback
+import typing
+
+from denite.util import (
+    UserContext, Candidates, is_narrowed_input, match_candidates)
+
+# The candidates are matched in parallel if they are more than it
+PARALLEL_THRESHOLD = 10000
+# The number of the candidates which are sent to a worker at once
+CHUNK_SIZE = 1000
+# The context keys which are sent to the workers
+CONTEXT_KEYS = [
+    'ignorecase', 'input', 'is_windows', 'max_candidate_width', 'path',
+    'smartcase',
+]
+
+# (name, path, vars)
+MatcherInfo = typing.Tuple[str, str, typing.Dict[str, typing.Any]]
+# (indexes, stop index, error)
+MatchResult = typing.Tuple[typing.List[int], typing.Optional[int], str]
+
+
+class Matcher(object):
+    """Match the candidates by the worker processes
+
+    The candidates are sharded across the workers by CHUNK_SIZE.  The words
+    are sent to the workers only once and kept resident in the workers, so
+    only the input is sent per match.  The workers cache the results by the
+    input like the child.
+    The workers are not forked from the process, because it has the
+    threads of the remote plugin host.  They are started by "forkserver" or
+    "spawn".
+    Note: The matchers must be "is_parallel".
+    """
+
+    def __init__(self, jobs: int) -> None:
+        methods = get_all_start_methods()
+        mp: typing.Any = get_context(
+            'forkserver' if 'forkserver' in methods else 'spawn')
+        self.jobs = jobs
+        self._connections: typing.List[typing.Any] = []
+        self._processes: typing.List[typing.Any] = []
+        self._states: typing.Dict[int, typing.Dict[str, typing.Any]] = {}
+        for _ in range(jobs):
+            [connection, child_connection] = mp.Pipe()
+            process = mp.Process(target=_main, args=(child_connection,),
+                                 daemon=True)
+            process.start()
+            child_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def update(self, key: int, candidates: Candidates) -> None:
+        """Send the new candidates of {key} to the workers"""
+        state = self._states.get(key, {})
+        if not state or state['candidates'] is not candidates:
+            self._send_all('clear', [key])
+            state = {'candidates': candidates, 'sent': 0, 'chunks': 0}
+            self._states[key] = state
+
+        while state['sent'] < len(candidates):
+            start = state['sent']
+            words = [x['word'] for x in
+                     candidates[start:start + CHUNK_SIZE]]
+            connection = self._connections[state['chunks'] % self.jobs]
+            connection.send(['extend', [key, start, words]])
+            state['sent'] += len(words)
+            state['chunks'] += 1
+
+    def match(self, key: int, context: UserContext,
+              matchers: typing.List[typing.Any], limit: int) -> Candidates:
+        """Match the candidates of {key}.  The results are in the original
+        order and they are the first {limit} matched candidates at most."""
+        state = self._states[key]
+        ctx = {x: context[x] for x in CONTEXT_KEYS if x in context}
+        infos = [(x.name, x.path, x.vars) for x in matchers]
+        self._send_all('match', [key, ctx, infos, limit])
+        results: typing.List[MatchResult] = [
+            x.recv() for x in self._connections]
+
+        errors = [x[2] for x in results if x[2]]
+        if errors:
+            raise RuntimeError(errors[0])
+
+        # The workers which stopped early may have more matched candidates
+        # after the stop index.
+        stops = [x[1] for x in results if x[1] is not None]
+        cutoff = min(stops) if stops else state['sent']
+        indexes = takewhile(lambda x: x < cutoff,
+                            merge(*[x[0] for x in results]))
+        return [state['candidates'][x] for x in indexes]
+
+    def clear(self) -> None:
+        self._states = {}
+        self._send_all('clear', [None])
+
+    def close(self) -> None:
+        for connection in self._connections:
+            try:
+                connection.send(['close', []])
+                connection.close()
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(1)
+        self._connections = []
+        self._processes = []
+
+    def _send_all(self, name: str, args: typing.List[typing.Any]) -> None:
+        for connection in self._connections:
+            connection.send([name, args])
+
+
+class _Shard(object):
+    """The candidates in a worker"""
+
+    def __init__(self) -> None:
+        self._indexes: typing.List[int] = []
+        self._candidates: Candidates = []
+        self._entries: typing.Dict[str, typing.Any] = {}
+        self._matchers: typing.List[str] = []
+
+    def extend(self, start: int, words: typing.List[str]) -> None:
+        self._indexes += range(start, start + len(words))
+        self._candidates += [
+            {'word': x, '__position': i}
+            for [i, x] in enumerate(words, len(self._candidates))]
+
+    def match(self, context: UserContext, matchers: typing.List[typing.Any],
+              limit: int) -> MatchResult:
+        names = [x.name for x in matchers]
+        if names != self._matchers:
+            self._matchers = names
+            self._entries = {}
+
+        key = context['input']
+        positions: typing.List[int] = []
+        end = 0
+        if key in self._entries:
+            [matched, end] = self._entries.pop(key)
+            positions = list(matched)
+        else:
+            base = self._get_narrowing_entry(matchers, key)
+            if base:
+                [matched, end] = base
+                for i in range(0, len(matched), CHUNK_SIZE):
+                    if len(positions) >= limit:
+                        # The rest of the base results are not matched
+                        end = matched[i]
+                        break
+                    positions += self._match(
+                        context, matchers, [self._candidates[x] for x in
+                                            matched[i:i + CHUNK_SIZE]])
+
+        while end < len(self._candidates) and len(positions) < limit:
+            positions += self._match(
+                context, matchers, self._candidates[end:end + CHUNK_SIZE])
+            end = min(end + CHUNK_SIZE, len(self._candidates))
+
+        self._entries[key] = [positions, end]
+        if len(self._entries) > 50:
+            # Remove the oldest entry
+            self._entries.pop(next(iter(self._entries)))
+
+        stop = self._indexes[end] if end < len(self._candidates) else None
+        return ([self._indexes[x] for x in positions], stop, '')
+
+    def _match(self, context: UserContext,
+               matchers: typing.List[typing.Any],
+               candidates: Candidates) -> typing.List[int]:
+        context['candidates'] = candidates
+        match_candidates(context, matchers)
+        return [x['__position'] for x in context['candidates']]
+
+    def _get_narrowing_entry(self, matchers: typing.List[typing.Any],
+                             text: str) -> typing.Any:
+        if not all([x.is_narrowing for x in matchers]):
+            return None
+        bases = [x for x in self._entries if is_narrowed_input(x, text)]
+        if not bases:
+            return None
+        return self._entries[max(bases, key=len)]
+
+
+def _main(connection: typing.Any) -> None:
+    shards: typing.Dict[int, _Shard] = {}
+    filters: typing.Dict[str, typing.Any] = {}
+    while True:
+        try:
+            [name, args] = connection.recv()
+        except (EOFError, OSError):
+            return
+
+        if name == 'extend':
+            [key, start, words] = args
+            shards.setdefault(key, _Shard()).extend(start, words)
+        elif name == 'clear':
+            if args[0] is None:
+                shards.clear()
+            else:
+                shards.pop(args[0], None)
+        elif name == 'match':
+            [key, context, infos, limit] = args
+            try:
+                matchers = [_load_matcher(filters, x) for x in infos]
+                result = shards[key].match(
+                    context, matchers, limit) if key in shards else (
+                        [], None, '')
+            except Exception:
+                result = ([], None, traceback.format_exc())
+            connection.send(result)
+        elif name == 'close':
+            return
+
+
+def _load_matcher(filters: typing.Dict[str, typing.Any],
+                  info: MatcherInfo) -> typing.Any:
+    [name, path, filter_vars] = info
+    if path not in filters:
+        module_name = 'denite.filter.' + name.replace('/', '.')
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)  # type: ignore
+        spec.loader.exec_module(module)  # type: ignore
+        f = module.Filter(None)
+        f.name = name
+        filters[path] = f
+    filters[path].vars = filter_vars
+    return filters[path]
@@ -5,20 +5,17 @@
 # ============================================================================
 
 from abc import ABC, abstractmethod
-from functools import partial
 from pathlib import Path
 from pynvim import Nvim
-from queue import Queue
-import asyncio
-import msgpack
-import subprocess
-import sys
 import time
 import typing
 
 from denite.aprocess import Process
 from denite.util import error_tb, error, UserContext, Candidates
 
+# The time to wait the filtered results from the child process
+FILTER_TIMEOUT = 0.05
+
 
 class _Parent(ABC):
     def __init__(self, vim: Nvim) -> None:
@@ -33,7 +30,7 @@ class _Parent(ABC):
         pass
 
     @abstractmethod
-    def _put(self, name: str, args: typing.List[typing.Any]) -> str:
+    def _put(self, name: str, args: typing.List[typing.Any]) -> typing.Any:
         pass
 
     @abstractmethod
@@ -71,6 +68,13 @@ class _Parent(ABC):
                          targets: Candidates) -> typing.Any:
         return self._get('get_action_names', [context, targets])
 
+    def get_match_positions(self, context: UserContext,
+                            candidates: Candidates) -> typing.Any:
+        return self._get('get_match_positions', [context, candidates])
+
+    def is_paused(self) -> bool:
+        return bool(self._get('is_paused', []))
+
 
 class SyncParent(_Parent):
     def _start_process(self) -> None:
@@ -86,92 +90,137 @@ class SyncParent(_Parent):
 
 
 class ASyncParent(_Parent):
+    """The parent which filters the candidates in the other process
+
+    The sources are owned by the child in the parent: the candidates are
+    gathered and the actions are executed in the parent, because the
+    sources and the actions call Vim synchronously while Vim waits the
+    request.  The gathered candidates are sent to the filter process with
+    the filter request.
+
+    The requests are sent to the filter process by msgpack over its stdio
+    and the responses are matched by "queue_id".  filter_candidates() does
+    not wait the slow filter process; it returns the last completed result
+    while the newer request is in flight.  If the input is changed, the new
+    request supersedes the in-flight request.
+    """
+
     def _start_process(self) -> None:
-        self._stdin = None
-        self._queue_id = ''
-        self._queue_in: Queue[str] = Queue()
-        self._queue_out: Queue[str] = Queue()
-        self._packer = msgpack.Packer(
-            unicode_errors='surrogateescape')
-        self._unpacker = msgpack.Unpacker(
-            unicode_errors='surrogateescape')
-
-        info = None
-        if sys.platform == 'win32':
-            info = subprocess.STARTUPINFO()
-            info.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        from denite.child import Child
+        self._child = Child(self._vim)
+        self._queue_id = 0
+        self._results: typing.Dict[int, typing.Any] = {}
+        self._filter_queue_id = -1
+        self._filter_input = ''
+        self._filter_result: typing.List[typing.Any] = [
+            False, '', [], 0, 0, []]
 
         main = str(Path(__file__).parent.parent.parent.parent.joinpath(
             'autoload', 'denite', '_main.py'))
-
         command = (self._vim.vars['python3_host_prog']
                    if 'python3_host_prog' in self._vim.vars else 'python3')
-        self._hnd = self._vim.loop.create_task(
-            self._vim.loop.subprocess_exec(
-                partial(Process, self),
-                command,
-                main,
-                self._vim.vars['denite#_serveraddr'],
-                stderr=None,
-                startupinfo=info))
-
-    # def _connect_stdin(self, stdin):
-    #     self._stdin = stdin
-    #     return self._unpacker
-
-    # def filter_candidates(self, context):
-    #     if self._queue_id:
-    #         # Use previous id
-    #         queue_id = self._queue_id
-    #     else:
-    #         queue_id = self._put('filter_candidates', [context])
-    #         if not queue_id:
-    #             return (False, [])
-    #
-    #     get = self._get(queue_id, True)
-    #     if not get:
-    #         # Skip the next merge_results
-    #         self._queue_id = queue_id
-    #         return [True, '', [], [], 0]
-    #     self._queue_id = ''
-    #     results = get[0]
-    #     return results if results else [False, '', [], [], 0]
-
-    def _put(self, name: str, args: typing.List[typing.Any]) -> str:
-        if not self._hnd:
-            return ''
-
-        queue_id = str(time.time())
-        msg = self._packer.pack({
-            'name': name, 'args': args, 'queue_id': queue_id
-        })
-        self._queue_in.put(msg)
-
-        if self._stdin:
-            try:
-                while not self._queue_in.empty():
-                    self._stdin.write(self._queue_in.get_nowait())
-            except BrokenPipeError:
-                error_tb(self._vim, 'Crash in child process')
-                error(self._vim, 'stderr=' + str(self._proc.read_error()))
-                self._hnd = None
-        return queue_id
+        self._proc: typing.Optional[Process] = Process(
+            [command, main, self._vim.vars['denite#_serveraddr']])
+
+    def start(self, context: UserContext) -> None:
+        self._child.start(context)
+        super().start(context)
+
+    def gather_candidates(self, context: UserContext) -> None:
+        self._child.gather_candidates(context)
+
+    def on_init(self, context: UserContext) -> None:
+        self._child.on_init(context)
+        self._filter_queue_id = -1
+        self._filter_result = [False, '', [], 0, 0, []]
+        self._put('init_filters', [
+            context, self._child.get_filter_sources()])
+
+    def on_close(self, context: UserContext) -> None:
+        self._child.on_close(context)
+
+    def init_syntax(self, context: UserContext, is_multi: bool) -> None:
+        self._child.init_syntax(context, is_multi)
+
+    def filter_candidates(self, context: UserContext) -> typing.Any:
+        if self._filter_queue_id >= 0:
+            self._receive(0)
+            if self._filter_queue_id in self._results:
+                self._set_filter_result()
+            elif context['input'] != self._filter_input:
+                # Supersede the stale request.  The child cancels it and
+                # its result is ignored.
+                self._filter_queue_id = -1
+
+        if self._filter_queue_id < 0:
+            self._filter_input = context['input']
+            self._filter_queue_id = self._put('filter_candidates', [
+                context, self._child.update_candidates(context)])
+            if self._filter_queue_id < 0:
+                return [False, '', [], 0, 0, []]
+
+        # Wait a moment for the quick filters
+        start = time.time()
+        while (self._filter_queue_id not in self._results and
+               time.time() < start + FILTER_TIMEOUT and self._proc):
+            self._receive(start + FILTER_TIMEOUT - time.time())
+        if self._filter_queue_id in self._results:
+            self._set_filter_result()
+            return self._filter_result
+
+        # The request is in flight.  Poll it again by the async update.
+        return [True] + self._filter_result[1:]
+
+    def _set_filter_result(self) -> None:
+        result = self._results.pop(self._filter_queue_id)
+        if result:
+            self._filter_result = result
+        self._filter_queue_id = -1
+
+    def _put(self, name: str, args: typing.List[typing.Any]) -> int:
+        if not self._proc:
+            return -1
+
+        self._queue_id += 1
+        try:
+            self._proc.write({
+                'name': name, 'args': args, 'queue_id': self._queue_id
+            })
+        except OSError:
+            self._crash()
+            return -1
+        return self._queue_id
 
     def _get(self, name: str, args: typing.List[typing.Any],
              is_async: bool = False) -> typing.Any:
-        if not self._hnd:
-            return None
-
-        self._vim.run_coroutine(asyncio.sleep(5))
-        return self._vim.vars['denite#_ret']
-
-        # outs = []
-        # while not self._queue_out.empty():
-        #     outs.append(self._queue_out.get_nowait())
-        # try:
-        #     return [x for x in outs if x['queue_id'] == queue_id]
-        # except TypeError:
-        #     error_tb(self._vim,
-        #              '"stdout" seems contaminated by sources. '
-        #              '"stdout" is used for RPC; Please pipe or discard')
-        #     return []
+        # Note: The actions are executed in the parent.  The filter process
+        # cannot call Vim while Vim waits the request.
+        return self._child.main(name, args, queue_id=0)
+
+    def _receive(self, timeout: float) -> None:
+        if not self._proc:
+            return
+
+        child_out = self._proc.read(timeout)
+        while child_out is not None:
+            if not isinstance(child_out, dict) or 'queue_id' not in child_out:
+                error(self._vim, '"stdout" seems contaminated by sources. '
+                      '"stdout" is used for RPC; Please pipe or discard')
+            else:
+                if child_out.get('error', ''):
+                    for line in child_out['error'].splitlines():
+                        error(self._vim, line)
+                if child_out['queue_id'] == self._filter_queue_id:
+                    self._results[child_out['queue_id']] = child_out['ret']
+            child_out = self._proc.read(0)
+
+        if not self._proc.is_alive():
+            self._crash()
+
+    def _crash(self) -> None:
+        if not self._proc:
+            return
+        error_tb(self._vim, 'Crash in child process')
+        error(self._vim, 'stderr=' + self._proc.read_error())
+        self._proc.kill()
+        self._proc = None
@@ -5,7 +5,7 @@
 # ============================================================================
 
 import subprocess
-from threading import Thread
+from threading import Event, Thread
 from queue import Queue
 from time import time, sleep
 import os
@@ -15,29 +15,69 @@ from denite.util import UserContext
 
 
 class Process(object):
+    """The command which is read by the reader thread
+
+    If {parser} is given, the outputs are parsed by {parser}(line) in the
+    reader thread and the lines which are parsed to None are skipped.
+    If {limit} is positive, the reader thread stops reading after {limit}
+    outputs until resume() is called.  The command is blocked when the pipe
+    is full.
+    If {is_server} is True, the requests are sent to the command by write().
+    The stderr of the server is discarded, because it is not read until the
+    command exits.
+    """
+
     def __init__(self, commands: typing.List[str],
-                 context: UserContext, cwd: str) -> None:
+                 context: UserContext, cwd: str,
+                 parser: typing.Optional[
+                     typing.Callable[[str], typing.Any]] = None,
+                 limit: int = 0, is_server: bool = False) -> None:
         info = None
         if os.name == 'nt':
             info = subprocess.STARTUPINFO()  # type: ignore
             info.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # type: ignore
         self._proc: typing.Optional[typing.Any] = subprocess.Popen(
             commands,
-            stdin=subprocess.DEVNULL,
+            stdin=subprocess.PIPE if is_server else subprocess.DEVNULL,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stderr=subprocess.DEVNULL if is_server else subprocess.PIPE,
             startupinfo=info,
             cwd=cwd)
         self._eof = False
         self._context = context
-        self._queue_out: Queue[str] = Queue()
+        self._parser = parser
+        self._limit = limit
+        self._count = 0
+        self._is_paused = False
+        self._resume_event = Event()
+        self._queue_out: Queue[typing.Any] = Queue()
         self._thread: typing.Optional[Thread] = Thread(
-            target=self.enqueue_output)
+            target=self.enqueue_output, daemon=is_server)
         self._thread.start()
 
     def eof(self) -> bool:
         return self._eof
 
+    def write(self, data: bytes) -> None:
+        """Send {data} to the server.  It raises OSError if the server is
+        dead."""
+        if not self._proc:
+            raise BrokenPipeError('The process is killed')
+        self._proc.stdin.write(data)
+        self._proc.stdin.flush()
+
+    def is_paused(self) -> bool:
+        """Whether the reader thread waits resume() and all outputs are
+        read"""
+        return (self._is_paused and self._limit <= self._count and
+                self._queue_out.empty())
+
+    def resume(self, count: int) -> None:
+        """Read {count} more outputs"""
+        self._limit += count
+        self._is_paused = False
+        self._resume_event.set()
+
     def kill(self) -> None:
         if not self._proc:
             return
@@ -49,6 +89,8 @@ class Process(object):
 
         self._proc = None
         self._queue_out = Queue()
+        self._limit = 0
+        self._resume_event.set()
         if self._thread:
             self._thread.join(1.0)
         self._thread = None
@@ -60,12 +102,23 @@ class Process(object):
         for line in self._proc.stdout:
             if not self._thread:
                 return
-            self._queue_out.put(
-                line.decode(self._context['encoding'],
-                            errors='replace').strip('\r\n'))
+            out = line.decode(self._context['encoding'],
+                              errors='replace').strip('\r\n')
+            if self._parser:
+                out = self._parser(out)
+                if out is None:
+                    continue
+            self._queue_out.put(out)
+
+            self._count += 1
+            while 0 < self._limit <= self._count:
+                self._is_paused = True
+                self._resume_event.wait()
+                self._resume_event.clear()
+            self._is_paused = False
 
     def communicate(self, timeout: float) -> typing.Tuple[
-            typing.List[str], typing.List[str]]:
+            typing.List[typing.Any], typing.List[str]]:
         if not self._proc:
             return ([], [])
 
@@ -87,7 +140,7 @@ class Process(object):
             return ([], [])
 
         errs = errs.decode(self._context['encoding'],
-                           errors='replace').splitlines()
+                           errors='replace').splitlines() if errs else []
         self._eof = True
         self._proc = None
         self._thread = None
@@ -0,0 +1,101 @@
+# ============================================================================
+# FILE: registry.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+from os import stat
+from pathlib import Path
+import typing
+
+from denite.trace import phase
+from denite.util import UserContext, find_rplugins, import_rplugin
+
+# path: [mtime, name]
+Index = typing.Dict[str, typing.List[typing.Any]]
+# (class, path, module_path) -> plugin
+Loader = typing.Callable[[typing.Any, str, str], typing.Any]
+
+
+class Registry(object):
+    """The sources, filters or kinds in runtimepath
+
+    The modules are imported when the plugins are referenced first.  The
+    names of the plugins are recorded in the index by the path and the mtime
+    of the modules, so the modules are imported only when they are new or
+    changed to get the names.
+    The plugin is created by {loader}.  It must register the plugin and the
+    aliases to the registry and return the plugin.
+    """
+
+    def __init__(self, source: str, attr: str, loader: Loader) -> None:
+        self._source = source
+        self._attr = attr
+        self._loader = loader
+        # name: (path, module_path) of the plugins which are not imported
+        self._paths: typing.Dict[str, typing.Tuple[str, str]] = {}
+        self._plugins: typing.Dict[str, typing.Any] = {}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._plugins or name in self._paths
+
+    def __getitem__(self, name: str) -> typing.Any:
+        self.load(name)
+        return self._plugins[name]
+
+    def __setitem__(self, name: str, plugin: typing.Any) -> None:
+        self._plugins[name] = plugin
+        self._paths.pop(name, None)
+
+    def keys(self) -> typing.List[str]:
+        return list(self._plugins.keys()) + list(self._paths.keys())
+
+    def values(self) -> typing.List[typing.Any]:
+        """Get the imported plugins"""
+        return list(self._plugins.values())
+
+    def update(self, context: UserContext, index: Index) -> bool:
+        """Find the plugins from runtimepath.  The new or changed modules
+        are imported and recorded in {index}.  It returns True if {index} is
+        changed."""
+        loaded_paths = [str(Path(x.path).resolve())
+                        for x in self._plugins.values()]
+        is_changed = False
+        for [path, module_path] in find_rplugins(
+                context, self._source, loaded_paths):
+            try:
+                mtime = stat(path).st_mtime
+            except OSError:
+                continue
+            if path in index and index[path][0] == mtime:
+                name = index[path][1]
+                if name and getattr(
+                        self._plugins.get(name), 'path', '') != path:
+                    # The later plugin overwrites the same name
+                    self._plugins.pop(name, None)
+                    self._paths[name] = (path, module_path)
+            else:
+                plugin = self._import(path, module_path)
+                index[path] = [mtime, plugin.name if plugin else '']
+                is_changed = True
+        return is_changed
+
+    def load(self, name: str) -> None:
+        """Import the plugin of {name} if it is not imported"""
+        if name not in self._plugins and name in self._paths:
+            self._import(*self._paths[name])
+
+    def set_alias(self, alias: str, name: str) -> None:
+        """Register {alias} of {name} which is not imported.  The aliases of
+        the imported plugins are registered by the loader."""
+        if name in self._paths and alias not in self._plugins:
+            self._paths[alias] = self._paths[name]
+
+    def _import(self, path: str, module_path: str) -> typing.Any:
+        # The loader registers all names of the path
+        self._paths = {x: y for [x, y] in self._paths.items()
+                       if y[0] != path}
+        with phase('import', path=path):
+            attr = import_rplugin(
+                self._attr, self._source, path, module_path)
+            return self._loader(attr, path, module_path) if attr else None
@@ -5,10 +5,12 @@
 # ============================================================================
 
 from pynvim import Nvim
+from time import perf_counter
 import typing
 
 from denite.context import Context
 from denite.parent import SyncParent
+from denite.trace import start_trace, stop_trace, add_phase, phase
 
 Args = typing.List[typing.Any]
 
@@ -24,9 +26,14 @@ class Rplugin:
 
     def start(self, args: Args) -> typing.Any:
         try:
+            start = perf_counter()
             context = Context(self._vim).get(args[1])
+            if context['trace']:
+                start_trace(context['trace'], start)
+                add_phase('context', start)
             ui = self.get_ui(context['buffer_name'])
-            return ui.start(args[0], context)
+            with phase('start'):
+                return ui.start(args[0], context)
         except NameError as ex:
             import denite.util
             denite.util.error(self._vim, str(ex))
@@ -37,11 +44,13 @@ class Rplugin:
                 denite.util.error(self._vim, line)
             denite.util.error(self._vim,
                               'Please execute :messages command.')
+        finally:
+            stop_trace()
 
     def do_action(self, args: Args) -> typing.Any:
         try:
             ui = self.get_ui(args[0]['buffer_name'])
-            ui._cursor = self._vim.call('line', '.')
+            ui._cursor = ui._get_cursor_pos()
             return ui._denite.do_action(args[0], args[1], args[2])
         except Exception:
             import traceback
@@ -78,7 +87,7 @@ class Rplugin:
         try:
             buffer_name = bufvars['denite']['buffer_name']
             ui = self.get_ui(buffer_name)
-            ui._cursor = self._vim.call('line', '.')
+            ui._cursor = ui._get_cursor_pos()
             ui._context['next_actions'] = []
 
             ret = do_map(ui, args[1], args[2])
@@ -6,7 +6,6 @@
 
 from pathlib import Path
 from pynvim import Nvim
-from pynvim.api import Buffer
 from sys import maxsize
 from time import localtime, strftime, time
 import typing
@@ -56,19 +55,17 @@ class Source(Base):
                     self.syntax_name, syn['name'], syn['link']))
 
     def gather_candidates(self, context: UserContext) -> Candidates:
-        rjust = len(f'{len(self.vim.buffers)}') + 1
+        # Note: Get the all buffers attributes by one RPC call.
+        buffers = self.vim.call('denite#helper#_get_buffer_attributes')
+        rjust = len(f'{len(buffers)}') + 1
         ljustnm = 0
         rjustft = 0
         bufattrs = []
-        for ba in [self._get_attributes(context, x)
-                   for x in self.vim.buffers]:
+        for ba in [self._get_attributes(context, x) for x in buffers]:
             if not self._is_excluded(context, ba):
                 if ba['name'] == '':
                     ba['fn'] = 'No Name'
                     ba['path'] = ''
-                else:
-                    ba['fn'] = self.vim.call('fnamemodify', ba['name'], ':~:.')
-                    ba['path'] = self.vim.call('fnamemodify', ba['name'], ':p')
                 ljustnm = max(ljustnm, len(ba['fn']))
                 rjustft = max(rjustft, len(ba['filetype']))
                 bufattrs.append(ba)
@@ -112,30 +109,37 @@ class Source(Base):
         }
 
     def _get_attributes(self, context: UserContext,
-                        buf: Buffer) -> typing.Dict[str, typing.Any]:
+                        buf: typing.Dict[str, typing.Any]
+                        ) -> typing.Dict[str, typing.Any]:
         attr = {
-            'number': buf.number,
-            'name': buf.name
+            'number': buf['number'],
+            'name': buf['name'],
+            'fn': buf['fn'],
+            'path': buf['path'],
         }
 
-        # Note: Use filereadable() to ignore stat() error in pathlib
-        timestamp = (Path(attr['name']).stat().st_atime
-                     if self.vim.call(
-                         'filereadable', attr['name']) else time())
-        mark_listed = (' ' if self.vim.call('buflisted', attr['number'])
-                       else 'u')
+        # Note: stat() is called in Python instead of filereadable().
+        timestamp = time()
+        if attr['name'] != '':
+            try:
+                path = Path(attr['name'])
+                if path.is_file():
+                    timestamp = path.stat().st_atime
+            except OSError:
+                pass
+        mark_listed = ' ' if buf['listed'] else 'u'
         mark_bufnr = ('%' if attr['number'] == context['__caller_bufnr']
                       else '#' if attr['number'] == context['__alter_bufnr']
                       else ' ')
-        mark_alt = ('a' if self.vim.call('win_findbuf', attr['number'])
-                    else 'h' if self.vim.call('bufloaded', attr['number']) != 0
+        mark_alt = ('a' if buf['shown']
+                    else 'h' if buf['loaded']
                     else ' ')
-        mark_modified = ('=' if buf.options['readonly']
-                         else '+' if buf.options['modified']
-                         else '-' if buf.options['modifiable'] == 0
+        mark_modified = ('=' if buf['readonly']
+                         else '+' if buf['modified']
+                         else '-' if buf['modifiable'] == 0
                          else ' ')
         attr.update({
-            'filetype': self.vim.call('getbufvar', buf.number, '&filetype'),
+            'filetype': buf['filetype'],
             'timestamp': timestamp,
             'status': '{}{}{}{}'.format(
                 mark_listed, mark_bufnr, mark_alt, mark_modified)
@@ -7,10 +7,13 @@
 from pathlib import Path
 from pynvim import Nvim
 import argparse
+import os
 import shutil
 import typing
 
 from denite.base.source import Base
+from denite.cache import get_cache_path, load_cache, save_cache
+from denite.index import Index
 from denite.process import Process
 from denite.util import parse_command, abspath, UserContext, Candidates
 from denite.util import get_python_exe
@@ -26,10 +29,12 @@ class Source(Base):
         self.vars = {
             'command': [],
             'cache_threshold': 10000,
+            'cache_directory': '',
         }
         self.converters = ['converter/truncate_abbr']
 
         self._cache: typing.Dict[str, Candidates] = {}
+        self._indexes: typing.Dict[str, Index] = {}
 
     def on_init(self, context: UserContext) -> None:
         """scantree.py command has special meaning, using the internal
@@ -69,27 +74,69 @@ class Source(Base):
 
         if context['is_redraw'] and directory in self._cache:
             self._cache.pop(directory)
+            self._indexes.pop(directory)
         if directory in self._cache:
+            context['candidates_index'] = self._indexes[directory]
             return self._cache[directory]
 
         if context['__proc']:
             return self._async_gather_candidates(
                 context, context['async_timeout'])
 
-        if ':directory' in self.vars['command']:
-            args = parse_command(
-                self.vars['command'], directory=directory)
-        else:
-            args = self.vars['command'] + [directory]
+        args = self._get_command_args(directory)
         if shutil.which(args[0]) is None:
             self.error_message(context, args[0] + ' is not executable.')
             return []
         self.print_message(context, args)
-        context['__proc'] = Process(args, context, directory)
+        context['__args'] = args
         context['__current_candidates'] = []
+        context['__rescan_directories'] = []
+        context['__is_cache_changed'] = True
+        # The index is built incrementally while gathering
+        context['candidates_index'] = Index()
+
+        if self.vars['cache_directory'] and not context['is_redraw']:
+            candidates = self._load_persistent_cache(context)
+            if candidates is not None:
+                context['__current_candidates'] = list(candidates)
+                context['candidates_index'].extend(candidates)
+                if not context['__rescan_directories']:
+                    self._finish_gather(context)
+                    return candidates
+                self._start_process(
+                    context, *context['__rescan_directories'].pop(0))
+                return candidates + self._async_gather_candidates(
+                    context, context['async_timeout'])
+
+        self._start_process(context, directory)
         return self._async_gather_candidates(
             context, context['async_timeout'])
 
+    def _get_command_args(self, directory: str,
+                          recursive: bool = True) -> typing.List[str]:
+        if ':directory' in self.vars['command']:
+            args = parse_command(self.vars['command'], directory=directory)
+        else:
+            args = self.vars['command'] + [directory]
+        if recursive:
+            return args
+
+        # Limit the scan to the own entries of the directory
+        if args[0] == 'find' and directory in args:
+            pos = args.index(directory) + 1
+            args = args[:pos] + ['-maxdepth', '1'] + args[pos:]
+        elif len(args) > 1 and Path(args[1]).name == 'scantree.py':
+            args = args + ['--max-depth', '1']
+        return args
+
+    def _start_process(self, context: UserContext, directory: str,
+                       recursive: bool = True) -> None:
+        context['__proc'] = Process(
+            self._get_command_args(directory, recursive), context, directory)
+        context['__scan_directory'] = directory
+        context['__scan_recursive'] = recursive
+        context['is_async'] = True
+
     def _async_gather_candidates(self, context: UserContext,
                                  timeout: float) -> Candidates:
         outs, errs = context['__proc'].communicate(timeout=timeout)
@@ -101,27 +148,158 @@ class Source(Base):
         context['is_async'] = not context['__proc'].eof()
         if context['__proc'].eof():
             context['__proc'] = None
+        candidates = self._convert_outputs(context, outs)
+        if not context['__scan_recursive']:
+            # Only the own entries are rescanned
+            d = os.path.relpath(context['__scan_directory'],
+                                context['__directory'])
+            candidates = [x for x in candidates if os.path.normpath(
+                os.path.dirname(x['word'])) == d]
+        context['__current_candidates'] += candidates
+        context['candidates_index'].extend(candidates)
+
+        if not context['__proc']:
+            if context['__rescan_directories']:
+                self._start_process(
+                    context, *context['__rescan_directories'].pop(0))
+            else:
+                self._finish_gather(context)
+
+        return candidates
+
+    def _convert_outputs(self, context: UserContext,
+                         outs: typing.List[str]) -> Candidates:
         if not outs:
             return []
         directory = context['__directory']
+        scan_directory = context['__scan_directory']
         if outs and Path(outs[0]).is_absolute():
-            candidates = [{
+            return [{
                 'word': str(Path(x).relative_to(directory)),
                 'action__path': x,
                 } for x in outs if x != '' and directory in x]
-        else:
-            candidates = [{
+        elif scan_directory == directory:
+            return [{
                 'word': x,
                 'action__path': str(Path(directory).joinpath(x)),
                 } for x in outs if x != '']
-        context['__current_candidates'] += candidates
+        else:
+            # Rescanned sub directory
+            prefix = Path(scan_directory).relative_to(directory)
+            return [{
+                'word': str(prefix.joinpath(x)),
+                'action__path': str(Path(scan_directory).joinpath(x)),
+                } for x in outs if x != '']
 
+    def _finish_gather(self, context: UserContext) -> None:
+        directory = context['__directory']
         threshold = int(self.vars['cache_threshold'])
-        if (not context['__proc'] and threshold > 0 and
+        if (threshold > 0 and
                 len(context['__current_candidates']) > threshold):
             self._cache[directory] = context['__current_candidates']
+            self._indexes[directory] = context['candidates_index']
+            if (self.vars['cache_directory'] and
+                    context['__is_cache_changed']):
+                self._save_persistent_cache(context)
 
-        return candidates
+    def _get_persistent_cache_path(self, context: UserContext) -> Path:
+        return get_cache_path(self.vars['cache_directory'], 'file_rec',
+                              [context['__directory'], context['__args']])
+
+    def _load_persistent_cache(
+            self, context: UserContext) -> typing.Optional[Candidates]:
+        """Load the persistent cache and revalidate it.
+
+        The cache has the modified time and the entry names of the
+        scanned directories.  If the directory entries are removed, the
+        files are removed from the candidates.  If the sub directories are
+        added, they are scanned by the command.  If the files are added,
+        only the own entries of the directory are rescanned.  The rescan
+        directories are set to context['__rescan_directories'] as
+        [path, recursive].  context['__is_cache_changed'] is False if the
+        cache is valid as it is.
+        """
+        data = load_cache(self._get_persistent_cache_path(context))
+        if not data:
+            return None
+
+        directory = context['__directory']
+        files: typing.Dict[str, typing.List[str]] = data['files']
+        directories: typing.Dict[str, typing.Any] = data['directories']
+        removed: typing.Set[str] = set()
+        rescan: typing.Set[str] = set()
+        own: typing.Set[str] = set()
+        is_changed = False
+        for d, [mtime, names] in directories.items():
+            path = os.path.join(directory, d)
+            try:
+                if os.stat(path).st_mtime_ns == mtime:
+                    continue
+                current = set(os.listdir(path))
+            except OSError:
+                removed.add(d)
+                continue
+
+            old = set(names)
+            for name in old - current:
+                entry = os.path.normpath(os.path.join(d, name))
+                if entry in directories or entry in files:
+                    removed.add(entry)
+                elif d in files:
+                    files[d] = [x for x in files[d]
+                                if os.path.basename(x) != name]
+                    is_changed = True
+            for name in current - old:
+                entry = os.path.normpath(os.path.join(d, name))
+                if os.path.isdir(os.path.join(directory, entry)):
+                    rescan.add(entry)
+                else:
+                    own.add(d)
+
+        # Remove the nested rescan directories
+        rescan_directories = [x for x in sorted(rescan)
+                              if not _is_subdirectory(x, rescan)]
+        removed |= set(rescan_directories)
+        own_directories = [x for x in sorted(own) if x not in removed and
+                           not _is_subdirectory(x, removed)]
+        context['__rescan_directories'] = [
+            (str(Path(directory).joinpath(x)), True)
+            for x in rescan_directories] + [
+            (str(Path(directory).joinpath(x)), False)
+            for x in own_directories]
+
+        context['__is_cache_changed'] = bool(
+            is_changed or removed or context['__rescan_directories'])
+
+        skipped = set(own_directories)
+        return [{
+            'word': x,
+            'action__path': os.path.join(directory, x),
+        } for d in files.keys() if d not in removed and d not in skipped and
+            not _is_subdirectory(d, removed)
+            for x in files[d]]
+
+    def _save_persistent_cache(self, context: UserContext) -> None:
+        directory = context['__directory']
+        files: typing.Dict[str, typing.List[str]] = {}
+        for candidate in context['__current_candidates']:
+            word = candidate['word']
+            d = os.path.normpath(os.path.dirname(word))
+            if d not in files:
+                files[d] = []
+            files[d].append(word)
+
+        # Add the parent directories
+        parents: typing.Set[str] = set()
+        for d in files.keys():
+            while d not in parents:
+                parents.add(d)
+                d = os.path.dirname(d) or '.'
+
+        save_cache(self._get_persistent_cache_path(context), {
+            'files': files,
+            'directories': _scan_directories(directory, parents),
+        })
 
     def parse_command_for_scantree(self,
                                    cmd: typing.List[str]) -> typing.List[str]:
@@ -148,3 +326,47 @@ class Source(Base):
 
         return [get_python_exe(), str(scantree_py),
                 '--ignore', ignore, '--path', path, *rest]
+
+
+def _is_subdirectory(path: str, directories: typing.Set[str]) -> bool:
+    """Check {path} is under one of {directories}"""
+    if path != '.' and '.' in directories:
+        return True
+    parent = os.path.dirname(path)
+    while parent:
+        if parent in directories:
+            return True
+        parent = os.path.dirname(parent)
+    return False
+
+
+def _scan_directories(
+        directory: str,
+        parents: typing.Set[str]) -> typing.Dict[str, typing.Any]:
+    """Get the modified time and the entry names of the directories under
+    {directory}.  {parents} are the directories which contain the
+    candidates.  The empty directories are recorded.  The directory which
+    has the files but no candidates is ignored by the command, so it is
+    recorded but its sub directories are not scanned."""
+    directories: typing.Dict[str, typing.Any] = {}
+    stack = ['.']
+    while stack:
+        d = stack.pop()
+        try:
+            path = os.path.join(directory, d)
+            mtime = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        directories[d] = [mtime, [x.name for x in entries]]
+
+        subdirs = []
+        for entry in entries:
+            subdir = os.path.normpath(os.path.join(d, entry.name))
+            # The links are followed only if they have the candidates
+            if entry.is_dir() and (subdir in parents or
+                                   not entry.is_symlink()):
+                subdirs.append(subdir)
+        if d in parents or not [x for x in entries if not x.is_dir()]:
+            stack += subdirs
+    return directories
@@ -12,7 +12,7 @@ import typing
 
 from denite import util, process
 from denite.base.source import Base
-from denite.util import UserContext, Candidates, Candidate, truncate
+from denite.util import UserContext, Candidates, Candidate, truncate_display
 
 
 GREP_HEADER_SYNTAX = (
@@ -63,6 +63,7 @@ class Source(Base):
             'default_opts': ['-inH'],
             'final_opts': [],
             'max_path_length': 50,
+            'max_results': 100000,
             'min_interactive_length': 3,
             'pattern_opt': ['-e'],
             'recursive_opts': ['-r'],
@@ -72,6 +73,9 @@ class Source(Base):
 
     def on_init(self, context: UserContext) -> None:
         context['__proc'] = None
+        context['__paused_input'] = None
+        context['__relpaths'] = {}
+        context['__truncated_paths'] = {}
 
         # Backwards compatibility for `ack`
         if (self.vars['command'] and
@@ -94,6 +98,7 @@ class Source(Base):
         if context['__proc']:
             context['__proc'].kill()
             context['__proc'] = None
+        context['is_paused'] = False
 
     def highlight(self) -> None:
         self.vim.command(GREP_HEADER_SYNTAX)
@@ -137,42 +142,81 @@ class Source(Base):
         args = self._init_grep_args(context)
         self.print_message(context, args)
 
-        context['__proc'] = process.Process(args, context, context['path'])
+        context['__proc'] = process.Process(
+            args, context, context['path'],
+            parser=lambda x: self._parse_line(context, x),
+            limit=self.vars['max_results'])
         return self._async_gather_candidates(context, 0.5)
 
     def _async_gather_candidates(self, context: UserContext,
                                  timeout: float) -> Candidates:
+        if self._check_paused(context):
+            # Wait the input or the scroll
+            return []
         outs, errs = context['__proc'].communicate(timeout=timeout)
         if errs:
             self.error_message(context, errs)
-        context['is_async'] = (
-            context['__proc'] and not context['__proc'].eof())
         if context['__proc'] and context['__proc'].eof():
             context['__proc'] = None
+        # Note: The paused process is not async, so it is not polled.
+        context['is_paused'] = bool(
+            context['__proc'] and context['__proc'].is_paused())
+        context['is_async'] = bool(
+            context['__proc'] and not context['is_paused'])
 
+        truncated_paths = context['__truncated_paths']
         candidates = []
+        for [result, path] in outs:
+            if path not in truncated_paths:
+                truncated_paths[path] = truncate_display(
+                    path, self.vars['max_path_length'], context['ambiwidth'])
+            candidates.append(_candidate(result, truncated_paths[path]))
+        return candidates
 
-        for line in outs:
-            result = util.parse_jump_line(context['path'], line)
-            if not result:
+    def _check_paused(self, context: UserContext) -> bool:
+        """Resume the paused process by max_results if the input is
+        changed or the candidates are scrolled to the end.  It returns
+        True if the process is still paused."""
+        if not context['__proc'].is_paused():
+            context['__paused_input'] = None
+            return False
+
+        if context['__paused_input'] is None:
+            context['__paused_input'] = context['input']
+        if (context['__paused_input'] != context['input'] or
+                context.get('is_scrolled_to_end', False)):
+            context['__paused_input'] = None
+            context['__proc'].resume(self.vars['max_results'])
+            return False
+        return True
+
+    def _parse_line(self, context: UserContext, line: str) -> typing.Any:
+        """Parse the output line to [result, relative path]
+
+        Note: It is called in the reader thread, so it must not use vim.
+        """
+        result = util.parse_jump_line(context['path'], line)
+        if not result:
+            return None
+
+        relpaths = context['__relpaths']
+        if result[0] not in relpaths:
+            relpaths[result[0]] = self._get_relpath(context, result[0])
+        return [result, relpaths[result[0]]]
+
+    def _get_relpath(self, context: UserContext, path: str) -> str:
+        for searching_path in context['__paths']:
+            if path == searching_path:
                 continue
-            path = result[0]
-            for searching_path in context['__paths']:
-                if path == searching_path:
-                    continue
-
-                if path.startswith(context['path'] + sep):
-                    # relative to context path
-                    path = str(Path(path).relative_to(context['path']))
-                    break
-                elif path.startswith(searching_path + sep):
-                    # relative to parent searching_path
-                    path = str(Path(path).relative_to(
-                        Path(searching_path).parent))
-                    break
-            truncated = truncate(self.vim, path, self.vars['max_path_length'])
-            candidates.append(_candidate(result, truncated))
-        return candidates
+
+            if path.startswith(context['path'] + sep):
+                # relative to context path
+                return str(Path(path).relative_to(context['path']))
+            elif path.startswith(searching_path + sep):
+                # relative to parent searching_path
+                return str(Path(path).relative_to(
+                    Path(searching_path).parent))
+        return path
 
     def _init_grep_args(self, context: UserContext) -> typing.List[str]:
         args = [util.expand(self.vars['command'][0])]
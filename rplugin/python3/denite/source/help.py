@@ -7,9 +7,12 @@
 from os import sep
 from pathlib import Path
 from pynvim import Nvim
+import typing
 
 from denite.base.source import Base
 from denite.kind.file import Kind as File
+from denite.tags import (
+    get_tagfile, is_cached, acquire_tagfiles, release_tagfiles, TagFile)
 from denite.util import globruntime, UserContext, Candidates
 
 
@@ -21,21 +24,46 @@ class Source(Base):
         self.name = 'help'
         self.kind = Kind(vim)
 
+        # Note: The candidates are shared by the sessions.  They are
+        # validated by the identity of TagFile.
+        self._caches: typing.Dict[
+            str, typing.Tuple[TagFile, Candidates]] = {}
+
+    def on_init(self, context: UserContext) -> None:
+        context['__tags'] = globruntime(context['runtimepath'], 'doc/tags')
+        acquire_tagfiles(context['__tags'])
+
+    def on_close(self, context: UserContext) -> None:
+        release_tagfiles(context.get('__tags', []))
+        context['__tags'] = []
+        # Remove the candidates of the evicted files
+        self._caches = {
+            path: cache for [path, cache] in self._caches.items()
+            if is_cached(cache[0])
+        }
+
     def gather_candidates(self, context: UserContext) -> Candidates:
         candidates: Candidates = []
-        extend = candidates.extend
-        for f in globruntime(context['runtimepath'], 'doc/tags'):
-            with open(f, 'r') as ins:
-                root = str(Path(f).parent)
-                extend(list(map(lambda candidate: {
-                    'word': candidate.split("\t", 1)[0],
-                    'action__path': (
-                        root + sep + candidate.split("\t")[1]
-                    ),
-                    'action__pattern': (
-                        r'\V' + candidate.split("\t")[2].rstrip('\n')[1:]
-                    ),
-                }, ins)))
+        for f in context['__tags']:
+            tagfile = get_tagfile(f)
+            if f not in self._caches or self._caches[f][0] is not tagfile:
+                self._caches[f] = (tagfile, self._get_file_candidates(
+                    tagfile, str(Path(f).parent)))
+            candidates += self._caches[f][1]
+        return candidates
+
+    def _get_file_candidates(self, tagfile: TagFile,
+                             root: str) -> Candidates:
+        candidates = []
+        for line in tagfile.get_lines():
+            elem = line.decode('utf-8', 'replace').split('\t', 3)
+            if len(elem) < 3:
+                continue
+            candidates.append({
+                'word': elem[0],
+                'action__path': root + sep + elem[1],
+                'action__pattern': r'\V' + elem[2][1:],
+            })
         return candidates
 
 
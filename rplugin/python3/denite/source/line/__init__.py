@@ -8,7 +8,7 @@ from pynvim import Nvim
 import typing
 
 from denite.base.source import Base
-from denite.util import abspath, UserContext, Candidates
+from denite.util import abspath, UserContext, Candidates, Candidate
 
 LINE_NUMBER_SYNTAX = (
     'syntax match deniteSource_lineNumber '
@@ -16,6 +16,71 @@ LINE_NUMBER_SYNTAX = (
     'contained containedin=')
 LINE_NUMBER_HIGHLIGHT = 'highlight default link deniteSource_lineNumber LineNR'
 
+# The changed ranges by nvim_buf_attach().  The ranges are 0-based and
+# end-exclusive, and they are merged until get() is called.
+# Note: It is installed once, because the attached callbacks refer the
+# changes.
+LINE_CHANGES_LUA = """
+if _G.denite_line_changes then
+    return
+end
+local changes = {}
+local function on_lines(_, bufnr, _, first, last, new_last)
+    local c = changes[bufnr]
+    if c == nil then
+        return true
+    end
+    if c.start == nil then
+        c.start, c.old_end, c.new_end = first, last, new_last
+    else
+        local delta = c.new_end - c.old_end
+        c.old_end = math.max(c.old_end, last - delta)
+        c.new_end = math.max(c.new_end, last) + new_last - last
+        c.start = math.min(c.start, first)
+    end
+end
+local function on_reload(_, bufnr)
+    if changes[bufnr] ~= nil then
+        changes[bufnr] = {invalid = true}
+    end
+end
+local function on_detach(_, bufnr)
+    changes[bufnr] = nil
+end
+local function attach(bufnr)
+    if changes[bufnr] == nil then
+        local callbacks = {
+            on_lines = on_lines, on_reload = on_reload, on_detach = on_detach}
+        local ok, attached = pcall(
+            vim.api.nvim_buf_attach, bufnr, false, callbacks)
+        if not ok then
+            -- on_reload is not supported in neovim 0.4
+            callbacks.on_reload = nil
+            ok, attached = pcall(
+                vim.api.nvim_buf_attach, bufnr, false, callbacks)
+        end
+        if not ok or not attached then
+            return false
+        end
+    end
+    changes[bufnr] = {}
+    return true
+end
+local function get(bufnr)
+    local c = changes[bufnr]
+    if c == nil or c.invalid then
+        return nil
+    end
+    changes[bufnr] = {}
+    if c.start == nil then
+        return {}
+    end
+    return {c.start, c.old_end, c.new_end,
+            vim.api.nvim_buf_get_lines(bufnr, c.start, c.new_end, false)}
+end
+_G.denite_line_changes = {attach = attach, get = get}
+"""
+
 
 class Source(Base):
 
@@ -26,11 +91,14 @@ class Source(Base):
         self.kind = 'file'
         self.sorters = []
 
-        self._buflines: typing.Dict[int, typing.List[str]] = {}
+        # Note: The caches are shared by the sessions.  They are keyed by
+        # bufnr and validated by b:changedtick.
+        self._caches: typing.Dict[int, typing.Dict[str, typing.Any]] = {}
+        self._is_nvim = bool(self.vim.call('has', 'nvim'))
+        if self._is_nvim:
+            self.vim.exec_lua(LINE_CHANGES_LUA)
 
     def on_init(self, context: UserContext) -> None:
-        self._buflines = {}
-
         context['__linenr'] = self.vim.current.window.cursor[0]
         context['__bufnrs'] = [self.vim.current.buffer.number]
         context['__direction'] = 'all'
@@ -60,7 +128,8 @@ class Source(Base):
 
     def gather_candidates(self, context: UserContext) -> Candidates:
         if context['is_redraw']:
-            self._buflines = {}
+            for bufnr in context['__bufnrs']:
+                self._caches.pop(bufnr, None)
 
         context['is_interactive'] = True
         if not context['input']:
@@ -68,17 +137,11 @@ class Source(Base):
 
         linenr = context['__linenr']
         candidates: Candidates = []
-        for bufnr in context['__bufnrs']:
-            lines = [{
-                'word': x,
-                'abbr': context['__fmt'] % (i + 1, x),
-                'action__path': abspath(self.vim,
-                                        self.vim.current.buffer.name),
-                'action__bufnr': bufnr,
-                'action__col': 0,
-                'action__line': i + 1,
-                'action__text': x,
-            } for [i, x] in enumerate(self._getbufline(bufnr))]
+        ticks = self.vim.call('denite#helper#_get_changedticks',
+                              context['__bufnrs'])
+        for [bufnr, [tick, linecount]] in zip(context['__bufnrs'], ticks):
+            cache = self._get_cache(bufnr, tick, linecount)
+            lines = self._get_candidates(cache, bufnr, context['__fmt'])
             if context['__emptiness'] == 'noempty':
                 lines = list(filter(lambda c: c['word'] != '', lines))
             if context['__direction'] == 'all':
@@ -90,8 +153,90 @@ class Source(Base):
                 candidates += lines[linenr-1:] + lines[:linenr-1]
         return candidates
 
-    def _getbufline(self, bufnr: int) -> typing.List[str]:
-        if bufnr not in self._buflines:
-            self._buflines[bufnr] = self.vim.call(
-                'getbufline', bufnr, 1, '$')
-        return self._buflines[bufnr]
+    def _get_cache(self, bufnr: int, tick: int,
+                   linecount: int) -> typing.Dict[str, typing.Any]:
+        cache = self._caches.get(bufnr, None)
+        if cache and cache['changedtick'] != tick and not self._patch_cache(
+                cache, bufnr):
+            cache = None
+        if cache and linecount >= 0 and len(cache['lines']) != linecount:
+            # The changes are lost.  For example, the buffer is reloaded.
+            cache = None
+
+        if not cache:
+            # Note: It must be attached before getbufline() to track the
+            # changes after it.
+            self._attach(bufnr)
+            cache = {
+                'lines': self.vim.call('getbufline', bufnr, 1, '$'),
+                'path': abspath(self.vim, self.vim.call('bufname', bufnr)),
+                'fmt': '',
+                'candidates': [],
+            }
+            self._caches[bufnr] = cache
+        cache['changedtick'] = tick
+        return cache
+
+    def _patch_cache(self, cache: typing.Dict[str, typing.Any],
+                     bufnr: int) -> bool:
+        changes = self._get_changes(bufnr)
+        if changes is None:
+            return False
+        if not changes:
+            return True
+
+        [start, end, _, lines] = changes
+        cache['lines'][start:end] = lines
+        if not cache['fmt']:
+            return True
+
+        candidates = cache['candidates']
+        new_end = start + len(lines)
+        candidates[start:end] = [
+            self._make_candidate(cache, bufnr, i)
+            for i in range(start, new_end)]
+        if new_end != end:
+            # Renumber the lines after the changes
+            fmt = cache['fmt']
+            candidates[new_end:] = [dict(x, **{
+                'abbr': fmt % (i + 1, x['action__text']),
+                'action__line': i + 1,
+            }) for [i, x] in enumerate(candidates[new_end:], new_end)]
+        return True
+
+    def _get_candidates(self, cache: typing.Dict[str, typing.Any],
+                        bufnr: int, fmt: str) -> Candidates:
+        if cache['fmt'] != fmt:
+            cache['fmt'] = fmt
+            cache['candidates'] = [
+                self._make_candidate(cache, bufnr, i)
+                for i in range(len(cache['lines']))]
+        return list(cache['candidates'])
+
+    def _make_candidate(self, cache: typing.Dict[str, typing.Any],
+                        bufnr: int, index: int) -> Candidate:
+        text = cache['lines'][index]
+        return {
+            'word': text,
+            'abbr': cache['fmt'] % (index + 1, text),
+            'action__path': cache['path'],
+            'action__bufnr': bufnr,
+            'action__col': 0,
+            'action__line': index + 1,
+            'action__text': text,
+        }
+
+    def _attach(self, bufnr: int) -> bool:
+        if self._is_nvim:
+            return bool(self.vim.exec_lua(
+                'return denite_line_changes.attach(...)', bufnr))
+        return bool(self.vim.call(
+            'denite#helper#_attach_line_changes', bufnr))
+
+    def _get_changes(self, bufnr: int) -> typing.Any:
+        """Get [start, end, new_end, lines] of the changed range since the
+        last call.  It returns None if the changes are not tracked."""
+        if self._is_nvim:
+            return self.vim.exec_lua(
+                'return denite_line_changes.get(...)', bufnr)
+        return self.vim.call('denite#helper#_get_line_changes', bufnr)
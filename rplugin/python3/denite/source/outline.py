@@ -4,16 +4,19 @@
 # License: MIT license
 # ============================================================================
 
-from json import loads
+from hashlib import sha1
+from json import dumps, loads
+from os import remove
 from pathlib import Path
 from pynvim import Nvim
-from subprocess import CalledProcessError, check_output, run, PIPE
 import re
 import tempfile
 import typing
 
 from denite.base.source import Base
-from denite.util import parse_tagline, UserContext, Candidates
+from denite.process import Process
+from denite.util import (
+    abspath, parse_tagline, UserContext, Candidates, Candidate)
 
 OUTLINE_HIGHLIGHT_SYNTAX = [
     {'name': 'Type', 'link': 'Statement', 're': r'\[.\{-}\]'},
@@ -35,11 +38,27 @@ class Source(Base):
             'command': ['ctags'],
             'options': [],
             'file_opt': '-o',
+            'file_opt_stdout': False,
             'ignore_types': [],
             'encoding': 'utf-8',
         }
 
+        # Note: The candidates are shared by the sessions.
+        # {path or bufnr: (version, candidates)}
+        self._caches: typing.Dict[
+            typing.Any, typing.Tuple[typing.Any, Candidates]] = {}
+        # The ctags servers of the interactive mode for the json output.
+        # They are keyed by the arguments and None means unavailable.
+        self._servers: typing.Dict[
+            typing.Tuple[str, ...], typing.Optional[Process]] = {}
+        self._busy_servers: typing.Set[typing.Tuple[str, ...]] = set()
+
     def on_init(self, context: UserContext) -> None:
+        context['__proc'] = None
+        context['__server'] = None
+        context['__tempfile'] = ''
+        context['__tagfile'] = ''
+        context['__paths'] = {}
         if len(context['args']) <= 0:
             cur_buffer = self.vim.current.buffer
             context['__path'] = cur_buffer.name
@@ -53,10 +72,10 @@ class Source(Base):
                     context['__language'], None)
                 if ctags_filetype:
                     context['__language'] = ctags_filetype
-        elif self.vars['force_filetype']:
-            context['__path'] = context['args'][0]
+        else:
+            context['__path'] = abspath(self.vim, context['args'][0])
             bufnr = self.vim.funcs.bufnr(context['args'][0])
-            if bufnr > 0:
+            if self.vars['force_filetype'] and bufnr > 0:
                 target_buffer = self.vim.buffers[bufnr]
                 context['__language'] = target_buffer.options['filetype']
                 ctags_filetype = self.vars['language_map'].get(
@@ -77,127 +96,318 @@ class Source(Base):
                 )
             )
 
+    def on_close(self, context: UserContext) -> None:
+        if context['__proc']:
+            context['__proc'].kill()
+            context['__proc'] = None
+        if context['__server']:
+            # The rest of the outputs must not be read by the next request
+            self._stop_server(context['__server'])
+            context['__server'] = None
+        self._remove_tempfile(context)
+
     def gather_candidates(self, context: UserContext) -> Candidates:
-        if self.vars['output'] == 'legacy':
-            return self.gather_candidates_legacy(context)
-        elif self.vars['output'] == 'json':
-            return self.gather_candidates_universal(context)
-        else:
+        if context['__proc']:
+            return self._async_gather_candidates(
+                context, context['async_timeout'])
+        if context['__server']:
+            return self._async_gather_server_candidates(
+                context, context['async_timeout'])
+
+        if self.vars['output'] not in ['legacy', 'json']:
             return []
 
-    def gather_candidates_universal(self, context: UserContext) -> Candidates:
-        args: typing.List[str] = []
-        args += self.vars['command']
-        args += self.vars['options']
-        if self.vars['force_filetype'] and '__language' in context:
-            args.append('--language-force={}'.format(context['__language']))
-        args += ['--output-format=json', '-f', '-']
+        lines: typing.List[str] = []
         if context.get('__nofile', False):
-            tempfile = self.vim.funcs.tempname()
-            with open(tempfile, "w") as f:
-                f.writelines(
-                    map(lambda x: str(x + '\n'),
-                        self.vim.buffers[context['__bufnr']][:]))
-            args += [tempfile]
-        else:
-            args += [context['__path']]
+            lines = self.vim.buffers[context['__bufnr']][:]
+        [cache_id, version] = self._get_cache_version(context, lines)
+        if cache_id in self._caches and self._caches[cache_id][0] == version:
+            return list(self._caches[cache_id][1])
+
+        # Run ctags only if the file is changed
+        context['__cache_id'] = cache_id
+        context['__version'] = version
+        context['__candidates'] = []
+        context['__lines'] = lines
+        context['is_async'] = True
+        if self.vars['output'] == 'json' and self._request_server(context):
+            return self._async_gather_server_candidates(context, 0.5)
+
+        self._start_process(context)
+        return self._async_gather_candidates(context, 0.5)
+
+    def _start_process(self, context: UserContext) -> None:
+        args = self._get_args(context, context['__lines'])
         self.print_message(context, ' '.join(args))
+        context['__proc'] = Process(
+            args, {'encoding': self.vars['encoding']}, context['path'],
+            parser=lambda x: self._parse_line(context, x))
+
+    def _request_server(self, context: UserContext) -> bool:
+        """Send the request to the ctags server.  It returns False if the
+        server is not available."""
+        key = tuple(self._get_json_args(context))
+        if key in self._busy_servers or (
+                key in self._servers and not self._servers[key]):
+            return False
 
+        encoding = self.vars['encoding']
+        server = self._servers.get(key, None)
+        if not server or server.eof():
+            args = list(key) + ['--_interactive']
+            self.print_message(context, ' '.join(args))
+            server = Process(args, {'encoding': encoding}, context['path'],
+                             parser=_parse_json, is_server=True)
+            self._servers[key] = server
+
+        request: typing.Dict[str, typing.Any] = {
+            'command': 'generate-tags',
+            'filename': context['__path'] or '-',
+        }
+        contents = b''
+        if context.get('__nofile', False):
+            # The contents are sent instead of the file
+            contents = ''.join([x + '\n' for x in context['__lines']]).encode(
+                encoding, 'replace')
+            request['size'] = len(contents)
         try:
-            p = run(args, check=True, stdout=PIPE, stderr=PIPE)
-            outputs = p.stdout.decode(self.vars['encoding']).splitlines()
-        except CalledProcessError as e:
-            err_msg = e.stderr.decode(self.vars['encoding']).splitlines()
-            self.error_message(context, err_msg)
-            return []
+            server.write(dumps(request).encode(encoding) + b'\n' + contents)
+        except OSError:
+            self._stop_server(key)
+            return False
+
+        self._busy_servers.add(key)
+        context['__server'] = key
+        return True
+
+    def _stop_server(self, key: typing.Tuple[str, ...]) -> None:
+        server = self._servers.pop(key, None)
+        if server:
+            server.kill()
+        self._busy_servers.discard(key)
 
-        candidates = []
-        for entry in outputs:
-            info = loads(entry)
-
-            candidate = {
-                'word':
-                info['name'],
-                'action__path':
-                info['path']
-                if not context.get('__nofile') else context['__path'],
-            }
-            candidates.append(candidate)
-
-            fmt = '{name:<35.35} '
-            if 'line' in info:
-                candidate['action__line'] = info['line']
-                fmt += '{line:<6}'
-            if 'scope' in info:
-                fmt += '@{scope:<25.25}'
-            else:
-                info['file'] = Path(info['path']).name
-                fmt += '@{file:<25}'
-            if 'kind' in info:
-                info['kind'] = info['kind'][0]
-                fmt += ' [{kind}]'
-            if 'pattern' in info:
-                if 'line' not in info:
-                    candidate['action__pattern'] = info['pattern']
-                info['pattern'] = info['pattern'][2:-2].lstrip(' \t\v')
-                info['pattern'] = '<-> ' + info['pattern']
-                fmt += ' {pattern}'
-            candidate['abbr'] = fmt.format(**info)
+    def _async_gather_server_candidates(self, context: UserContext,
+                                        timeout: float) -> Candidates:
+        key = context['__server']
+        server: typing.Any = self._servers[key]
+        outs, _ = server.communicate(timeout=timeout)
 
+        candidates: Candidates = []
+        is_completed = False
+        for info in outs:
+            if info.get('_type') == 'tag':
+                candidates.append(
+                    self._get_universal_candidate(context, info))
+            elif info.get('_type') == 'error':
+                self.error_message(context, info.get('message', ''))
+                context['__version'] = None
+                is_completed = True
+            elif info.get('_type') == 'completed':
+                is_completed = True
+        context['__candidates'] += candidates
+
+        if is_completed:
+            self._busy_servers.discard(key)
+            context['__server'] = None
+            self._finish_gather(context)
+        elif server.eof():
+            # The interactive mode is not supported.  Use the process.
+            self._stop_server(key)
+            self._servers[key] = None
+            context['__server'] = None
+            context['__candidates'] = []
+            self._start_process(context)
+            return self._async_gather_candidates(context, timeout)
         return candidates
 
-    def gather_candidates_legacy(self, context: UserContext) -> Candidates:
-        with tempfile.NamedTemporaryFile(
-            mode='w', encoding=self.vars['encoding']
-        ) as tf:
-            args: typing.List[str] = []
-            args += self.vars['command']
-            args += self.vars['options']
-            args += [self.vars['file_opt'], tf.name]
-            args += [context['__path']]
-            self.print_message(context, ' '.join(args))
-            # Close this file before giving to ctags
+    def _async_gather_candidates(self, context: UserContext,
+                                 timeout: float) -> Candidates:
+        outs, errs = context['__proc'].communicate(timeout=timeout)
+        if errs:
+            self.error_message(context, errs)
+        candidates: Candidates = outs
+        context['__candidates'] += candidates
+
+        if context['__proc'].eof():
+            context['__proc'] = None
+            if context['__tagfile'] and not errs:
+                tags = self._read_tagfile(context)
+                context['__candidates'] += tags
+                candidates += tags
+            self._remove_tempfile(context)
+            if errs:
+                context['__version'] = None
+            self._finish_gather(context)
+        return candidates
+
+    def _finish_gather(self, context: UserContext) -> None:
+        context['is_async'] = False
+        if context['__version'] is not None:
+            self._caches[context['__cache_id']] = (
+                context['__version'], context['__candidates'])
+
+    def _get_cache_version(self, context: UserContext,
+                           lines: typing.List[str]) -> typing.Tuple[
+                               typing.Any, typing.Any]:
+        """Get the cache id and the version of the outline.  The version is
+        (path, mtime, size) or the content hash of the nofile buffer."""
+        options = (repr(self.vars), context.get('__language', ''))
+        if context.get('__nofile', False):
+            digest = sha1('\n'.join(lines).encode(
+                'utf-8', 'surrogateescape')).hexdigest()
+            return (context['__bufnr'], (options, digest))
+
+        try:
+            st = Path(context['__path']).stat()
+        except OSError:
+            return (context['__path'], None)
+        return (context['__path'],
+                (options, st.st_mtime, st.st_size))
+
+    def _get_args(self, context: UserContext,
+                  lines: typing.List[str]) -> typing.List[str]:
+        path = context['__path']
+        if context.get('__nofile', False):
+            with tempfile.NamedTemporaryFile(
+                mode='w', encoding=self.vars['encoding'],
+                errors='replace', delete=False
+            ) as tf:
+                tf.writelines([x + '\n' for x in lines])
+            context['__tempfile'] = tf.name
+            path = tf.name
+
+        if self.vars['output'] == 'json':
+            return self._get_json_args(context) + ['-f', '-', path]
+
+        args: typing.List[str] = []
+        args += self.vars['command']
+        args += self.vars['options']
+        if self.vars['file_opt_stdout']:
+            args += [self.vars['file_opt'], '-']
+        else:
+            # Close the tags file before giving to ctags.
             # Otherwise this will error on Windows
-            tf.close()
+            with tempfile.NamedTemporaryFile(delete=False) as tagfile:
+                pass
+            context['__tagfile'] = tagfile.name
+            args += [self.vars['file_opt'], tagfile.name]
+        args += [path]
+        return args
 
-            try:
-                check_output(args).decode(self.vars['encoding'], 'replace')
-            except CalledProcessError:
-                return []
-
-            ignore_types = self.vars['ignore_types']
-
-            candidates = []
-            with open(tf.name, encoding=self.vars['encoding'],
-                      errors='replace') as f:
-                for line in f:
-                    if re.match('!', line) or not line:
-                        continue
-                    info = parse_tagline(line.rstrip(), tf.name)
-                    if info['type'] in ignore_types:
-                        continue
-                    candidate = {
-                        'word': info['name'],
-                        'action__path': info['file']
-                    }
-
-                    info['name'] = (
-                        (info['name'][:33] + '..')
-                        if len(info['name']) >= 33
-                        else info['name']
-                    )
-                    info['file'] = Path(info['file']).name
-                    fmt = '{name:<35} @{file:<25}'
-                    if info['line']:
-                        candidate['action__line'] = info['line']
-                        fmt += ':{line} [{type}] {ref}'
-                    else:
-                        candidate['action__pattern'] = info['pattern']
-                        m = re.search(r'\^\S*(.*)\$', info['pattern'])
-                        if m:
-                            info['pattern'] = '<-> ' + m.group(1).lstrip()
-                        fmt += ' [{type}] {pattern}'
-                    candidate['abbr'] = fmt.format(**info)
+    def _get_json_args(self, context: UserContext) -> typing.List[str]:
+        args: typing.List[str] = []
+        args += self.vars['command']
+        args += self.vars['options']
+        if self.vars['force_filetype'] and '__language' in context:
+            args.append('--language-force={}'.format(context['__language']))
+        args += ['--output-format=json']
+        return args
 
+    def _read_tagfile(self, context: UserContext) -> Candidates:
+        candidates: Candidates = []
+        with open(context['__tagfile'], encoding=self.vars['encoding'],
+                  errors='replace') as f:
+            for line in f:
+                candidate = self._parse_legacy(context, line)
+                if candidate:
                     candidates.append(candidate)
         return candidates
+
+    def _remove_tempfile(self, context: UserContext) -> None:
+        for key in ['__tempfile', '__tagfile']:
+            if not context[key]:
+                continue
+            try:
+                remove(context[key])
+            except OSError:
+                pass
+            context[key] = ''
+
+    def _parse_line(self, context: UserContext,
+                    line: str) -> typing.Optional[Candidate]:
+        """Note: It is called in the reader thread, so it must not use vim.
+        """
+        if not line or context['__tagfile']:
+            # The tags are written to the tags file
+            return None
+        if self.vars['output'] == 'json':
+            info = _parse_json(line)
+            if not info or info.get('_type', 'tag') != 'tag':
+                return None
+            return self._get_universal_candidate(context, info)
+        return self._parse_legacy(context, line)
+
+    def _get_universal_candidate(self, context: UserContext,
+                                 info: typing.Dict[str, typing.Any]
+                                 ) -> Candidate:
+        candidate = {
+            'word':
+            info['name'],
+            'action__path':
+            info['path']
+            if not context.get('__nofile') else context['__path'],
+        }
+
+        fmt = '{name:<35.35} '
+        if 'line' in info:
+            candidate['action__line'] = info['line']
+            fmt += '{line:<6}'
+        if 'scope' in info:
+            fmt += '@{scope:<25.25}'
+        else:
+            info['file'] = Path(info['path']).name
+            fmt += '@{file:<25}'
+        if 'kind' in info:
+            info['kind'] = info['kind'][0]
+            fmt += ' [{kind}]'
+        if 'pattern' in info:
+            if 'line' not in info:
+                candidate['action__pattern'] = info['pattern']
+            info['pattern'] = info['pattern'][2:-2].lstrip(' \t\v')
+            info['pattern'] = '<-> ' + info['pattern']
+            fmt += ' {pattern}'
+        candidate['abbr'] = fmt.format(**info)
+        return candidate
+
+    def _parse_legacy(self, context: UserContext,
+                      line: str) -> typing.Optional[Candidate]:
+        if re.match('!', line) or not line.rstrip():
+            return None
+        # The relative paths are resolved from the tags file.  The tags of
+        # the stdout are relative to the current path of ctags.
+        tagpath = (context['__tagfile'] or
+                   str(Path(context['path']).joinpath('tags')))
+        info = parse_tagline(line.rstrip(), tagpath, context['__paths'])
+        if info['type'] in self.vars['ignore_types']:
+            return None
+        candidate = {
+            'word': info['name'],
+            'action__path': (info['file'] if not context.get('__nofile')
+                             else context['__path']),
+        }
+
+        info['name'] = (
+            (info['name'][:33] + '..')
+            if len(info['name']) >= 33
+            else info['name']
+        )
+        info['file'] = Path(info['file']).name
+        fmt = '{name:<35} @{file:<25}'
+        if info['line']:
+            candidate['action__line'] = info['line']
+            fmt += ':{line} [{type}] {ref}'
+        else:
+            candidate['action__pattern'] = info['pattern']
+            m = re.search(r'\^\S*(.*)\$', info['pattern'])
+            if m:
+                info['pattern'] = '<-> ' + m.group(1).lstrip()
+            fmt += ' [{type}] {pattern}'
+        candidate['abbr'] = fmt.format(**info)
+        return candidate
+
+
+def _parse_json(line: str) -> typing.Any:
+    try:
+        return loads(line)
+    except ValueError:
+        return None
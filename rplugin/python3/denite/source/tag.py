@@ -10,7 +10,10 @@ from pathlib import Path
 from pynvim import Nvim
 
 from denite.base.source import Base
-from denite.util import parse_tagline, UserContext, Candidates, Candidate
+from denite.tags import (
+    get_tagfile, is_cached, acquire_tagfiles, release_tagfiles, TagFile)
+from denite.util import (
+    parse_tagline, split_input, UserContext, Candidates, Candidate)
 
 TAG_HIGHLIGHT_SYNTAX = [
     {'name': 'Type', 'link': 'Statement', 're': r'\[.\{-}\]'},
@@ -26,9 +29,29 @@ class Source(Base):
         self.vim = vim
         self.name = 'tag'
         self.kind = 'file'
+        self.vars = {
+            'lazy': False,
+        }
+
+        # Note: The candidates are shared by the sessions.  They are
+        # validated by the identity of TagFile.
+        self._caches: typing.Dict[
+            str, typing.Tuple[TagFile, Candidates]] = {}
 
     def on_init(self, context: UserContext) -> None:
         self._tags = self._get_tagfiles(context)
+        context['__paths'] = {}
+        context['__tags'] = self._tags
+        acquire_tagfiles(self._tags)
+
+    def on_close(self, context: UserContext) -> None:
+        release_tagfiles(context.get('__tags', []))
+        context['__tags'] = []
+        # Remove the candidates of the evicted files
+        self._caches = {
+            path: cache for [path, cache] in self._caches.items()
+            if is_cached(cache[0])
+        }
 
     def highlight(self) -> None:
         for syn in TAG_HIGHLIGHT_SYNTAX:
@@ -44,23 +67,65 @@ class Source(Base):
             )
 
     def gather_candidates(self, context: UserContext) -> Candidates:
+        if self.vars['lazy']:
+            return self._gather_lazy_candidates(context)
+
         candidates = []
         for filename in self._tags:
-            with open(filename, 'r',
-                      encoding=context['encoding'],
-                      errors='replace') as ins:
-                for line in ins:
-                    candidate = self._get_candidate(filename, line)
-                    if candidate:
-                        candidates.append(candidate)
+            candidates += self._get_file_candidates(context, filename)
 
         return sorted(candidates, key=lambda value: str(value['word']))
 
-    def _get_candidate(self, filename: str, line: str) -> Candidate:
+    def _gather_lazy_candidates(self, context: UserContext) -> Candidates:
+        """Search the tags which start with the first word of the input in
+        the sorted tags files.  The unsorted tags files are read entirely."""
+        context['is_interactive'] = True
+        prefix = split_input(context['input'])[0]
+        if not prefix or prefix.startswith('!'):
+            return []
+
+        encoding = context['encoding']
+        candidates = []
+        for filename in self._tags:
+            tagfile = get_tagfile(filename)
+            if not tagfile.sorted:
+                candidates += self._get_file_candidates(context, filename)
+                continue
+
+            paths = context['__paths'].setdefault(filename, {})
+            for line in tagfile.search(
+                    prefix.encode(encoding, 'replace'),
+                    context['ignorecase']):
+                candidate = self._get_candidate(
+                    filename, line.decode(encoding, 'replace'), paths)
+                if candidate:
+                    candidates.append(candidate)
+
+        return sorted(candidates, key=lambda value: str(value['word']))
+
+    def _get_file_candidates(self, context: UserContext,
+                             filename: str) -> Candidates:
+        tagfile = get_tagfile(filename)
+        if filename in self._caches and self._caches[filename][0] is tagfile:
+            return list(self._caches[filename][1])
+
+        encoding = context['encoding']
+        candidates = []
+        paths = context['__paths'].setdefault(filename, {})
+        for line in tagfile.get_lines():
+            candidate = self._get_candidate(
+                filename, line.decode(encoding, 'replace'), paths)
+            if candidate:
+                candidates.append(candidate)
+        self._caches[filename] = (tagfile, candidates)
+        return list(candidates)
+
+    def _get_candidate(self, filename: str, line: str,
+                       paths: typing.Dict[str, str]) -> Candidate:
         if re.match('!', line) or not line:
             return {}
 
-        info = parse_tagline(line.rstrip(), filename)
+        info = parse_tagline(line.rstrip(), filename, paths)
         candidate = {
             'word': info['name'],
             'action__path': info['file']
@@ -0,0 +1,183 @@
+# ============================================================================
+# FILE: tags.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+from contextlib import contextmanager
+from os import fstat, stat
+import mmap
+import typing
+
+# The case variants are searched for the first characters of the prefix
+# in the case sensitive sorted tags file
+MAX_CASE_VARIANT_LENGTH = 4
+
+# path: ((mtime, size), TagFile)
+_tagfiles: typing.Dict[str, typing.Tuple[typing.Any, 'TagFile']] = {}
+# path: the number of the sessions which use the file
+_users: typing.Dict[str, int] = {}
+
+
+def get_tagfile(path: str) -> 'TagFile':
+    """Get the TagFile of {path}.  It is cached by the path, the mtime and
+    the size of the file, so the callers can cache the results by the
+    identity of the TagFile."""
+    key = _get_key(path)
+    if path not in _tagfiles or _tagfiles[path][0] != key:
+        _tagfiles[path] = (key, TagFile(path))
+    return _tagfiles[path][1]
+
+
+def is_cached(tagfile: 'TagFile') -> bool:
+    """Whether {tagfile} is not evicted from the cache"""
+    return (tagfile.path in _tagfiles and
+            _tagfiles[tagfile.path][1] is tagfile)
+
+
+def acquire_tagfiles(paths: typing.List[str]) -> None:
+    """Use the TagFiles of {paths} in the session.  They are released by
+    release_tagfiles() when the session is closed."""
+    for path in paths:
+        _users[path] = _users.get(path, 0) + 1
+
+
+def release_tagfiles(paths: typing.List[str]) -> None:
+    """Release the TagFiles of {paths}.  The files which are not used by
+    the sessions or are changed are evicted from the cache."""
+    for path in paths:
+        if _users.get(path, 0) > 1:
+            _users[path] -= 1
+        else:
+            _users.pop(path, None)
+
+    for [path, [key, _]] in list(_tagfiles.items()):
+        if path not in _users or _get_key(path) != key:
+            _tagfiles.pop(path)
+
+
+def _get_key(path: str) -> typing.Any:
+    try:
+        st = stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
+
+
+class TagFile(object):
+    """The memory mapped tags file
+
+    If the file is sorted("!_TAG_FILE_SORTED"), the lines which start with
+    the prefix are searched by the binary search.
+    Note: The file is mapped only while it is read, because the mapped file
+    cannot be replaced in Windows.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.sorted = 0
+        self._start = 0
+        self._size = 0
+        with self._open() as mm:
+            if mm:
+                self._parse_header(mm)
+
+    def get_lines(self) -> typing.Iterator[bytes]:
+        """Get the lines except the header.  They are read lazily from the
+        mapped file."""
+        with self._open() as mm:
+            if not mm:
+                return
+            mm.seek(self._start)
+            for line in iter(mm.readline, b''):
+                yield line.rstrip(b'\r\n')
+
+    def search(self, prefix: bytes,
+               ignorecase: bool) -> typing.Iterator[bytes]:
+        """Get the lines of the tags which start with {prefix}.
+        Note: The file must be sorted."""
+        if not self.sorted:
+            return
+
+        is_foldcase = self.sorted == 2
+        if is_foldcase:
+            keys = [prefix.upper()]
+        elif ignorecase:
+            keys = _get_case_variants(prefix[:MAX_CASE_VARIANT_LENGTH])
+        else:
+            keys = [prefix]
+        target = prefix.lower() if ignorecase else prefix
+
+        with self._open() as mm:
+            if not mm:
+                return
+            for key in keys:
+                pos = self._bisect(mm, key, is_foldcase)
+                while pos < self._size:
+                    end = self._get_line_end(mm, pos)
+                    line = mm[pos:end]
+                    name = line.split(b'\t', 1)[0]
+                    folded = name.upper() if is_foldcase else name
+                    if not folded.startswith(key):
+                        break
+                    if ignorecase:
+                        name = name.lower()
+                    if name.startswith(target):
+                        yield line
+                    pos = end + 1
+
+    @contextmanager
+    def _open(self) -> typing.Iterator[typing.Any]:
+        with open(self.path, 'rb') as f:
+            if fstat(f.fileno()).st_size == 0:
+                # The empty file cannot be mapped
+                yield None
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self._size = len(mm)
+                yield mm
+
+    def _parse_header(self, mm: typing.Any) -> None:
+        pos = 0
+        while mm[pos:pos + 2] == b'!_':
+            end = self._get_line_end(mm, pos)
+            line = mm[pos:end]
+            if line.startswith(b'!_TAG_FILE_SORTED\t'):
+                value = line.split(b'\t')[1]
+                self.sorted = int(value) if value.isdigit() else 0
+            pos = end + 1
+        self._start = min(pos, self._size)
+
+    def _bisect(self, mm: typing.Any, key: bytes, is_foldcase: bool) -> int:
+        """Get the first line position whose name is not less than {key}"""
+        [low, high] = [self._start, self._size]
+        while low < high:
+            pos = self._get_line_start(mm, (low + high) // 2)
+            if pos >= high:
+                pos = low
+            end = self._get_line_end(mm, pos)
+            name = mm[pos:end].split(b'\t', 1)[0]
+            if (name.upper() if is_foldcase else name) < key:
+                low = end + 1
+            else:
+                high = pos
+        return min(low, self._size)
+
+    def _get_line_start(self, mm: typing.Any, pos: int) -> int:
+        """Get the first line position from {pos}"""
+        if pos <= self._start:
+            return self._start
+        newline = mm.find(b'\n', pos - 1)
+        return int(newline + 1 if newline >= 0 else self._size)
+
+    def _get_line_end(self, mm: typing.Any, pos: int) -> int:
+        newline = mm.find(b'\n', pos)
+        return int(newline if newline >= 0 else self._size)
+
+
+def _get_case_variants(text: bytes) -> typing.List[bytes]:
+    variants = [b'']
+    for char in [text[i:i + 1] for i in range(len(text))]:
+        cases = sorted({char.lower(), char.upper()})
+        variants = [x + y for x in variants for y in cases]
+    return variants
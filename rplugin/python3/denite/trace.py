@@ -0,0 +1,87 @@
+# ============================================================================
+# FILE: trace.py
+# AUTHOR: Shougo Matsushita <Shougo.Matsu at gmail.com>
+# License: MIT license
+# ============================================================================
+
+from contextlib import contextmanager
+from json import dump
+from os import getpid
+from threading import get_ident
+from time import perf_counter
+import typing
+
+Event = typing.Dict[str, typing.Any]
+
+
+class Trace(object):
+    """The wall times of the startup phases
+
+    The trace is saved in the Trace Event Format of Chrome, so it can be
+    viewed by "chrome://tracing" or Perfetto.  The times are microseconds
+    from {start}.
+    """
+
+    def __init__(self, path: str, start: float) -> None:
+        self.path = path
+        self._start = start
+        self._events: typing.List[Event] = []
+
+    def add(self, name: str, start: float,
+            args: typing.Dict[str, typing.Any]) -> None:
+        self._events.append({
+            'name': name,
+            'ph': 'X',
+            'ts': round((start - self._start) * 1000000),
+            'dur': round((perf_counter() - start) * 1000000),
+            'pid': getpid(),
+            'tid': get_ident(),
+            'args': args,
+        })
+
+    def save(self) -> None:
+        try:
+            with open(self.path, 'w') as f:
+                dump({
+                    'traceEvents': sorted(
+                        self._events, key=lambda x: int(x['ts'])),
+                    'displayTimeUnit': 'ms',
+                }, f, indent=1)
+        except OSError:
+            pass
+
+
+_trace: typing.Optional[Trace] = None
+
+
+def start_trace(path: str, start: float) -> None:
+    """Start the trace from {start}(the time by perf_counter()).  It is
+    saved to {path} by stop_trace()."""
+    global _trace
+    _trace = Trace(path, start)
+
+
+def stop_trace() -> None:
+    global _trace
+    if _trace:
+        _trace.save()
+    _trace = None
+
+
+def add_phase(name: str, start: float, **args: typing.Any) -> None:
+    """Record the phase {name} from {start} to now"""
+    if _trace:
+        _trace.add(name, start, args)
+
+
+@contextmanager
+def phase(name: str, **args: typing.Any) -> typing.Iterator[None]:
+    """Record the phase {name} in the block if the trace is started"""
+    if not _trace:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(name, start, **args)
@@ -8,9 +8,14 @@ from pynvim import Nvim
 import re
 import typing
 
-from denite.util import echo, error, clearmatch, regex_convert_py_vim
+from denite.util import (
+    echo, error, clearmatch, regex_convert_py_vim, get_diff_range)
 from denite.util import UserContext, Candidates, Candidate
-from denite.parent import SyncParent
+from denite.parent import SyncParent, ASyncParent
+from denite.trace import phase
+
+# The rendered rows around the window in "viewport" mode
+VIEWPORT_PADDING = 100
 
 
 class Default(object):
@@ -20,11 +25,14 @@ class Default(object):
 
     def __init__(self, vim: Nvim) -> None:
         self._vim = vim
-        self._denite: typing.Optional[SyncParent] = None
+        self._denite: typing.Optional[
+            typing.Union[SyncParent, ASyncParent]] = None
         self._selected_candidates: typing.List[int] = []
         self._candidates: Candidates = []
+        self._candidates_len = 0
         self._cursor = 0
         self._entire_len = 0
+        self._matched_len = 0
         self._result: typing.List[typing.Any] = []
         self._context: UserContext = {}
         self._bufnr = -1
@@ -36,8 +44,13 @@ class Default(object):
         self._winminheight = -1
         self._is_multi = False
         self._is_async = False
+        self._is_paused = False
         self._matched_pattern = ''
         self._displayed_texts: typing.List[str] = []
+        self._offset = 0
+        self._buffer_offset = 0
+        self._buffer_texts: typing.Optional[typing.List[str]] = None
+        self._buffer_words: typing.Optional[typing.List[str]] = None
         self._statusline_sources = ''
         self._titlestring = ''
         self._ruler = False
@@ -58,10 +71,9 @@ class Default(object):
     def start(self, sources: typing.List[typing.Any],
               context: UserContext) -> typing.List[typing.Any]:
         if not self._denite:
-            # if hasattr(self._vim, 'run_coroutine'):
-            #     self._denite = ASyncParent(self._vim)
-            # else:
-            self._denite = SyncParent(self._vim)
+            self._denite = (ASyncParent(self._vim)
+                            if context['child_process']
+                            else SyncParent(self._vim))
 
         self._result = []
         context['sources_queue'] = [sources]
@@ -229,20 +241,25 @@ class Default(object):
                 error(self._vim, 'Empty sources')
                 return
 
-            self._init_denite()
-            self._gather_candidates()
-            self._update_candidates()
+            with phase('init'):
+                self._init_denite()
+            with phase('gather_candidates'):
+                self._gather_candidates()
+            with phase('filter_candidates'):
+                self._update_candidates()
 
             self._init_cursor()
             self._check_move_option()
             if self._check_do_option():
                 return
 
-            self._init_buffer()
+            with phase('init_buffer'):
+                self._init_buffer()
 
-        self._update_displayed_texts()
-        self._update_buffer()
-        self._move_to_pos(self._cursor)
+        with phase('render'):
+            self._update_displayed_texts()
+            self._update_buffer()
+            self._move_to_pos(self._cursor)
 
         if self._context['quick_move'] and do_map(self, 'quick_move', []):
             return
@@ -264,6 +281,10 @@ class Default(object):
 
         self._switch_buffer()
         self._bufnr = self._vim.current.buffer.number
+        self._buffer_texts = None
+        self._buffer_words = None
+        self._offset = 0
+        self._buffer_offset = 0
         self._winid = self._vim.call('win_getid')
 
         self._resize_buffer(True)
@@ -276,6 +297,7 @@ class Default(object):
             'buffer_name': self._context['buffer_name'],
         }
         self._bufvars['denite_statusline'] = {}
+        self._update_paused()
 
         self._vim.vars['denite#_previewed_buffers'] = {}
         self._vim.vars['denite#_previewing_bufnr'] = -1
@@ -350,6 +372,17 @@ class Default(object):
             self._vim.command('autocmd denite '
                               'CursorMoved <buffer> '
                               'call denite#call_map("auto_action")')
+        if self._context['viewport']:
+            self._vim.command('autocmd denite '
+                              'CursorMoved <buffer> '
+                              'call denite#helper#_check_viewport()')
+        if self._context['match_highlight']:
+            self._vim.command('autocmd denite '
+                              'CursorMoved <buffer> '
+                              'call denite#helper#_check_match_highlight()')
+        self._vim.command('autocmd denite '
+                          'CursorMoved <buffer> '
+                          'call denite#helper#_check_scrolled_to_end()')
 
         self._init_syntax()
 
@@ -459,16 +492,32 @@ class Default(object):
                                self._context['selected_icon']))
 
         if self._denite:
-            self._denite.init_syntax(self._context, self._is_multi)
+            with phase('init_syntax'):
+                self._denite.init_syntax(self._context, self._is_multi)
 
     def _update_candidates(self) -> bool:
         if not self._denite:
             return False
 
+        if self._is_async or self._is_paused:
+            # The async sources may read more outputs if it is true.
+            # Note: The displayed candidates are truncated by
+            # max_candidates.
+            self._context['is_scrolled_to_end'] = (
+                self._get_cursor_pos() + max(self._winheight, 1) >=
+                self._matched_len)
+        result = self._denite.filter_candidates(self._context)
+        if not result:
+            # Canceled by the newer input
+            return False
         [self._is_async, pattern, statuses, self._entire_len,
-         self._candidates] = self._denite.filter_candidates(self._context)
+         self._matched_len, self._candidates] = result
+        self._is_paused = self._denite.is_paused()
+        self._update_paused()
 
         prev_displayed_texts = self._displayed_texts
+        prev_candidates_len = self._candidates_len
+        self._candidates_len = len(self._candidates)
         self._update_displayed_texts()
 
         prev_matched_pattern = self._matched_pattern
@@ -481,6 +530,7 @@ class Default(object):
             self._start_timer('update_candidates')
 
         updated = (self._displayed_texts != prev_displayed_texts or
+                   self._candidates_len != prev_candidates_len or
                    self._matched_pattern != prev_matched_pattern or
                    self._statusline_sources != prev_statusline_sources)
         if updated:
@@ -491,6 +541,13 @@ class Default(object):
             self._vim.call('setreg', '/', self._context['input'])
         return self._updated
 
+    def _update_paused(self) -> None:
+        # The paused sources are resumed by the scroll to the end.
+        # Note: They are not resumed if the candidates are truncated.
+        self._vim.call('setbufvar', self._bufnr, 'denite_paused',
+                       self._is_paused and
+                       self._matched_len <= len(self._candidates))
+
     def _update_displayed_texts(self) -> None:
         candidates_len = len(self._candidates)
         if not self._is_async and self._context['auto_resize']:
@@ -506,58 +563,73 @@ class Default(object):
 
         max_source_name_len = 0
         if self._candidates:
+            # Note: The viewport does not check all candidates.
+            source_names = ([x['name'] for x in self._context['sources']]
+                            if self._context['viewport']
+                            else [x['source_name'] for x in self._candidates])
             max_source_name_len = max([
-                len(self._get_display_source_name(x['source_name']))
-                for x in self._candidates])
+                len(self._get_display_source_name(x))
+                for x in set(source_names)])
         self._context['max_source_name_len'] = max_source_name_len
         self._context['max_source_name_format'] = (
             '{:<' + str(self._context['max_source_name_len']) + '}')
+        [self._offset, end] = self._get_viewport()
         self._displayed_texts = [
             self._get_candidate_display_text(i)
-            for i in range(0, candidates_len)
+            for i in range(self._offset, end)
         ]
 
+    def _get_viewport(self) -> typing.Tuple[int, int]:
+        """Get the range of the rendered candidates
+
+        The range is kept while it contains the cursor, so the updates do
+        not move the rows under the cursor.
+        """
+        candidates_len = len(self._candidates)
+        if not self._context['viewport']:
+            return (0, candidates_len)
+
+        size = max(self._winheight, 1) + VIEWPORT_PADDING * 2
+        start = self._offset
+        if not (start < self._cursor <= start + size):
+            start = self._cursor - 1 - VIEWPORT_PADDING
+        start = max(min(start, candidates_len - size), 0)
+        return (start, min(start + size, candidates_len))
+
+    def _get_cursor_pos(self) -> int:
+        """Get the cursor position in the candidates"""
+        if self._vim.current.buffer.number != self._bufnr:
+            # The cursor is in the other buffer
+            return self._cursor
+        return int(self._vim.call('line', '.')) + self._buffer_offset
+
+    def _update_viewport(self) -> None:
+        """Render the rows around the cursor"""
+        self._offset = self._cursor - 1 - VIEWPORT_PADDING
+        self._update_displayed_texts()
+        self._update_buffer_texts()
+        self._update_status()
+        if self._check_matchdelete and self._context['match_highlight']:
+            self._update_match_highlight()
+
     def _update_buffer(self) -> None:
         is_current_buffer = self._bufnr == self._vim.current.buffer.number
 
         self._update_status()
 
-        if self._check_matchdelete and self._context['match_highlight']:
-            matches = [x['id'] for x in
-                       self._vim.call('getmatches', self._winid)]
-            if self._matched_range_id in matches:
-                self._vim.call('matchdelete',
-                               self._matched_range_id, self._winid)
-                self._matched_range_id = -1
-            if self._matched_char_id in matches:
-                self._vim.call('matchdelete',
-                               self._matched_char_id, self._winid)
-                self._matched_char_id = -1
-
-            if self._matched_pattern != '':
-                self._matched_range_id = self._vim.call(
-                    'matchadd', 'deniteMatchedRange',
-                    r'\c' + regex_convert_py_vim(self._matched_pattern),
-                    10, -1, {'window': self._winid})
-                matched_char_pattern = '[{}]'.format(re.sub(
-                    r'([\[\]\\^-])',
-                    r'\\\1',
-                    self._context['input'].replace(' ', '')
-                ))
-                self._matched_char_id = self._vim.call(
-                    'matchadd', 'deniteMatchedChar',
-                    matched_char_pattern,
-                    10, -1, {'window': self._winid})
-
-        prev_linenr = self._vim.call('line', '.')
+        prev_pos = self._get_cursor_pos()
         prev_candidate = self._get_cursor_candidate()
 
-        buffer = self._vim.buffers[self._bufnr]
-        buffer.options['modifiable'] = True
-        self._vim.vars['denite#_candidates'] = [
-            x['word'] for x in self._candidates]
-        buffer[:] = self._displayed_texts
-        buffer.options['modifiable'] = False
+        if (self._context['viewport'] and is_current_buffer and
+                self._buffer_texts is not None):
+            # Render around the current cursor.
+            # Note: The new buffer is rendered around _init_cursor().
+            self._cursor = prev_pos
+            if self._get_viewport() != (
+                    self._offset,
+                    self._offset + len(self._displayed_texts)):
+                self._update_displayed_texts()
+        self._update_buffer_texts()
 
         is_changed = self._previous_text != self._context['input']
 
@@ -574,15 +646,123 @@ class Default(object):
             if not is_current_buffer:
                 self._vim.call('win_gotoid', save_winid)
         elif is_current_buffer:
-            self._vim.call('cursor', [prev_linenr, 0])
+            self._vim.call('cursor', [prev_pos - self._buffer_offset, 0])
 
         if is_current_buffer:
             if (self._context['auto_action'] and
                     prev_candidate != self._get_cursor_candidate()):
                 self.do_action(self._context['auto_action'])
 
+        if self._check_matchdelete and self._context['match_highlight']:
+            self._update_match_highlight()
+
         self._updated = False
 
+    def _update_match_highlight(self) -> None:
+        """Highlight the matched positions of the rows around the cursor
+
+        If the matchers do not support the positions, the matched pattern
+        is highlighted by the regexp instead.
+        """
+        height = max(self._winheight, 1)
+        line = self._get_cursor_pos() - self._buffer_offset
+        start = max(line - 1 - height * 2, 0)
+        end = min(line + height * 2, len(self._displayed_texts))
+        positions = self._denite.get_match_positions(
+            self._context, self._candidates[
+                self._buffer_offset + start:self._buffer_offset + end]
+        ) if self._denite and self._context['input'] else []
+
+        self._clear_match_pattern()
+        if None in positions:
+            self._vim.call('denite#helper#_highlight_matches',
+                           self._bufnr, self._winid, [], [])
+            self._add_match_pattern()
+            return
+
+        encoding = self._context['encoding']
+        ranges = []
+        for [i, candidate_positions] in enumerate(positions, start):
+            text = self._displayed_texts[i]
+            prefix_len = len(self._get_candidate_display_prefix(
+                self._buffer_offset + i))
+            for [match_start, match_end] in candidate_positions:
+                match_start = min(prefix_len + match_start, len(text))
+                match_end = min(prefix_len + match_end, len(text))
+                if match_start == match_end:
+                    continue
+                ranges.append([
+                    i + 1,
+                    len(text[:match_start].encode(
+                        encoding, errors='replace')) + 1,
+                    len(text[match_start:match_end].encode(
+                        encoding, errors='replace')),
+                ])
+        self._vim.call('denite#helper#_highlight_matches',
+                       self._bufnr, self._winid, ranges, [start + 1, end])
+
+    def _add_match_pattern(self) -> None:
+        if self._matched_pattern == '':
+            return
+        self._matched_range_id = self._vim.call(
+            'matchadd', 'deniteMatchedRange',
+            r'\c' + regex_convert_py_vim(self._matched_pattern),
+            10, -1, {'window': self._winid})
+        matched_char_pattern = '[{}]'.format(re.sub(
+            r'([\[\]\\^-])',
+            r'\\\1',
+            self._context['input'].replace(' ', '')
+        ))
+        self._matched_char_id = self._vim.call(
+            'matchadd', 'deniteMatchedChar',
+            matched_char_pattern,
+            10, -1, {'window': self._winid})
+
+    def _clear_match_pattern(self) -> None:
+        matches = [x['id'] for x in
+                   self._vim.call('getmatches', self._winid)]
+        if self._matched_range_id in matches:
+            self._vim.call('matchdelete',
+                           self._matched_range_id, self._winid)
+            self._matched_range_id = -1
+        if self._matched_char_id in matches:
+            self._vim.call('matchdelete',
+                           self._matched_char_id, self._winid)
+            self._matched_char_id = -1
+
+    def _update_buffer_texts(self) -> None:
+        """Update only the changed lines and words
+
+        The appended candidates of the async sources cost only the new
+        lines.
+        """
+        texts = self._displayed_texts
+        words = [x['word'] for x in
+                 self._candidates[self._offset:self._offset + len(texts)]]
+        if words != self._buffer_words:
+            if self._buffer_words is None or not self._vim.call(
+                    'denite#helper#_update_candidates', self._bufnr,
+                    len(self._buffer_words),
+                    *get_diff_range(self._buffer_words, words)):
+                self._vim.call('denite#helper#_set_candidates',
+                               self._bufnr, words)
+            self._buffer_words = words
+
+        self._buffer_offset = self._offset
+        if texts == self._buffer_texts:
+            return
+
+        buffer = self._vim.buffers[self._bufnr]
+        buffer.options['modifiable'] = True
+        if not self._buffer_texts or not texts:
+            # Note: The empty buffer has one empty line.
+            buffer[:] = texts
+        else:
+            [start, end, lines] = get_diff_range(self._buffer_texts, texts)
+            buffer[start:end] = lines
+        buffer.options['modifiable'] = False
+        self._buffer_texts = list(texts)
+
     def _update_status(self) -> None:
         inpt = ''
         if self._context['input']:
@@ -598,6 +778,7 @@ class Default(object):
             # Extra
             'buffer_name': self._context['buffer_name'],
             'line_total': len(self._candidates),
+            'line_offset': self._buffer_offset,
         }
         if status == self._prev_status:
             return
@@ -606,6 +787,10 @@ class Default(object):
         self._prev_status = status
 
         linenr = "printf('%'.(len(line('$'))+2).'d/%d',line('.'),line('$'))"
+        if self._context['viewport']:
+            linenr = ("printf('%'.(len(denite#get_status('line_total'))+2)"
+                      ".'d/%d',line('.')+denite#get_status('line_offset'),"
+                      "denite#get_status('line_total'))")
 
         if self._context['statusline']:
             if self._floating or self._filter_floating:
@@ -633,19 +818,23 @@ class Default(object):
         return source_name
 
     def _get_candidate_display_text(self, index: int) -> str:
-        source_names = self._context['source_names']
         candidate = self._candidates[index]
-        terms = []
-        if self._is_multi and source_names != 'hide':
-            terms.append(self._context['max_source_name_format'].format(
-                self._get_display_source_name(candidate['source_name'])))
         encoding = self._context['encoding']
         abbr = candidate.get('abbr', candidate['word']).encode(
             encoding, errors='replace').decode(encoding, errors='replace')
-        terms.append(abbr[:int(self._context['max_candidate_width'])])
-        return (str(self._context['selected_icon'])
-                if index in self._selected_candidates
-                else ' ') + ' '.join(terms).replace('\n', '')
+        return self._get_candidate_display_prefix(index) + str(
+            abbr[:int(self._context['max_candidate_width'])]
+        ).replace('\n', '')
+
+    def _get_candidate_display_prefix(self, index: int) -> str:
+        source_names = self._context['source_names']
+        prefix = (str(self._context['selected_icon'])
+                  if index in self._selected_candidates else ' ')
+        if self._is_multi and source_names != 'hide':
+            prefix += self._context['max_source_name_format'].format(
+                self._get_display_source_name(
+                    self._candidates[index]['source_name'])) + ' '
+        return prefix
 
     def _get_max_height(self) -> int:
         return int(self._vim.options['lines']) if not self._floating else (
@@ -771,7 +960,7 @@ class Default(object):
 
     def _cleanup(self) -> None:
         if self._vim.current.buffer.number == self._bufnr:
-            self._cursor = self._vim.call('line', '.')
+            self._cursor = self._get_cursor_pos()
 
         # Note: Close filter window before preview window
         self._vim.call('denite#filter#_close_filter_window')
@@ -885,8 +1074,13 @@ class Default(object):
             self._move_to_first_line()
 
     def _move_to_pos(self, pos: int) -> None:
-        self._vim.call('cursor', pos, 0)
         self._cursor = pos
+        if self._context['viewport'] and not (
+                self._buffer_offset < pos <=
+                self._buffer_offset + len(self._displayed_texts)):
+            # Page in the rows
+            self._update_viewport()
+        self._vim.call('cursor', pos - self._buffer_offset, 0)
 
         if self._context['reversed']:
             self._vim.command('normal! zb')
@@ -104,7 +104,10 @@ def _filter_async(denite: Default, params: Params) -> typing.Any:
     # Note: overwrapped update_candidates breaks candidates
     denite._vim.call('denite#filter#_stop_filter_timer')
 
+    # Note: The newer input cancels the filtering.
+    denite._context['is_cancelable'] = True
     denite._update_candidates()
+    denite._context['is_cancelable'] = False
 
 
 def _move_up_path(denite: Default, params: Params) -> typing.Any:
@@ -134,7 +137,7 @@ def _quick_move(denite: Default, params: Params) -> typing.Any:
 
     def get_quick_move_table() -> typing.Dict[str, int]:
         table = {}
-        base = vim.call('line', '.')
+        base = denite._get_cursor_pos()
         for [key, number] in context['quick_move_table'].items():
             number = int(number)
             pos = ((base - number) if context['reversed']
@@ -149,18 +152,19 @@ def _quick_move(denite: Default, params: Params) -> typing.Any:
         for [key, number] in table.items():
             signid = 2000 + number
             name = 'denite_quick_move_' + str(number)
+            lnum = number - denite._buffer_offset
             if is_define:
                 if vim.call('exists', '*sign_define'):
                     vim.call('sign_define',
                              name, {'text': key, 'texthl': 'Special'})
                     vim.call('sign_place',
-                             signid, '', name, bufnr, {'lnum': number})
+                             signid, '', name, bufnr, {'lnum': lnum})
                 else:
                     vim.command(
                         f'sign define {name} text={key} texthl=Special')
                     vim.command(
                         f'sign place {signid} name={name} '
-                        f'line={number} buffer={bufnr}')
+                        f'line={lnum} buffer={bufnr}')
             else:
                 if vim.call('exists', '*sign_define'):
                     vim.call('sign_unplace', '',
@@ -260,7 +264,7 @@ def _toggle_matchers(denite: Default, params: Params) -> typing.Any:
 
 
 def _toggle_select(denite: Default, params: Params) -> typing.Any:
-    index = denite._vim.call('line', '.') - 1
+    index = denite._get_cursor_pos() - 1
     _toggle_select_candidate(denite, index)
     denite._update_displayed_texts()
     return denite._update_buffer()
@@ -291,11 +295,27 @@ def _update_buffer(denite: Default, params: Params) -> typing.Any:
 
 
 def _update_candidates(denite: Default, params: Params) -> typing.Any:
-    if not denite._is_async:
+    if not denite._is_async and not denite._is_paused:
         return
     denite._update_candidates()
 
 
+def _update_match_highlight(denite: Default, params: Params) -> typing.Any:
+    denite._update_match_highlight()
+
+
+def _update_viewport(denite: Default, params: Params) -> typing.Any:
+    # Note: Keep the screen position of the cursor
+    view = denite._vim.call('winsaveview')
+    offset = denite._buffer_offset
+    denite._update_viewport()
+    delta = offset - denite._buffer_offset
+    denite._vim.call('winrestview', {
+        'lnum': view['lnum'] + delta,
+        'topline': max(view['topline'] + delta, 1),
+    })
+
+
 MAPPINGS: typing.Dict[str, Action] = {
     'auto_action': _auto_action,
     'change_path': _change_path,
@@ -320,4 +340,6 @@ MAPPINGS: typing.Dict[str, Action] = {
     'toggle_select_all': _toggle_select_all,
     'update_buffer': _update_buffer,
     'update_candidates': _update_candidates,
+    'update_match_highlight': _update_match_highlight,
+    'update_viewport': _update_viewport,
 }
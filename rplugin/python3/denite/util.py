@@ -10,6 +10,8 @@ from os.path import expandvars
 from pathlib import Path
 from pynvim import Nvim
 from sys import executable, base_exec_prefix
+import copy
+import functools
 import importlib.util
 import inspect
 import re
@@ -17,6 +19,7 @@ import shutil
 import sys
 import traceback
 import typing
+import unicodedata
 
 UserContext = typing.Dict[str, typing.Any]
 Candidate = typing.Dict[str, typing.Any]
@@ -125,6 +128,65 @@ def split_input(text: str) -> typing.List[str]:
             re.split(r'(?<!\\)\s+', text) if x != ''] if text else ['']
 
 
+def is_narrowed_input(prev_text: str, text: str) -> bool:
+    """Check the matched results of {text} are narrowed from {prev_text}
+
+    Appended characters narrow the results except they extend an
+    escaped space or a negative("!") pattern.
+    """
+    if not text.startswith(prev_text) or prev_text.endswith('\\'):
+        return False
+    if (not prev_text or text[len(prev_text):][:1].isspace() or
+            re.search(r'(?<!\\)\s$', prev_text)):
+        return True
+    last = split_input(prev_text)[-1]
+    return not last.startswith('!') or last == '!'
+
+
+def get_diff_range(prev: typing.Sequence[typing.Any],
+                   new: typing.Sequence[typing.Any]
+                   ) -> typing.Tuple[int, int, typing.List[typing.Any]]:
+    """Get the range to update {prev} to {new}
+
+    It returns (start, end, items): prev[start:end] is replaced by items.
+    The common prefix and suffix are skipped, so the appended items are
+    prev[len(prev):] = items.
+    """
+    start = 0
+    max_len = min(len(prev), len(new))
+    while start < max_len and prev[start] == new[start]:
+        start += 1
+    end = 0
+    while end < max_len - start and prev[-end - 1] == new[-end - 1]:
+        end += 1
+    return (start, len(prev) - end, list(new[start:len(new) - end]))
+
+
+def match_candidates(context: UserContext,
+                     matchers: typing.List[typing.Any]) -> None:
+    """Filter context['candidates'] by {matchers} for each input term.
+    The term which starts with "!" removes the matched candidates."""
+    for pattern in split_input(context['input']):
+        ctx = copy.copy(context)
+        if pattern and pattern[0] == '!':
+            if pattern == '!':
+                continue
+            ctx['input'] = pattern[1:]
+            ignore = {id(x) for x in call_matchers(ctx, matchers)}
+            context['candidates'] = [x for x in context['candidates']
+                                     if id(x) not in ignore]
+        else:
+            ctx['input'] = pattern
+            context['candidates'] = call_matchers(ctx, matchers)
+
+
+def call_matchers(ctx: UserContext,
+                  matchers: typing.List[typing.Any]) -> Candidates:
+    for matcher in matchers:
+        ctx['candidates'] = matcher.filter(ctx)
+    return list(ctx['candidates'])
+
+
 def path2dir(path: str) -> str:
     return path if Path(path).is_dir() else str(Path(path).parent)
 
@@ -275,28 +337,44 @@ def import_rplugins(name: str, context: UserContext, source: str,
     which may exist only for making a module namespace.
     """
     for path, module_path in find_rplugins(context, source, loaded_paths):
-        module_name = 'denite.%s.%s' % (source, module_path)
-        spec = importlib.util.spec_from_file_location(module_name, path)
-        if not spec:
-            continue
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)  # type: ignore
-        if (not hasattr(module, name) or
-                inspect.isabstract(getattr(module, name))):
+        attr = import_rplugin(name, source, path, module_path)
+        if attr is None:
             continue
-        yield (getattr(module, name), path, module_path)
-
-
-def parse_tagline(line: str, tagpath: str) -> typing.Dict[str, typing.Any]:
+        yield (attr, path, module_path)
+
+
+def import_rplugin(name: str, source: str,
+                   path: str, module_path: str) -> typing.Any:
+    """Import the module of {path} found by 'find_rplugins' and get the
+    specified attr.  It returns None if the module does not have the attr
+    or the attr is abstract."""
+    module_name = 'denite.%s.%s' % (source, module_path)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if not spec:
+        return None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore
+    if (not hasattr(module, name) or
+            inspect.isabstract(getattr(module, name))):
+        return None
+    return getattr(module, name)
+
+
+def parse_tagline(line: str, tagpath: str,
+                  paths: typing.Optional[typing.Dict[str, str]] = None
+                  ) -> typing.Dict[str, typing.Any]:
+    """Parse the tag {line} of {tagpath}.  The resolved file paths are
+    cached in {paths} if it is given."""
     elem = line.split("\t")
-    file_path = Path(elem[1])
-    if not file_path.exists():
-        file_path = Path(tagpath).parent.joinpath(elem[1])
-    if readable(file_path):
-        file_path = file_path.resolve()
+    if paths is not None and elem[1] in paths:
+        file = paths[elem[1]]
+    else:
+        file = _get_tag_file(elem[1], tagpath)
+        if paths is not None:
+            paths[elem[1]] = file
     info = {
         'name': elem[0],
-        'file': str(file_path),
+        'file': file,
         'pattern': '',
         'line': '',
         'type': '',
@@ -331,6 +409,15 @@ def parse_tagline(line: str, tagpath: str) -> typing.Dict[str, typing.Any]:
     return info
 
 
+def _get_tag_file(file: str, tagpath: str) -> str:
+    file_path = Path(file)
+    if not file_path.exists():
+        file_path = Path(tagpath).parent.joinpath(file)
+    if readable(file_path):
+        file_path = file_path.resolve()
+    return str(file_path)
+
+
 def clearmatch(vim: Nvim) -> None:
     if not vim.call('exists', 'w:denite_match_id'):
         return
@@ -357,6 +444,60 @@ def truncate(vim: Nvim, word: str, max_length: int) -> str:
     return word
 
 
+def is_ascii_text(word: str) -> bool:
+    return len(word) == len(bytes(word, 'utf-8', 'surrogatepass'))
+
+
+def get_char_width(char: str, ambiwidth: str = 'single') -> int:
+    east_asian_width = unicodedata.east_asian_width(char)
+    if east_asian_width in ('W', 'F') or (
+            east_asian_width == 'A' and ambiwidth == 'double'):
+        return 2
+    if unicodedata.combining(char) or unicodedata.category(char) == 'Me':
+        return 0
+    return 1
+
+
+def get_display_width(word: str, ambiwidth: str = 'single') -> int:
+    """The display width of {word} like strwidth() without vim.
+    {ambiwidth} is the value of 'ambiwidth'."""
+    if is_ascii_text(word):
+        return len(word)
+    return sum([get_char_width(x, ambiwidth) for x in word])
+
+
+@functools.lru_cache(maxsize=65536)
+def truncate_display(word: str, max_length: int,
+                     ambiwidth: str = 'single') -> str:
+    """truncate() without vim.  The results are cached by the arguments."""
+    if get_display_width(word, ambiwidth) <= max_length:
+        return word
+
+    separator = '...'
+    footer_width = int(max_length / 2)
+    header_width = max_length - len(separator) - footer_width
+    text = word.replace('\t', ' ')
+    header = _get_width_part(text, header_width, ambiwidth)
+    footer = _get_width_part(text[::-1], footer_width, ambiwidth)[::-1]
+    ret = header + separator + footer
+
+    if is_ascii_text(ret):
+        return ret.ljust(max_length)[:max_length]
+    return _get_width_part(ret, max_length, ambiwidth)
+
+
+def _get_width_part(text: str, width: int, ambiwidth: str) -> str:
+    """The longest head of {text} within {width}"""
+    if is_ascii_text(text):
+        return text[:max(width, 0)]
+    current = 0
+    for [i, char] in enumerate(text):
+        current += get_char_width(char, ambiwidth)
+        if current > width:
+            return text[:i]
+    return text
+
+
 def get_python_exe() -> str:
     if 'py' in str(Path(executable).name):
         return executable
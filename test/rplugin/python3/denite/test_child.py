@@ -0,0 +1,176 @@
+from types import SimpleNamespace
+import inspect
+
+from denite.base.source import Base
+from denite.child import Child, FilterSource
+from denite.filter.matcher.fuzzy import Filter as Fuzzy
+from denite.filter.matcher.substring import Filter as Substring
+from denite.parallel import PARALLEL_THRESHOLD
+
+
+class CountingMatcher(Substring):
+    def __init__(self):
+        super().__init__(None)
+        self.count = 0
+
+    def filter(self, context):
+        self.count += len(context['candidates'])
+        return super().filter(context)
+
+
+class AsyncSource(Base):
+    def __init__(self):
+        super().__init__(None)
+        self.name = 'async'
+        self.matchers = ['matcher/substring']
+        self.sorters = []
+        self.init_count = 0
+
+    def on_init(self, context):
+        self.init_count += 1
+        context['__count'] = 0
+
+    def gather_candidates(self, context):
+        context['__count'] += 1
+        context['is_async'] = context['__count'] < 3
+        return [{'word': f'{x}{context["__count"]}'}
+                for x in ['foo', 'bar', 'foobar']]
+
+
+def _start_child(source, context, is_process=False):
+    child = Child(None)
+    child._is_process = is_process
+    child._custom = {
+        'source': {'_': {}}, 'filter': {}, 'kind': {'_': {}}, 'action': {},
+    }
+    child._filters['matcher/substring'] = Substring(None)
+    child._sources[source.name] = source
+    return child
+
+
+def _match(child, matcher, source, entire, text, ignorecase=True,
+           path='/', match_jobs=0):
+    ctx = {
+        'input': text, 'ignorecase': ignorecase, 'path': path,
+        'all_candidates': entire, 'match_jobs': match_jobs,
+    }
+    return [x['word'] for x in
+            child._match_source_candidates(ctx, source, [matcher])]
+
+
+def test_match_cache():
+    child = Child(None)
+    matcher = CountingMatcher()
+    source = SimpleNamespace(index=0, max_candidates=1000)
+    entire = [{'word': x} for x in ['Abc', 'abd', 'xyz', 'aXc']]
+
+    assert _match(child, matcher, source, entire, 'a') == [
+        'Abc', 'abd', 'aXc']
+    assert matcher.count == 4
+
+    # Narrowed from the results of "a"
+    matcher.count = 0
+    assert _match(child, matcher, source, entire, 'ab') == ['Abc', 'abd']
+    assert matcher.count == 3
+
+    # Cached
+    matcher.count = 0
+    assert _match(child, matcher, source, entire, 'ab') == ['Abc', 'abd']
+    assert matcher.count == 0
+
+    # The cache is cleared by the context
+    assert _match(child, matcher, source, entire, 'ab',
+                  ignorecase=False) == ['abd']
+    assert _match(child, matcher, source, entire, 'A',
+                  ignorecase=False) == ['Abc']
+    matcher.count = 0
+    assert _match(child, matcher, source, entire, 'A',
+                  ignorecase=False, path='/tmp') == ['Abc']
+    assert matcher.count == 4
+
+    # The appended candidates are matched later
+    entire.append({'word': 'ABC'})
+    assert _match(child, matcher, source, entire, 'A',
+                  ignorecase=False, path='/tmp') == ['Abc', 'ABC']
+
+
+def test_parallel_match():
+    child = Child(None)
+    fuzzy = Fuzzy(None)
+    fuzzy.path = inspect.getfile(Fuzzy)
+    source = SimpleNamespace(index=0, max_candidates=100000)
+    entire = [{'word': f'dir{x % 37}/file{x}.{"py" if x % 3 else "vim"}'}
+              for x in range(PARALLEL_THRESHOLD + 5000)]
+
+    try:
+        for text in ['d', 'dir1', 'dir1/f', 'dir1/f9', '!py', 'fl9 vim', 'zz']:
+            assert (_match(child, fuzzy, source, entire, text,
+                           match_jobs=2) ==
+                    _match(Child(None), fuzzy, source, entire, text))
+        assert child._parallel_matcher
+
+        # The results are truncated by the max candidates later
+        source.max_candidates = 100
+        assert (_match(child, fuzzy, source, entire, 'fi',
+                       match_jobs=2)[:100] ==
+                _match(Child(None), fuzzy, source, entire, 'fi')[:100])
+    finally:
+        if child._parallel_matcher:
+            child._parallel_matcher.close()
+
+
+def test_filter_process():
+    context = {
+        'input': '', 'matchers': '', 'sorters': '', 'path': '/',
+        'is_redraw': False, 'messages': [], 'error_messages': [],
+        'is_windows': False, 'ignorecase': True, 'smartcase': False,
+        'expand': False, 'unique': False, 'reversed': False,
+        'max_candidate_width': 200, 'sources': [{'name': 'async', 'args': []}],
+    }
+    source = AsyncSource()
+    parent = _start_child(source, context)
+    parent.on_init(context)
+    parent.gather_candidates(context)
+    process = _start_child(source, context, is_process=True)
+    process.init_filters(context, parent.get_filter_sources())
+
+    sync_source = AsyncSource()
+    sync = _start_child(sync_source, context)
+    sync.on_init(context)
+    sync.gather_candidates(context)
+
+    for text in ['', 'foo', 'bar', 'ob']:
+        context['input'] = text
+        process.set_candidates(parent.update_candidates(context))
+        assert process.filter_candidates(context) == sync.filter_candidates(
+            context)
+    assert not process.is_async()
+
+    # The source is owned by the parent
+    assert parent._current_sources[0].init_count == 1
+    assert isinstance(process._current_sources[0], FilterSource)
+    assert parent.get_match_positions(
+        context, process.filter_candidates(context)[5]) == [[(2, 4)]] * 3
+
+
+def test_shared_candidates():
+    shared = [{'word': 'foo'}, {'word': 'x' * 300}]
+    context = {'max_candidate_width': 100}
+    child = Child(None)
+
+    def gather(name, index):
+        source = SimpleNamespace(
+            name=name, index=index, gather_candidates=lambda x: shared)
+        return child._gather_source_candidates(context, source)
+
+    candidates = gather('line', 0)
+    assert candidates[0] is shared[0]
+    assert candidates[0]['source_index'] == 0
+    assert candidates[1]['word'] == 'x' * 120
+    assert shared[1]['word'] == 'x' * 300
+    assert gather('line', 0)[0] is shared[0]
+
+    # The shared candidates of the other source index are copied
+    candidates = gather('line', 1)
+    assert candidates[0]['source_index'] == 1
+    assert shared[0]['source_index'] == 0
@@ -0,0 +1,72 @@
+from denite.filter.matcher.fuzzy import Filter as Fuzzy
+from denite.filter.matcher.substring import Filter as Substring
+from denite.index import Index, get_fuzzy_grams, get_substring_grams
+
+WORDS = [
+    'autoload/denite/helper.vim',
+    'autoload/denite/init.vim',
+    'rplugin/python3/denite/child.py',
+    'rplugin/python3/denite/filter/matcher/fuzzy.py',
+    'rplugin/python3/denite/source/buffer.py',
+    'rplugin/python3/denite/ui/default.py',
+    'doc/denite.txt',
+    'README.md',
+    'Makefile',
+    'test/rplugin/python3/denite/test_util.py',
+    'C:\\Users\\foo\\Documents\\Readme.TXT',
+    'src/Straße/Übersicht.md',
+    'x' * 300 + '/long_' + 'y' * 300 + '.py',
+    '',
+]
+PATTERNS = [
+    'a', 'py', 'den', 'denite', 'buffer', 'bufpy', 'rplugin/denite',
+    'ui/def', 'mk', 'MAKE', 'readme', 'ReadMe', 'users\\foo', 'oo\\doc',
+    'straße', 'ÜBER', 'sicht', 'long_y', 'xy', 'zzq', 'e/', '.py', '-',
+]
+
+
+def _filter(matcher, candidates, text, ignorecase, index=None):
+    context = {
+        'input': text,
+        'ignorecase': ignorecase,
+        'candidates': candidates,
+    }
+    if index:
+        context['candidates_index'] = index
+    return [x['word'] for x in matcher.filter(context)]
+
+
+def test_index():
+    candidates = [{'word': x} for x in WORDS]
+    index = Index()
+    # Extended incrementally
+    for i in range(0, len(candidates), 3):
+        index.extend(candidates[i:i + 3])
+    assert len(index) == len(candidates)
+
+    for matcher in [Fuzzy(None), Substring(None)]:
+        for pattern in PATTERNS:
+            for ignorecase in [True, False]:
+                expected = _filter(matcher, candidates, pattern, ignorecase)
+                assert _filter(matcher, candidates, pattern,
+                               ignorecase, index) == expected
+                # The slice of the candidates
+                assert _filter(matcher, candidates[2:9], pattern,
+                               ignorecase, index) == _filter(
+                                   matcher, candidates[2:9], pattern,
+                                   ignorecase)
+                # The candidates which are not indexed
+                others = [candidates[5], {'word': 'README.txt'},
+                          candidates[1]]
+                assert _filter(matcher, others, pattern,
+                               ignorecase, index) == _filter(
+                                   matcher, others, pattern, ignorecase)
+
+
+def test_grams():
+    assert get_substring_grams('AbcD') == ([b'abc', b'bcd'], b'abcd')
+    assert get_substring_grams('ab') == ([], b'ab')
+    # The trigrams of the parts without the wildcard
+    assert get_fuzzy_grams('ab.cd') == ([], b'ab.cd')
+    assert get_fuzzy_grams('a.bc') == ([], b'a.bc')
+    assert get_fuzzy_grams('.,;') == ([b'.,;'], b'.,;')
@@ -0,0 +1,157 @@
+from types import SimpleNamespace
+import os
+
+from denite.child import Child
+from denite.registry import Registry
+
+SOURCE = '''
+class Source(object):
+    name = {name!r}
+    value = {value!r}
+'''
+BASE_SOURCE = '''
+from denite.base.source import Base
+
+
+class Source(Base):
+    def __init__(self, vim):
+        super().__init__(vim)
+        self.name = 'foo'
+        self.value = 1
+
+    def gather_candidates(self, context):
+        return []
+'''
+
+
+def _write_source(rtp, module, name, value):
+    path = rtp.joinpath('rplugin', 'python3', 'denite', 'source',
+                        module + '.py')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(SOURCE.format(name=name, value=value))
+    return str(path)
+
+
+def _registry(aliases={}):
+    loaded = []
+
+    def loader(cls, path, module_path):
+        loaded.append(path)
+        plugin = cls()
+        plugin.path = path
+        registry[plugin.name] = plugin
+        for alias in aliases.get(plugin.name, []):
+            registry[alias] = plugin
+        return plugin
+    registry = Registry('source', 'Source', loader)
+    return (registry, loaded)
+
+
+def _context(*rtps):
+    return {'runtimepath': ','.join([str(x) for x in rtps])}
+
+
+def test_index(tmp_path):
+    path = _write_source(tmp_path, 'foo', 'foo', 1)
+    context = _context(tmp_path)
+    index = {}
+
+    # Miss
+    [registry, loaded] = _registry()
+    assert registry.update(context, index)
+    assert loaded == [path]
+    assert index[path][1] == 'foo'
+
+    # Hit: the module is imported when it is referenced first
+    [registry, loaded] = _registry()
+    assert not registry.update(context, index)
+    assert loaded == []
+    assert 'foo' in registry
+    assert registry.keys() == ['foo']
+    assert registry.values() == []
+    assert registry['foo'].value == 1
+    assert loaded == [path]
+
+    # Miss by the mtime
+    _write_source(tmp_path, 'foo', 'foo', 2)
+    os.utime(path, (0, 0))
+    [registry, loaded] = _registry()
+    assert registry.update(context, index)
+    assert loaded == [path]
+    assert index[path][0] == 0
+    assert registry['foo'].value == 2
+
+
+def test_override(tmp_path):
+    first = _write_source(tmp_path / 'a', 'foo', 'foo', 1)
+    second = _write_source(tmp_path / 'b', 'bar', 'foo', 2)
+    context = _context(tmp_path / 'a', tmp_path / 'b')
+    index = {}
+
+    [registry, loaded] = _registry()
+    registry.update(context, index)
+    assert loaded == [first, second]
+    assert registry['foo'].value == 2
+
+    # By the index
+    [registry, loaded] = _registry()
+    registry.update(context, index)
+    assert registry['foo'].value == 2
+    assert loaded == [second]
+
+    # The earlier plugin is changed
+    os.utime(first, (0, 0))
+    [registry, loaded] = _registry()
+    registry.update(context, index)
+    assert loaded == [first]
+    assert registry['foo'].value == 2
+    assert loaded == [first, second]
+
+
+def test_alias(tmp_path):
+    path = _write_source(tmp_path, 'foo', 'foo', 1)
+    context = _context(tmp_path)
+    index = {}
+    _registry()[0].update(context, index)
+
+    [registry, loaded] = _registry({'foo': ['bar']})
+    registry.update(context, index)
+    registry.set_alias('bar', 'foo')
+    registry.set_alias('baz', 'unknown')
+    assert 'bar' in registry
+    assert 'baz' not in registry
+    assert loaded == []
+
+    # The alias imports the plugin
+    assert registry['bar'].value == 1
+    assert loaded == [path]
+    assert registry['foo'] is registry['bar']
+
+
+def test_persisted_index(tmp_path):
+    path = _write_source(tmp_path, 'foo', 'foo', 1)
+    with open(path, 'w') as f:
+        f.write(BASE_SOURCE)
+    vim = SimpleNamespace(call=lambda *args: None)
+    context = {
+        'runtimepath': str(tmp_path),
+        'cache_directory': str(tmp_path / 'cache'),
+    }
+
+    def update():
+        child = Child(vim)
+        child._custom = {
+            'source': {'_': {}}, 'filter': {}, 'kind': {'_': {}},
+            'action': {}, 'alias_source': {}, 'alias_filter': {},
+        }
+        child._update_registries(context)
+        return child
+
+    assert update()._sources['foo'].value == 1
+    assert list(tmp_path.joinpath('cache', 'registry').iterdir())
+
+    # The new process does not import the module
+    child = update()
+    assert 'foo' in child._sources
+    assert 'foo' not in [x.name for x in child._sources.values()]
+    assert child._sources['foo'].value == 1
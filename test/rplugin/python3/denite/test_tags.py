@@ -0,0 +1,85 @@
+import os
+
+from denite.tags import (
+    get_tagfile, is_cached, acquire_tagfiles, release_tagfiles)
+
+NAMES = [
+    'Abc', 'Abd', 'BAR', 'Bar', 'FOO', 'Foo', 'Foobar',
+    'aBc', 'abc', 'abcd', 'bar', 'baz', 'foo', 'foo_bar', 'fooBar', 'x',
+]
+
+
+def _write_tags(path, names, sorted_value):
+    lines = [
+        '!_TAG_FILE_FORMAT\t2\t/extended format/',
+        f'!_TAG_FILE_SORTED\t{sorted_value}\t/0=unsorted, 1=sorted/',
+    ]
+    lines += [f'{x}\tfile.py\t/^{x}$/;"\tf' for x in names]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def _search(path, prefix, ignorecase):
+    return [x.split(b'\t')[0].decode() for x in get_tagfile(path).search(
+        prefix.encode(), ignorecase)]
+
+
+def _expected(names, prefix, ignorecase):
+    if ignorecase:
+        return [x for x in names if x.lower().startswith(prefix.lower())]
+    return [x for x in names if x.startswith(prefix)]
+
+
+def test_search(tmp_path):
+    path = _write_tags(tmp_path / 'tags', sorted(NAMES), 1)
+    assert get_tagfile(path).sorted == 1
+    for prefix in ['a', 'ab', 'Abc', 'bar', 'FOO', 'foo', 'fooB', 'x', 'z',
+                   '0', '~']:
+        assert _search(path, prefix, False) == _expected(
+            sorted(NAMES), prefix, False)
+        # The case variants are searched in the order of the variants
+        assert sorted(_search(path, prefix, True)) == sorted(_expected(
+            sorted(NAMES), prefix, True))
+
+    # The prefix is longer than the case variants
+    assert sorted(_search(path, 'foobar', True)) == ['Foobar', 'fooBar']
+
+
+def test_search_foldcase(tmp_path):
+    names = sorted(NAMES, key=lambda x: (x.upper(), x))
+    path = _write_tags(tmp_path / 'tags', names, 2)
+    assert get_tagfile(path).sorted == 2
+    for prefix in ['a', 'AB', 'Abc', 'bar', 'foo', 'foo_', 'x', 'z']:
+        assert _search(path, prefix, True) == _expected(names, prefix, True)
+
+
+def test_search_unsorted(tmp_path):
+    path = _write_tags(tmp_path / 'tags', NAMES[::-1], 0)
+    assert _search(path, 'foo', False) == []
+    assert len(list(get_tagfile(path).get_lines())) == len(NAMES)
+
+
+def test_eviction(tmp_path):
+    path = _write_tags(tmp_path / 'tags', sorted(NAMES), 1)
+    other = _write_tags(tmp_path / 'other', sorted(NAMES), 1)
+    acquire_tagfiles([path])
+    acquire_tagfiles([path, other])
+    tagfile = get_tagfile(path)
+    other_tagfile = get_tagfile(other)
+    assert get_tagfile(path) is tagfile
+
+    # The file is used by the other session
+    release_tagfiles([path, other])
+    assert is_cached(tagfile)
+    assert not is_cached(other_tagfile)
+
+    # The changed file is evicted even if it is used
+    _write_tags(tmp_path / 'tags', sorted(NAMES)[1:], 1)
+    os.utime(path, (0, 0))
+    release_tagfiles([])
+    assert not is_cached(tagfile)
+    tagfile = get_tagfile(path)
+    assert _search(path, 'Abc', False) == []
+
+    release_tagfiles([path])
+    assert not is_cached(tagfile)
@@ -17,6 +17,43 @@ def test_split_input():
     assert util.split_input('abc\ def') == ['abc def']
 
 
+def test_get_diff_range():
+    assert util.get_diff_range(['a', 'b'], ['a', 'b']) == (2, 2, [])
+    assert util.get_diff_range(['a'], ['a', 'b', 'c']) == (1, 1, ['b', 'c'])
+    assert util.get_diff_range(['a', 'b', 'c'], ['a', 'x', 'c']) == (
+        1, 2, ['x'])
+    assert util.get_diff_range(['a', 'b', 'c'], ['c']) == (0, 2, [])
+    assert util.get_diff_range(['a', 'a'], ['a']) == (1, 2, [])
+    assert util.get_diff_range([], ['a']) == (0, 0, ['a'])
+
+
+def test_get_display_width():
+    assert util.get_display_width('abc') == 3
+    assert util.get_display_width('日本語') == 6
+    assert util.get_display_width('e\u0301') == 1
+    assert util.get_display_width('\u00b1') == 1
+    assert util.get_display_width('\u00b1', 'double') == 2
+
+
+def test_truncate_display():
+    assert util.truncate_display('abc', 5) == 'abc'
+    assert util.truncate_display('abcdefghij', 8) == 'a...ghij'
+    assert util.truncate_display('日本語日本語', 8) == '...本語'
+    assert util.truncate_display('abc日本語def', 9) == 'ab...def '
+
+
+def test_is_narrowed_input():
+    assert util.is_narrowed_input('', 'foo')
+    assert util.is_narrowed_input('foo', 'foob')
+    assert util.is_narrowed_input('foo', 'foo bar')
+    assert util.is_narrowed_input('foo !', 'foo !b')
+    assert util.is_narrowed_input('!b ', '!b a')
+    assert not util.is_narrowed_input('foob', 'foo')
+    assert not util.is_narrowed_input('foo !b', 'foo !ba')
+    assert not util.is_narrowed_input('foo\\', 'foo\\ b')
+    assert not util.is_narrowed_input('!foo\\ ', '!foo\\ b')
+
+
 def test_convert2regex_pattern():
     assert util.convert2regex_pattern('def') == 'def'
     assert util.convert2regex_pattern('foo bar') == 'foo|bar'